@@ -0,0 +1,130 @@
+from django.db import connections
+
+from .dimensions import dimension_names
+from .models import Data
+
+DISTRIBUTION_COLUMNS = ("end_year", "country", "topic", "region")
+# What each distribution groups on: the dictionary code, except for end_year,
+# which has none. Codes are decoded to names once the counts are in.
+DISTRIBUTION_FIELDS = ("end_year", "country_code", "topic_code", "region_code")
+CODED_COLUMNS = ("country", "topic", "region")
+AVERAGE_COLUMNS = ("intensity", "likelihood", "relevance")
+TOTAL_COLUMNS = ("topic", "country", "region")
+
+
+def _average(total, count):
+    return total / count if count else None
+
+
+def distribution_order(column):
+    """Sort key for distribution entries: by value, NULL first."""
+    return lambda entry: (entry[column] is not None, entry[column] or "")
+
+
+def _overview_grouping_sets(queryset):
+    """
+    PostgreSQL: one scan with GROUPING SETS, one set per distribution plus the
+    grand total for the averages. GROUPING() tells the sets apart.
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    base = queryset.values(*DISTRIBUTION_FIELDS, *AVERAGE_COLUMNS).order_by()
+    base_sql, params = base.query.sql_with_params()
+
+    dims = ", ".join(quote(field) for field in DISTRIBUTION_FIELDS)
+    counts = ", ".join(f"COUNT({quote(field)})" for field in DISTRIBUTION_FIELDS)
+    sums = ", ".join(
+        f"SUM({quote(column)}), COUNT({quote(column)})" for column in AVERAGE_COLUMNS
+    )
+    sets = ", ".join(f"({quote(field)})" for field in DISTRIBUTION_FIELDS)
+    sql = (
+        f"SELECT GROUPING({dims}), {dims}, {counts}, {sums} "
+        f"FROM ({base_sql}) AS base GROUP BY GROUPING SETS ({sets}, ())"
+    )
+
+    width = len(DISTRIBUTION_COLUMNS)
+    full_mask = (1 << width) - 1
+    distributions = {column: [] for column in DISTRIBUTION_COLUMNS}
+    averages = {column: None for column in AVERAGE_COLUMNS}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            mask = row[0]
+            values = row[1:1 + width]
+            col_counts = row[1 + width:1 + 2 * width]
+            tail = row[1 + 2 * width:]
+            if mask == full_mask:
+                for position, column in enumerate(AVERAGE_COLUMNS):
+                    total, count = tail[2 * position], tail[2 * position + 1]
+                    averages[column] = _average(float(total or 0), count)
+                continue
+            # The grouped column is the one whose GROUPING bit is clear.
+            position = next(i for i in range(width) if not mask & (1 << (width - 1 - i)))
+            column = DISTRIBUTION_COLUMNS[position]
+            distributions[column].append({column: values[position], "count": col_counts[position]})
+    return averages, distributions
+
+
+def _overview_union_all(queryset):
+    """
+    Portable plan (SQLite): every distribution and the averages as branches of
+    one UNION ALL statement over the same filtered base, so the whole overview
+    is still a single round trip.
+    """
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    base = queryset.values(*DISTRIBUTION_FIELDS, *AVERAGE_COLUMNS).order_by()
+    base_sql, base_params = base.query.sql_with_params()
+
+    padding = ", ".join(["NULL"] * (2 * len(AVERAGE_COLUMNS)))
+    branches = [
+        f"SELECT {position}, {quote(field)}, COUNT({quote(field)}), {padding} "
+        f"FROM ({base_sql}) AS base GROUP BY {quote(field)}"
+        for position, field in enumerate(DISTRIBUTION_FIELDS)
+    ]
+    sums = ", ".join(f"SUM({quote(column)}), COUNT({quote(column)})" for column in AVERAGE_COLUMNS)
+    branches.append(f"SELECT {len(DISTRIBUTION_COLUMNS)}, NULL, COUNT(*), {sums} FROM ({base_sql}) AS base")
+    params = tuple(base_params) * len(branches)
+
+    distributions = {column: [] for column in DISTRIBUTION_COLUMNS}
+    averages = {column: None for column in AVERAGE_COLUMNS}
+    with connection.cursor() as cursor:
+        cursor.execute(" UNION ALL ".join(branches), params)
+        for position, value, count, *tail in cursor.fetchall():
+            if position == len(DISTRIBUTION_COLUMNS):
+                for index, column in enumerate(AVERAGE_COLUMNS):
+                    total, total_count = tail[2 * index], tail[2 * index + 1]
+                    averages[column] = _average(float(total or 0), total_count)
+                continue
+            column = DISTRIBUTION_COLUMNS[position]
+            distributions[column].append({column: value, "count": count})
+    return averages, distributions
+
+
+def overview_aggregates(queryset=None):
+    """
+    Computes everything getOverview returns in a single statement: the three
+    averages, the four distributions (each ordered by value) and the distinct
+    totals. PostgreSQL answers it in one scan with GROUPING SETS; other
+    backends use UNION ALL. The categorical distributions are grouped on
+    dictionary codes and decoded with one more, small, query.
+    """
+    queryset = Data.objects.all() if queryset is None else queryset
+    if connections[queryset.db].vendor == "postgresql":
+        averages, distributions = _overview_grouping_sets(queryset)
+    else:
+        averages, distributions = _overview_union_all(queryset)
+
+    names = dimension_names(entry[column] for column in CODED_COLUMNS for entry in distributions[column])
+    for column in CODED_COLUMNS:
+        for entry in distributions[column]:
+            entry[column] = names.get(entry[column])
+    for column, entries in distributions.items():
+        entries.sort(key=distribution_order(column))
+
+    # Distinct totals exclude blank strings but, like the old DISTINCT count, include NULL.
+    totals = {
+        column: sum(1 for entry in distributions[column] if entry[column] != "")
+        for column in TOTAL_COLUMNS
+    }
+    return averages, distributions, totals
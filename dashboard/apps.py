@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        # Connect the ingest signal receivers; columnar's after generation's,
+        # so the engine refresh is queued after the generation bump.
+        from . import facets, generation, rollups  # noqa: F401
+        from . import columnar  # noqa: F401
+        # Register the system checks.
+        from . import checks  # noqa: F401
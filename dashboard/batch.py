@@ -0,0 +1,48 @@
+import uuid
+from contextlib import contextmanager
+
+from django.db import connections, router, transaction
+
+from .tables import table_model
+from .models import Data
+
+# Columns the raw-row dashboard aggregates read: they group and count on the
+# dimension codes, so the names stay behind.
+BASE_FIELDS = (
+    "end_year", "end_year_value", "intensity", "likelihood", "relevance",
+    "country_code", "region_code", "topic_code", "sector_code", "pestle_code",
+)
+
+# Batchable actions that always aggregate raw rows, whatever the filters.
+RAW_ACTIONS = {"getOverview", "getBubbleChartData"}
+# Batchable actions that use the rollup when the filters allow it.
+ROLLUP_ACTIONS = {"getIntensity", "getTopicDistribution", "getTrendsOverYears", "getWorldMapData"}
+
+
+def needs_raw_rows(action, filters):
+    return action in RAW_ACTIONS or (action in ROLLUP_ACTIONS and not filters.rollup)
+
+
+@contextmanager
+def shared_base(filters, using=None):
+    """
+    Materialises the rows matching `filters` once, as a temporary table, and
+    yields a model bound to it so every aggregate of a batch scans only the
+    filtered rows. The table is dropped on exit.
+    """
+    using = using or router.db_for_read(Data)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = f"dashboard_base_{uuid.uuid4().hex[:12]}"
+    select_sql, params = (
+        filters.apply(Data.objects.using(using)).values("id", *BASE_FIELDS).order_by().query.sql_with_params()
+    )
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TEMPORARY TABLE {quote(table)} AS {select_sql}", params)
+        try:
+            yield table_model(table, with_indexes=False, fields=BASE_FIELDS)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {quote(table)}")
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from . import columnar
+
+
+@register()
+def check_engine(app_configs, **kwargs):
+    """Refuses to start with DASHBOARD_ENGINE="numpy" when NumPy is missing."""
+    if settings.DASHBOARD_ENGINE == "numpy" and columnar.np is None:
+        return [Error(
+            columnar.ENGINE_ERROR,
+            hint="Install numpy or set DASHBOARD_ENGINE=orm.",
+            id="dashboard.E001",
+        )]
+    return []
@@ -0,0 +1,451 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, router, transaction
+from django.dispatch import receiver
+
+try:
+    import numpy as np
+except ImportError:  # optional: the engine is disabled without NumPy
+    np = None
+
+from .aggregates import distribution_order
+from .dimensions import DIMENSION_COLUMNS, match_codes
+from .filters import MEASURE_RANGES, YEAR_RANGES
+from .generation import current_generation
+from .models import Data, Dimension
+from .signals import data_load_finished, dataset_replaced
+from .snapshots import SnapshotError, current_snapshot, read_snapshot, snapshot_dir, snapshot_lock, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+ENGINE_ERROR = "DASHBOARD_ENGINE is 'numpy' but NumPy is not installed."
+NULL_CODE = -1
+NULL_YEAR = 0
+MEASURES = ("intensity", "likelihood", "relevance")
+LOAD_CHUNK_SIZE = 20000
+# Every column array an engine holds.
+ARRAY_FIELDS = (
+    "end_year",
+    *(f"{column}_code" for column in DIMENSION_COLUMNS),
+    *YEAR_RANGES.values(),
+    *MEASURES,
+)
+
+_engine = None
+_engine_lock = threading.Lock()
+# One background thread builds engines, so requests never wait on a rebuild.
+_refresher = None
+_refresh_queued = False
+
+
+def _compare(values, operator, value):
+    if operator == "min":
+        return values >= value
+    if operator == "max":
+        return values <= value
+    return values == value
+
+
+def _rows(columns):
+    """One dict per row from a dict of equal-length columns."""
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+class ColumnarEngine:
+    """
+    The Data table held in memory as NumPy columns: dictionary codes for the
+    categoricals (-1 for NULL), integer years (0 for NULL) and float measures
+    (NaN for NULL). Dashboard aggregates are computed with boolean masks and
+    bincount over np.unique group indexes, matching the SQL results.
+
+    The arrays are either read from the database or memory-mapped from a
+    snapshot (see snapshots.py); the engine only reads them.
+    """
+
+    def __init__(self, generation, arrays, dictionary):
+        self.generation = generation
+        self.end_year = arrays["end_year"]
+        self.codes = {column: arrays[f"{column}_code"] for column in DIMENSION_COLUMNS}
+        self.years = {name: arrays[field] for name, field in YEAR_RANGES.items()}
+        self.measures = {measure: arrays[measure] for measure in MEASURES}
+        self.size = len(self.end_year)
+
+        self.end_year_names = dictionary["end_year_names"]
+        self.names = {int(pk): name for pk, name in dictionary["names"]}
+        self.blank_codes = dictionary["blank_codes"]
+
+    @classmethod
+    def from_database(cls, generation, using=None):
+        """Reads the Data table into fresh arrays."""
+        using = using or router.db_for_read(Data)
+        fields = ["end_year", *ARRAY_FIELDS[1:]]
+        values = {field: [] for field in fields}
+        rows = Data.objects.using(using).values_list(*fields).order_by()
+        for row in rows.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            for field, value in zip(fields, row):
+                values[field].append(value)
+
+        # end_year text is grouped by getOverview; give it local codes.
+        end_year_names = sorted({value for value in values["end_year"] if value is not None})
+        end_year_codes = {name: code for code, name in enumerate(end_year_names)}
+        arrays = {
+            "end_year": np.array(
+                [NULL_CODE if value is None else end_year_codes[value] for value in values["end_year"]],
+                dtype=np.int64,
+            )
+        }
+        for column in DIMENSION_COLUMNS:
+            field = f"{column}_code"
+            arrays[field] = np.array(
+                [NULL_CODE if value is None else value for value in values[field]], dtype=np.int64
+            )
+        for field in YEAR_RANGES.values():
+            arrays[field] = np.array([value or NULL_YEAR for value in values[field]], dtype=np.int32)
+        for measure in MEASURES:
+            arrays[measure] = np.array(values[measure], dtype=np.float64)
+
+        dimensions = Dimension.objects.using(using)
+        dictionary = {
+            "end_year_names": end_year_names,
+            "names": list(dimensions.values_list("pk", "name")),
+            "blank_codes": {
+                column: list(dimensions.filter(column=column, name="").values_list("pk", flat=True))
+                for column in DIMENSION_COLUMNS
+            },
+        }
+        return cls(generation, arrays, dictionary)
+
+    @classmethod
+    def from_snapshot(cls, path):
+        """Maps a snapshot written by snapshots.write_snapshot."""
+        generation, arrays, dictionary = read_snapshot(path)
+        return cls(generation, arrays, dictionary)
+
+    def arrays(self):
+        """The engine's columns by field name, as stored in snapshots."""
+        arrays = {"end_year": self.end_year}
+        arrays.update({f"{column}_code": codes for column, codes in self.codes.items()})
+        arrays.update({YEAR_RANGES[name]: years for name, years in self.years.items()})
+        arrays.update(self.measures)
+        return arrays
+
+    def dictionary(self):
+        """The engine's string dictionaries, as stored in snapshots."""
+        return {
+            "end_year_names": self.end_year_names,
+            "names": sorted(self.names.items()),
+            "blank_codes": self.blank_codes,
+        }
+
+    # Helpers
+
+    def _name(self, code):
+        return None if code == NULL_CODE else self.names.get(int(code))
+
+    def _end_year_name(self, code):
+        return None if code == NULL_CODE else self.end_year_names[code]
+
+    def _names(self, codes):
+        return [self._name(code) for code in codes]
+
+    @staticmethod
+    def _code(code):
+        return None if code == NULL_CODE else int(code)
+
+    def decode(self, entries, columns):
+        """Like dimensions.decode_dimensions, from the engine's dictionary."""
+        decoded = []
+        for entry in entries:
+            row = {}
+            for key, value in entry.items():
+                column = key[:-len("_code")] if key.endswith("_code") else None
+                if column in columns:
+                    row[column] = None if value is None else self.names.get(value)
+                else:
+                    row[key] = value
+            decoded.append(row)
+        return decoded
+
+    @staticmethod
+    def _number(value):
+        return None if np.isnan(value) else float(value)
+
+    @staticmethod
+    def _numbers(values):
+        return [None if value != value else value for value in values.tolist()]
+
+    def mask(self, filters):
+        """Boolean row mask for a CompiledFilter, with SQL NULL semantics."""
+        mask = np.ones(self.size, dtype=bool)
+        for field, operator, value in filters.spec:
+            if field in DIMENSION_COLUMNS:
+                mask &= np.isin(self.codes[field], match_codes(field, value, operator))
+            elif field in YEAR_RANGES:
+                years = self.years[field]
+                mask &= (years != NULL_YEAR) & _compare(years, operator, value)
+            else:
+                # Comparisons with NaN are False, like comparisons with NULL.
+                mask &= _compare(self.measures[MEASURE_RANGES[field]], operator, value)
+        return mask
+
+    @staticmethod
+    def _groups(keys):
+        uniques, inverse = np.unique(keys, return_inverse=True)
+        return uniques, inverse.reshape(-1)
+
+    @staticmethod
+    def _pack(columns):
+        """Packs several code columns into one int64 key per row (NULL -1 becomes 0)."""
+        radixes = [int(column.max(initial=NULL_CODE)) + 2 for column in columns]
+        key = np.zeros(len(columns[0]), dtype=np.int64)
+        for column, radix in zip(columns, radixes):
+            key = key * radix + (column + 1)
+        return key, radixes
+
+    @staticmethod
+    def _unpack(key, radixes):
+        codes = []
+        for radix in reversed(radixes):
+            codes.append(int(key % radix) - 1)
+            key //= radix
+        return codes[::-1]
+
+    def _averages(self, inverse, size, mask, measure):
+        values = self.measures[measure][mask]
+        present = ~np.isnan(values)
+        sums = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=size)
+        counts = np.bincount(inverse, weights=present, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def _counts(self, inverse, size, mask, column):
+        """COUNT(column) per group: rows whose column is not NULL."""
+        return np.bincount(inverse, weights=self.codes[column][mask] != NULL_CODE, minlength=size)
+
+    # Dashboard aggregates
+
+    def intensity(self, filters):
+        mask = self.mask(filters)
+        uniques, inverse = self._groups(self.codes["country"][mask])
+        averages = self._averages(inverse, len(uniques), mask, "intensity")
+        rows = [
+            {"country_code": self._code(uniques[i]), "avg_intensity": self._number(averages[i])}
+            # NaN (NULL) averages sort last, as in the keyset order of getIntensity.
+            for i in np.argsort(-averages, kind="stable")
+        ]
+        return rows, int(mask.sum())
+
+    def topic_distribution(self, filters):
+        mask = self.mask(filters)
+        uniques, inverse = self._groups(self.codes["topic"][mask])
+        counts = self._counts(inverse, len(uniques), mask, "topic")
+        rows = [
+            {"topic_code": self._code(uniques[i]), "count": int(counts[i])}
+            for i in np.argsort(-counts, kind="stable")
+        ]
+        return rows, len(uniques)
+
+    def trends(self, filters):
+        mask = self.mask(filters) & (self.years["end_year"] != NULL_YEAR)
+        uniques, inverse = self._groups(self.years["end_year"][mask])
+        averages = {measure: self._averages(inverse, len(uniques), mask, measure) for measure in MEASURES}
+        return [
+            {
+                "year": int(uniques[i]),
+                "avg_intensity": self._number(averages["intensity"][i]),
+                "avg_likelihood": self._number(averages["likelihood"][i]),
+                "avg_relevance": self._number(averages["relevance"][i]),
+            }
+            for i in range(len(uniques))
+        ]
+
+    def world_map(self, filters, columns=False, codes=False):
+        """
+        Rows for getWorldMapData, or with columns=True one list per field.
+        codes=True keys countries by country_code instead of name.
+        """
+        countries = self.codes["country"]
+        mask = self.mask(filters) & (countries != NULL_CODE) & ~np.isin(countries, self.blank_codes["country"])
+        uniques, inverse = self._groups(countries[mask])
+        size = len(uniques)
+        totals = np.bincount(inverse, minlength=size)
+        order = np.argsort(-totals, kind="stable")
+        result = {
+            **(
+                {"country_code": [self._code(code) for code in uniques[order]]} if codes
+                else {"country": self._names(uniques[order])}
+            ),
+            "total_events": totals[order].tolist(),
+            "avg_intensity": self._numbers(self._averages(inverse, size, mask, "intensity")[order]),
+            "avg_likelihood": self._numbers(self._averages(inverse, size, mask, "likelihood")[order]),
+            "most_common_sector": self._counts(inverse, size, mask, "sector")[order].astype(np.int64).tolist(),
+            "most_common_topic": self._counts(inverse, size, mask, "topic")[order].astype(np.int64).tolist(),
+            "pestle_distribution": self._counts(inverse, size, mask, "pestle")[order].astype(np.int64).tolist(),
+        }
+        return result if columns else _rows(result)
+
+    def bubble_chart(self, filters, columns=False):
+        """Rows for getBubbleChartData, or with columns=True one list per field."""
+        measures = self.measures
+        mask = self.mask(filters) & ~np.isnan(measures["intensity"]) & ~np.isnan(measures["relevance"])
+        keys, radixes = self._pack([self.codes[column][mask] for column in ("topic", "sector", "country")])
+        uniques, inverse = self._groups(keys)
+        size = len(uniques)
+        counts = np.bincount(inverse, minlength=size)
+        order = np.argsort(-counts, kind="stable")
+        groups = [self._unpack(int(key), radixes) for key in uniques[order]]
+        result = {
+            "topic": [self._name(group[0]) for group in groups],
+            "sector": [self._name(group[1]) for group in groups],
+            "country": [self._name(group[2]) for group in groups],
+            "avg_intensity": self._numbers(self._averages(inverse, size, mask, "intensity")[order]),
+            "avg_relevance": self._numbers(self._averages(inverse, size, mask, "relevance")[order]),
+            "avg_likelihood": self._numbers(self._averages(inverse, size, mask, "likelihood")[order]),
+            "event_count": counts[order].tolist(),
+        }
+        return result if columns else _rows(result)
+
+    def overview(self, filters):
+        """Same (averages, distributions, totals) shape as aggregates.overview_aggregates."""
+        mask = self.mask(filters)
+        averages = {}
+        for measure in MEASURES:
+            values = self.measures[measure][mask]
+            present = ~np.isnan(values)
+            averages[measure] = float(values[present].sum() / present.sum()) if present.any() else None
+
+        distributions = {}
+        columns = (
+            ("end_year", self.end_year, self._end_year_name),
+            ("country", self.codes["country"], self._name),
+            ("topic", self.codes["topic"], self._name),
+            ("region", self.codes["region"], self._name),
+        )
+        for column, codes, name in columns:
+            uniques, counts = np.unique(codes[mask], return_counts=True)
+            distributions[column] = [
+                {column: name(code), "count": 0 if code == NULL_CODE else int(count)}
+                for code, count in zip(uniques, counts)
+            ]
+            distributions[column].sort(key=distribution_order(column))
+
+        totals = {
+            column: sum(1 for entry in distributions[column] if entry[column] != "")
+            for column in ("topic", "country", "region")
+        }
+        return averages, distributions, totals
+
+
+def _mapped_engine(generation):
+    """The current snapshot as an engine, if it holds this generation."""
+    path = current_snapshot()
+    if path is None:
+        return None
+    try:
+        engine = ColumnarEngine.from_snapshot(path)
+    except SnapshotError as e:
+        logger.warning("Ignoring dashboard snapshot: %s", e)
+        return None
+    return engine if engine.generation == generation else None
+
+
+def load_engine(generation):
+    """
+    Builds the engine for a generation. With DASHBOARD_SNAPSHOT_DIR set, the
+    shared snapshot is mapped when it is current; otherwise one worker reads
+    the database and publishes a new snapshot while the others' refresh
+    threads wait for it.
+    """
+    if not snapshot_dir():
+        return ColumnarEngine.from_database(generation)
+
+    engine = _mapped_engine(generation)
+    if engine is None:
+        with snapshot_lock():
+            # Another worker may have written it while we waited.
+            engine = _mapped_engine(generation)
+            if engine is None:
+                engine = ColumnarEngine.from_database(generation)
+                write_snapshot(engine)
+    return engine
+
+
+def _install(engine):
+    global _engine
+    with _engine_lock:
+        # Generations only grow; never replace a newer engine with an older one.
+        if _engine is None or _engine.generation < engine.generation:
+            _engine = engine
+
+
+def refresh_engine():
+    """
+    Builds (or maps) the engine for the current generation and installs it.
+    Runs on the refresh thread; a failure leaves requests on the ORM path.
+    """
+    global _refresh_queued
+    _refresh_queued = False
+    close_old_connections()
+    try:
+        _install(load_engine(current_generation()))
+    except Exception:
+        logger.exception("Building the dashboard engine failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_refresh():
+    """Queues refresh_engine on the refresh thread unless a refresh is already queued."""
+    global _refresher, _refresh_queued
+    with _engine_lock:
+        if _refresh_queued:
+            return
+        _refresh_queued = True
+        if _refresher is None:
+            _refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard-engine")
+    _refresher.submit(refresh_engine)
+
+
+def columnar_engine():
+    """
+    Returns the in-memory engine when DASHBOARD_ENGINE is "numpy" and one for
+    the current dataset generation is loaded or its snapshot is written.
+    Otherwise queues a rebuild and returns None, so the request takes the
+    ORM path instead of waiting. Raises ImproperlyConfigured if NumPy is not
+    installed.
+    """
+    if settings.DASHBOARD_ENGINE != "numpy":
+        return None
+    if np is None:
+        raise ImproperlyConfigured(ENGINE_ERROR)
+
+    generation = current_generation()
+    with _engine_lock:
+        if _engine is not None and _engine.generation == generation:
+            return _engine
+    engine = _mapped_engine(generation) if snapshot_dir() else None
+    if engine is None:
+        schedule_refresh()
+        return None
+    _install(engine)
+    return engine
+
+
+def _refresh_on_commit(using):
+    if settings.DASHBOARD_ENGINE == "numpy" and np is not None:
+        # The generation bump commits with (or just after) the rows.
+        transaction.on_commit(schedule_refresh, using=using)
+
+
+@receiver(data_load_finished, sender=Data)
+def refresh_engine_on_load(sender, using, **kwargs):
+    _refresh_on_commit(using)
+
+
+@receiver(dataset_replaced, sender=Data)
+def refresh_engine_on_replace(sender, using, **kwargs):
+    _refresh_on_commit(using)
@@ -0,0 +1,293 @@
+import uuid
+
+from django.db import connections, models, router, transaction
+
+from .facets import rebuild_facets
+from .ingest import stream_ingest
+from .models import Data, DataRollup, FacetRange, FacetValue
+from .rollups import rebuild_rollups
+from .search import build_search_index
+from .signals import dataset_replaced
+from .tables import table_model
+
+LIVE_TABLE = Data._meta.db_table
+SHADOW_TABLE = f"{LIVE_TABLE}__shadow"
+PREVIOUS_TABLE = f"{LIVE_TABLE}__previous"
+
+# Tables derived from Data, swapped together with it so readers never see a
+# generation's rows next to another generation's rollups or facets.
+DERIVED_MODELS = (DataRollup, FacetValue, FacetRange)
+# Index name prefix per swapped table.
+INDEX_PREFIXES = {Data: "data", DataRollup: "rollup", FacetValue: "facet", FacetRange: "range"}
+
+
+def shadow_table(model):
+    return f"{model._meta.db_table}__shadow"
+
+
+def previous_table(model):
+    return f"{model._meta.db_table}__previous"
+
+
+class DatasetError(Exception):
+    pass
+
+
+def _table_exists(connection, table):
+    with connection.cursor() as cursor:
+        return table in connection.introspection.table_names(cursor)
+
+
+def _drop_table(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(table)}")
+
+
+def _schema_objects(connection, table):
+    """
+    The indexes, constraints and owned sequences of a PostgreSQL table as
+    (signature, kind, name) triples. The signature is the definition without
+    the object's or table's name, so the same index on a shadow and on the
+    live table has the same signature. Indexes behind a primary key or
+    unique constraint are listed as the constraint.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT regexp_replace(pg_get_indexdef(i.indexrelid), '^.*? USING ', 'USING '),
+                   CASE WHEN con.conname IS NULL THEN 'index' ELSE 'constraint' END,
+                   coalesce(con.conname, idx.relname)
+            FROM pg_index i
+            JOIN pg_class idx ON idx.oid = i.indexrelid
+            LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid AND con.conrelid = i.indrelid
+            WHERE i.indrelid = %(table)s::regclass
+            UNION ALL
+            SELECT pg_get_constraintdef(oid), 'constraint', conname
+            FROM pg_constraint WHERE conrelid = %(table)s::regclass AND contype = 'c'
+            UNION ALL
+            SELECT 'SEQUENCE ' || a.attname, 'sequence', s.relname
+            FROM pg_depend d
+            JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+            JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+            WHERE d.classid = 'pg_class'::regclass AND d.refobjid = %(table)s::regclass
+            ORDER BY 1, 3
+            """,
+            {"table": connection.ops.quote_name(table)},
+        )
+        return cursor.fetchall()
+
+
+def _rename_object(cursor, connection, table, kind, old, new, new_kind=None):
+    quote = connection.ops.quote_name
+    if kind == "index" and new_kind == "constraint":
+        # A shadow's unique index taking over the name of the live table's
+        # unique constraint becomes that constraint.
+        cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(new)} UNIQUE USING INDEX {quote(old)}")
+    elif kind == "constraint":
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME CONSTRAINT {quote(old)} TO {quote(new)}")
+    else:
+        cursor.execute(f"ALTER {kind.upper()} {quote(old)} RENAME TO {quote(new)}")
+
+
+def _take_over_names(connection, cursor, model, live, incoming):
+    """
+    Gives the indexes, constraints and sequences of the table swapped in as
+    model's live table the names the replaced table had (the ones migrations
+    created and later migrations look up), matching them by signature. The
+    replaced table, now previous_table(model), gets names of its own first.
+    """
+    prefix = f"{INDEX_PREFIXES[model]}_{uuid.uuid4().hex[:8]}"
+    length = connection.ops.max_name_length()
+    names = {}
+    for signature, kind, name in live:
+        _rename_object(cursor, connection, previous_table(model), kind, name, f"{prefix}_{name}"[:length])
+        names.setdefault(signature, []).append((kind, name))
+    for signature, kind, name in incoming:
+        if names.get(signature):
+            new_kind, new = names[signature].pop(0)
+            _rename_object(cursor, connection, model._meta.db_table, kind, name, new, new_kind)
+
+
+def _swap_tables(connection, renames, incoming=()):
+    """
+    Applies table renames in one short transaction and sends dataset_replaced
+    inside it, so the new tables and the receivers' writes (the generation
+    bump) become visible to readers together. `incoming` lists (model,
+    table) pairs for the tables renamed over live ones; on PostgreSQL their
+    indexes, constraints and sequences take over the live names in the same
+    transaction (SQLite cannot rename indexes, so they keep their own).
+    """
+    quote = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            swapped = []
+            if connection.vendor == "postgresql":
+                # Fail fast instead of queueing behind long-running readers.
+                cursor.execute("SET LOCAL lock_timeout = '5s'")
+                swapped = [
+                    (model, _schema_objects(connection, model._meta.db_table), _schema_objects(connection, table))
+                    for model, table in incoming
+                ]
+            for old, new in renames:
+                cursor.execute(f"ALTER TABLE {quote(old)} RENAME TO {quote(new)}")
+            for model, live, objects in swapped:
+                _take_over_names(connection, cursor, model, live, objects)
+        dataset_replaced.send(sender=Data, using=connection.alias)
+
+
+def _build_unique(connection, model, source=Data):
+    """
+    Creates the unique indexes of a live model (its unique fields and unique
+    constraints) on a shadow table, under names of its own. Data shadows get
+    them before loading, so content hashes are looked up by index.
+    """
+    quote = connection.ops.quote_name
+    prefix = f"{INDEX_PREFIXES[source]}_{uuid.uuid4().hex[:8]}"
+    unique = [[field.column] for field in source._meta.local_fields if field.unique and not field.primary_key]
+    unique += [
+        [source._meta.get_field(name).column for name in constraint.fields]
+        for constraint in source._meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+    ]
+    with connection.cursor() as cursor:
+        for columns in unique:
+            name = f"{prefix}_{'_'.join(columns)}_uniq"[:30]
+            cursor.execute(
+                f"CREATE UNIQUE INDEX {quote(name)} ON {quote(model._meta.db_table)} "
+                f"({', '.join(quote(column) for column in columns)})"
+            )
+
+
+def _pattern_ops(connection, field):
+    """
+    The operator class of the extra LIKE index PostgreSQL migrations give
+    indexed text columns, or None.
+    """
+    if connection.vendor != "postgresql" or not (field.db_index or field.unique) or field.primary_key:
+        return None
+    db_type = field.db_type(connection) or ""
+    if db_type.startswith("varchar"):
+        return "varchar_pattern_ops"
+    if db_type.startswith("text"):
+        return "text_pattern_ops"
+    return None
+
+
+def _build_indexes(connection, model, source=Data):
+    """Creates a live model's other indexes on a loaded shadow table."""
+    prefix = f"{INDEX_PREFIXES[source]}_{uuid.uuid4().hex[:8]}"
+    with connection.schema_editor() as editor:
+        for field in source._meta.local_fields:
+            if field.db_index and not field.unique and not field.primary_key:
+                name = f"{prefix}_{field.column}"[:30]
+                editor.add_index(model, models.Index(fields=[field.name], name=name))
+            opclass = _pattern_ops(connection, field)
+            if opclass:
+                name = f"{prefix}_{field.column}_like"[:30]
+                editor.add_index(model, models.Index(fields=[field.name], name=name, opclasses=[opclass]))
+        for index in source._meta.indexes:
+            editor.add_index(model, models.Index(
+                fields=index.fields, name=f"{prefix}_{index.name}"[:30]
+            ))
+    if source is Data:
+        build_search_index(connection, model)
+
+
+def _build_derived(connection, data_model, table=shadow_table):
+    """
+    Builds rollup and facet tables for the rows of data_model (a shadow or
+    previous Data table) under table(model) names, ready to be swapped in.
+    """
+    using = connection.alias
+    built = {}
+    for source in DERIVED_MODELS:
+        name = table(source)
+        _drop_table(connection, name)
+        built[source] = table_model(name, with_indexes=False, model=source)
+        with connection.schema_editor() as editor:
+            editor.create_model(built[source])
+    rebuild_rollups(using, model=data_model, rollup_model=built[DataRollup])
+    rebuild_facets(using, model=data_model, facet_model=built[FacetValue], range_model=built[FacetRange])
+    for source, model in built.items():
+        _build_unique(connection, model, source)
+        _build_indexes(connection, model, source)
+
+
+def replace_dataset(fileobj, batch_size=None, progress=None, using=None):
+    """
+    Replaces the whole Data table with the contents of an upload.
+
+    Rows are loaded into a shadow table with only its unique constraint
+    (content hashes are looked up during the load), the other indexes
+    are built once the load finishes, and the shadow is then renamed over the
+    live table in one short transaction. Readers keep seeing the complete old
+    dataset until the swap. The replaced generation is kept as the previous
+    table so rollback_dataset can restore it.
+    """
+    return replace_dataset_with(
+        lambda shadow: stream_ingest(fileobj, batch_size=batch_size, progress=progress, model=shadow),
+        using=using,
+    )
+
+
+def replace_dataset_with(load, using=None):
+    """
+    The shadow-table swap behind replace_dataset for any loader: load(shadow)
+    fills the unindexed shadow model and returns a summary with "inserted"
+    (and "error" when it failed). Nothing is swapped if no rows were loaded.
+    The shadow's rollups and facets are built before the swap and renamed in
+    with it, in the transaction that bumps the dataset generation.
+    """
+    using = using or router.db_for_write(Data)
+    connection = connections[using]
+
+    shadows = [SHADOW_TABLE] + [shadow_table(model) for model in DERIVED_MODELS]
+    for table in shadows:
+        _drop_table(connection, table)
+    shadow = table_model(SHADOW_TABLE, with_indexes=False)
+    with connection.schema_editor() as editor:
+        editor.create_model(shadow)
+
+    try:
+        _build_unique(connection, shadow)
+        summary = load(shadow)
+        if summary.get("error") or summary["inserted"] == 0:
+            _drop_table(connection, SHADOW_TABLE)
+            summary["replaced"] = False
+            return summary
+
+        _build_indexes(connection, table_model(SHADOW_TABLE))
+        _build_derived(connection, shadow)
+        renames = []
+        for model in (Data, *DERIVED_MODELS):
+            _drop_table(connection, previous_table(model))
+            renames += [(model._meta.db_table, previous_table(model)), (shadow_table(model), model._meta.db_table)]
+        _swap_tables(connection, renames, [(model, shadow_table(model)) for model in (Data, *DERIVED_MODELS)])
+    except Exception:
+        for table in shadows:
+            _drop_table(connection, table)
+        raise
+
+    summary["replaced"] = True
+    return summary
+
+
+def rollback_dataset(using=None):
+    """
+    Swaps the previous generation (with its rollups and facets) back in,
+    keeping the current one as previous, in one transaction.
+    """
+    using = using or router.db_for_write(Data)
+    connection = connections[using]
+    if not _table_exists(connection, PREVIOUS_TABLE):
+        raise DatasetError("No previous dataset generation to roll back to.")
+
+    if not all(_table_exists(connection, previous_table(model)) for model in DERIVED_MODELS):
+        # Kept by a replace that predates swapping the derived tables.
+        _build_derived(connection, table_model(PREVIOUS_TABLE), table=previous_table)
+    renames = []
+    for model in (Data, *DERIVED_MODELS):
+        live, previous, shadow = model._meta.db_table, previous_table(model), shadow_table(model)
+        _drop_table(connection, shadow)
+        renames += [(live, shadow), (previous, live), (shadow, previous)]
+    _swap_tables(connection, renames, [(model, previous_table(model)) for model in (Data, *DERIVED_MODELS)])
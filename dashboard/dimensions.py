@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Data, Dimension
+
+# Categorical Data columns stored with a dictionary code alongside the name.
+DIMENSION_COLUMNS = ("sector", "topic", "region", "country", "pestle", "source")
+CODE_FIELDS = tuple(f"{column}_code" for column in DIMENSION_COLUMNS)
+# How a filter value is matched against dimension names. "auto" matches
+# exactly when the value is a known name and falls back to substring search.
+MATCH_MODES = ("auto", "exact", "contains")
+
+
+def normalise_name(value):
+    """Case-folds a name and collapses its whitespace for exact matching."""
+    return " ".join(str(value).split()).casefold()
+
+
+def _lookup(pairs, using=None):
+    """Maps (column, name) pairs to their stored codes in one query."""
+    if not pairs:
+        return {}
+    stored = Dimension.objects.using(using).filter(
+        column__in={column for column, _ in pairs},
+        name__in={name for _, name in pairs},
+    ).values_list("column", "name", "pk")
+    return {(column, name): pk for column, name, pk in stored if (column, name) in pairs}
+
+
+def add_dimensions(pairs, using=None):
+    """Adds (column, name) pairs to the dictionary, ignoring names already in it."""
+    Dimension.objects.using(using).bulk_create(
+        [Dimension(column=column, name=name, normalised=normalise_name(name)) for column, name in pairs],
+        ignore_conflicts=True,
+    )
+
+
+def encode_dimensions(rows, using=None):
+    """
+    Sets the *_code fields of a batch of rows, adding any names not yet in the
+    dictionary. One lookup per batch, plus an insert and a re-read only when
+    the batch brings new names. NULL names keep a NULL code.
+    """
+    pairs = {
+        (column, name)
+        for row in rows
+        for column in DIMENSION_COLUMNS
+        if (name := getattr(row, column)) is not None
+    }
+    codes = _lookup(pairs, using)
+    missing = pairs - codes.keys()
+    if missing:
+        add_dimensions(missing, using)
+        codes.update(_lookup(missing, using))
+
+    for row in rows:
+        for column in DIMENSION_COLUMNS:
+            name = getattr(row, column)
+            setattr(row, f"{column}_code", None if name is None else codes[(column, name)])
+
+
+def _unencoded(using=None):
+    """Rows holding a name in some dimension column but no code for it."""
+    missing = Q()
+    for column in DIMENSION_COLUMNS:
+        missing |= Q(**{f"{column}__isnull": False, f"{column}_code__isnull": True})
+    return Data.objects.using(using).filter(missing)
+
+
+def encode_existing(using=None, batch_size=2000):
+    """
+    Backfills codes for rows that lack them, for manage.py encode_dimensions.
+    Migration 0009 encoded the rows stored before dictionary encoding existed;
+    read paths assume every row is encoded.
+    """
+    encoded = 0
+    last_pk = 0
+    while True:
+        rows = list(_unencoded(using).filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+        if not rows:
+            return encoded
+        with transaction.atomic(using=using):
+            encode_dimensions(rows, using)
+            Data.objects.using(using).bulk_update(rows, CODE_FIELDS, batch_size=batch_size)
+        encoded += len(rows)
+        last_pk = rows[-1].pk
+
+
+def match_codes(column, value, match="auto"):
+    """
+    Returns the dictionary codes a filter value selects. Exact matching is an
+    indexed lookup on the normalised name; "contains" keeps the old
+    case-insensitive substring search, which only scans the small dictionary.
+    """
+    if match not in MATCH_MODES:
+        raise ValueError(f"match must be one of {', '.join(MATCH_MODES)}.")
+    names = Dimension.objects.filter(column=column)
+    if match != "contains":
+        codes = list(names.filter(normalised=normalise_name(value)).values_list("pk", flat=True))
+        if codes or match == "exact":
+            return codes
+    return list(names.filter(name__icontains=value).values_list("pk", flat=True))
+
+
+def dimension_q(column, value, match="auto"):
+    """
+    Filters Data or DataRollup on a dimension name by resolving it against
+    the dictionary and comparing integer codes, which the indexes can serve.
+    """
+    return Q(**{f"{column}_code__in": match_codes(column, value, match)})
+
+
+def blank_codes(column):
+    """Subquery of the codes the blank name has in a column (at most one)."""
+    return Dimension.objects.filter(column=column, name="").values("pk")
+
+
+def dimension_names(codes):
+    """Maps dictionary codes to their names in one query (none for no codes)."""
+    codes = set(codes) - {None}
+    return dict(Dimension.objects.filter(pk__in=codes).values_list("pk", "name")) if codes else {}
+
+
+def decode_dimensions(entries, columns):
+    """
+    Replaces the *_code keys of values() rows with the dimension names,
+    resolving every code in one query.
+    """
+    entries = list(entries)
+    names = dimension_names(entry[f"{column}_code"] for entry in entries for column in columns)
+    decoded = []
+    for entry in entries:
+        row = {}
+        for key, value in entry.items():
+            column = key[:-len("_code")] if key.endswith("_code") else None
+            if column in columns:
+                row[column] = names.get(value)
+            else:
+                row[key] = value
+        decoded.append(row)
+    return decoded
+
+
+def decode_columns(rows, names):
+    """
+    Transposes values_list() rows into one list per name and replaces the
+    *_code columns with dimension names, resolving every code in one query.
+    """
+    values = [list(column) for column in zip(*rows)] or [[] for _ in names]
+    coded = [position for position, name in enumerate(names) if name.endswith("_code")]
+    lookup = dimension_names(code for position in coded for code in values[position])
+    result = {}
+    for position, name in enumerate(names):
+        if position in coded:
+            result[name[:-len("_code")]] = [lookup.get(code) for code in values[position]]
+        else:
+            result[name] = values[position]
+    return result
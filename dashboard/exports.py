@@ -0,0 +1,80 @@
+import csv
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .dimensions import CODE_FIELDS
+from .models import Data
+from .renderers import dumps
+from .search import SEARCH_FIELDS
+from .years import VALUE_FIELDS
+
+FIRST_CHUNK_ROWS = 50
+
+# The columns DataSerializer returns, in model order.
+EXPORT_FIELDS = tuple(
+    field.name for field in Data._meta.concrete_fields
+    if field.name not in CODE_FIELDS + VALUE_FIELDS + SEARCH_FIELDS
+)
+
+
+def export_fields(value):
+    """Parses a comma-separated `fields` parameter; all export fields when empty."""
+    if not value:
+        return EXPORT_FIELDS
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in EXPORT_FIELDS]
+    if not fields or unknown:
+        raise ValueError(f"fields must be a comma-separated list of: {', '.join(EXPORT_FIELDS)}.")
+    return tuple(dict.fromkeys(fields))
+
+
+def export_rows(queryset, fields, chunk_size=None):
+    """
+    Yields lists of value tuples. values_list skips model instances, and
+    iterator() reads through a server-side cursor on PostgreSQL, so memory
+    stays flat however many rows match. The first lists are short so the
+    response starts at once; they double up to chunk_size.
+    """
+    chunk_size = chunk_size or settings.DATA_EXPORT_CHUNK_SIZE
+    rows = queryset.values_list(*fields).order_by("pk").iterator(chunk_size=chunk_size)
+    limit = min(FIRST_CHUNK_ROWS, chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= limit:
+            yield chunk
+            chunk = []
+            limit = min(limit * 2, chunk_size)
+    if chunk:
+        yield chunk
+
+
+def ndjson_stream(queryset, fields, chunk_size=None):
+    """One JSON object per line, encoded like the API's JSON responses."""
+    for chunk in export_rows(queryset, fields, chunk_size):
+        yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in chunk)
+
+
+class _Lines:
+    """File-like target for csv.writer that hands back what was written."""
+
+    def write(self, value):
+        return value
+
+
+_encoder = DjangoJSONEncoder()
+
+
+def _csv_value(value):
+    # Datetimes in the same ISO 8601 form as the JSON responses.
+    return _encoder.default(value) if isinstance(value, datetime) else value
+
+
+def csv_stream(queryset, fields, chunk_size=None):
+    """A header line, then one CSV line per row."""
+    writer = csv.writer(_Lines())
+    yield writer.writerow(fields)
+    for chunk in export_rows(queryset, fields, chunk_size):
+        yield "".join(writer.writerow([_csv_value(value) for value in row]) for row in chunk)
@@ -0,0 +1,245 @@
+from django.db import connections, router, transaction
+from django.db.models import Max, Min
+from django.dispatch import receiver
+
+from .models import Data, FacetRange, FacetValue
+from .signals import data_load_finished, data_loaded
+
+# The catalogue only grows: loads add values and widen ranges, but rows
+# deleted outside a replace_dataset leave their values listed (and the
+# ranges as wide) until rebuild_facets runs.
+
+# Columns whose distinct values are listed by getFilter.
+VALUE_COLUMNS = ("start_year", "end_year", "topic", "region", "country", "sector", "pestle", "source")
+# Columns whose min/max are reported by getFilter.
+RANGE_COLUMNS = ("intensity", "likelihood", "relevance", "impact")
+FACET_COLUMNS = VALUE_COLUMNS + RANGE_COLUMNS
+
+_INTEGER_COLUMNS = {
+    name for name in RANGE_COLUMNS
+    if Data._meta.get_field(name).get_internal_type() == "IntegerField"
+}
+# Candidate bounds per INSERT ... SELECT statement.
+RANGE_BATCH_SIZE = 300
+
+
+def _facet_key(value):
+    return None if value is None else str(value)
+
+
+def facet_values(rows):
+    """The (column, value) facet pairs of some Data rows."""
+    return {(column, _facet_key(getattr(row, column))) for row in rows for column in VALUE_COLUMNS}
+
+
+def stored_facet_values(queryset):
+    """The (column, value) facet pairs of a queryset of Data rows, one DISTINCT query per column."""
+    return {
+        (column, _facet_key(value))
+        for column in VALUE_COLUMNS
+        for value in queryset.values_list(column, flat=True).distinct()
+    }
+
+
+def range_values(rows):
+    """The non-null (column, value) pairs of the range columns of some Data rows."""
+    return {
+        (column, value) for row in rows for column in RANGE_COLUMNS
+        if (value := getattr(row, column)) is not None
+    }
+
+
+def stored_ranges(queryset):
+    """The {"min", "max"} of each range column of a queryset of Data rows, in one query."""
+    bounds = queryset.aggregate(**{
+        f"{column}_{bound}": function(column)
+        for column in RANGE_COLUMNS for bound, function in (("min", Min), ("max", Max))
+    })
+    return {column: {bound: bounds[f"{column}_{bound}"] for bound in ("min", "max")} for column in RANGE_COLUMNS}
+
+
+def _range_fields(column, bounds):
+    """FacetRange field values holding a column's {"min", "max"}."""
+    kind = "number" if column in _INTEGER_COLUMNS else "text"
+    return {f"{bound}_{kind}": value for bound, value in bounds.items()}
+
+
+def record_facets(rows, using=None):
+    """Adds the facet values and range bounds of newly loaded rows to the catalogue."""
+    write_facets(facet_values(rows), using)
+    write_ranges(range_values(rows), using)
+
+
+def write_facets(values, using=None):
+    """
+    Adds (column, value) pairs to the catalogue. Existing values are left
+    alone, so this is one insert-or-ignore, in a fixed order so concurrent
+    loads lock shared values in the same order.
+    """
+    if not values:
+        return
+
+    manager = FacetValue.objects.using(using)
+    # NULLs never conflict in a unique constraint, so de-duplicate them here.
+    null_columns = {column for column, value in values if value is None}
+    if null_columns:
+        stored = set(manager.filter(column__in=null_columns, value__isnull=True).values_list("column", flat=True))
+        values = {(column, value) for column, value in values if value is not None or column not in stored}
+
+    manager.bulk_create(
+        [
+            FacetValue(column=column, value=value)
+            for column, value in sorted(values, key=lambda pair: (pair[0], pair[1] is not None, pair[1] or ""))
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _range_sql(connection, range_model, count):
+    """
+    INSERT ... SELECT ... GROUP BY ... ON CONFLICT widening the stored
+    bounds to cover `count` candidate (column, number, text) rows.
+    """
+    quote = connection.ops.quote_name
+    table = quote(range_model._meta.db_table)
+    number = range_model._meta.get_field("min_number").cast_db_type(connection)
+    text = range_model._meta.get_field("min_text").cast_db_type(connection)
+    candidates = " UNION ALL ".join(
+        [f"SELECT %s AS {quote('column')}, CAST(%s AS {number}) AS number, CAST(%s AS {text}) AS text"] * count
+    )
+    # SQLite spells LEAST/GREATEST as the scalar MIN/MAX; both skip NULLs
+    # through the COALESCEs, as MIN/MAX aggregates do.
+    least, greatest = ("MIN", "MAX") if connection.vendor == "sqlite" else ("LEAST", "GREATEST")
+    updates = ", ".join(
+        f"{quote(name)} = {function}(COALESCE({table}.{quote(name)}, EXCLUDED.{quote(name)}), "
+        f"COALESCE(EXCLUDED.{quote(name)}, {table}.{quote(name)}))"
+        for function, name in (
+            (least, "min_number"), (greatest, "max_number"), (least, "min_text"), (greatest, "max_text"),
+        )
+    )
+    # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint.
+    return (
+        f"INSERT INTO {table} ({quote('column')}, {quote('min_number')}, {quote('max_number')}, "
+        f"{quote('min_text')}, {quote('max_text')}) "
+        f"SELECT {quote('column')}, MIN(number), MAX(number), MIN(text), MAX(text) "
+        f"FROM ({candidates}) AS candidates WHERE true GROUP BY {quote('column')} ORDER BY {quote('column')} "
+        f"ON CONFLICT ({quote('column')}) DO UPDATE SET {updates}"
+    )
+
+
+def write_ranges(values, using=None, range_model=FacetRange):
+    """
+    Widens the stored min/max of the range columns to cover some (column,
+    value) pairs. On PostgreSQL and SQLite the database picks the bounds
+    with MIN/MAX and merges them with LEAST/GREATEST in one upsert per
+    RANGE_BATCH_SIZE pairs, so text columns (impact) order by its collation
+    as MIN/MAX over Data do; other backends merge them in Python under
+    select_for_update, comparing text by code point.
+    """
+    if not values:
+        return
+    using = using or router.db_for_write(range_model)
+    connection = connections[using]
+    candidates = sorted(
+        (column, value if column in _INTEGER_COLUMNS else None, None if column in _INTEGER_COLUMNS else value)
+        for column, value in values
+    )
+    if connection.vendor in ("postgresql", "sqlite"):
+        with connection.cursor() as cursor:
+            for start in range(0, len(candidates), RANGE_BATCH_SIZE):
+                chunk = candidates[start:start + RANGE_BATCH_SIZE]
+                cursor.execute(
+                    _range_sql(connection, range_model, len(chunk)),
+                    [part for candidate in chunk for part in candidate],
+                )
+        return
+
+    present = {}
+    for column, number, text in candidates:
+        present.setdefault(column, []).append(number if column in _INTEGER_COLUMNS else text)
+    manager = range_model.objects.using(using)
+    with transaction.atomic(using=using):
+        for stored in manager.select_for_update().filter(column__in=list(present)).order_by("column"):
+            for name in _range_fields(stored.column, {"min": None, "max": None}):
+                if getattr(stored, name) is not None:
+                    present[stored.column].append(getattr(stored, name))
+        manager.bulk_create(
+            [
+                range_model(column=column, **_range_fields(column, {"min": min(found), "max": max(found)}))
+                for column, found in present.items()
+            ],
+            update_conflicts=True, unique_fields=["column"],
+            update_fields=["min_number", "max_number", "min_text", "max_text"],
+        )
+
+
+def rebuild_facets(using=None, model=Data, facet_model=FacetValue, range_model=FacetRange):
+    """
+    Recomputes the whole catalogue from the Data table, dropping the values
+    of deleted rows. `model`, `facet_model` and `range_model` let a shadow
+    generation's catalogue be built from its rows.
+    """
+    queryset = model.objects.using(using)
+    values = stored_facet_values(queryset)
+    ranges = stored_ranges(queryset)
+    with transaction.atomic(using=using):
+        facet_model.objects.using(using).all().delete()
+        facet_model.objects.using(using).bulk_create(
+            [facet_model(column=column, value=value) for column, value in values],
+            batch_size=1000, ignore_conflicts=True,
+        )
+        range_model.objects.using(using).all().delete()
+        range_model.objects.using(using).bulk_create(
+            [range_model(column=column, **_range_fields(column, bounds)) for column, bounds in ranges.items()]
+        )
+
+
+def facet_catalogue(using=None):
+    """
+    Reads the catalogue and returns the distinct values per column and the
+    min/max per range column, matching what getFilter used to compute with
+    one DISTINCT or aggregate query per column. Being append-only, it can
+    still list values of rows deleted since the last rebuild_facets.
+    """
+    rows = FacetValue.objects.using(using).order_by("column", "value").values_list("column", "value")
+
+    values = {column: [] for column in VALUE_COLUMNS}
+    for column, value in rows:
+        if column in values:
+            values[column].append(value)
+
+    ranges = {column: {"min": None, "max": None} for column in RANGE_COLUMNS}
+    stored = FacetRange.objects.using(using).filter(column__in=RANGE_COLUMNS)
+    for bound in stored.values("column", "min_number", "max_number", "min_text", "max_text"):
+        kind = "number" if bound["column"] in _INTEGER_COLUMNS else "text"
+        ranges[bound["column"]] = {"min": bound[f"min_{kind}"], "max": bound[f"max_{kind}"]}
+
+    # getFilter has always left out blank strings from the dropdown lists.
+    listed = {column: [value for value in values[column] if value != ""] for column in VALUE_COLUMNS}
+    return {"values": listed, "ranges": ranges}
+
+
+@receiver(data_loaded, sender=Data)
+def update_facets_on_load(sender, rows, using, load=None, **kwargs):
+    if load is None:
+        record_facets(rows, using)
+    else:
+        # Written once per load by write_facets_on_load.
+        load.setdefault("facets", set()).update(facet_values(rows))
+        load.setdefault("ranges", set()).update(range_values(rows))
+
+
+@receiver(data_load_finished, sender=Data)
+def write_facets_on_load(sender, using, load, **kwargs):
+    values = load.get("facets", set())
+    ranges = load.get("ranges", set())
+    if "rows" in load:
+        # Staged loads pass their rows as a queryset instead of data_loaded batches.
+        values |= stored_facet_values(load["rows"])
+        ranges |= {
+            (column, value)
+            for column, bounds in stored_ranges(load["rows"]).items()
+            for value in bounds.values() if value is not None
+        }
+    write_facets(values, using)
+    write_ranges(ranges, using)
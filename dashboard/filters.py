@@ -1,6 +1,142 @@
+import json
+
 import django_filters
 from django.db.models import Q
+
+from .dimensions import DIMENSION_COLUMNS, MATCH_MODES, dimension_q, normalise_name
 from .models import Data
+from .search import search_query, uses_tsvector
+from .years import year_value
+
+SWOT_MAPPING = {
+    "strength": "Economic",
+    "weakness": "Social",
+    "opportunity": "Technological",
+    "threat": "Political",
+}
+
+# Integer range filters: query parameter prefix -> model field. Each accepts
+# <prefix>_min and <prefix>_max; the year ones also accept an exact <prefix>.
+MEASURE_RANGES = {
+    "intensity": "intensity",
+    "likelihood": "likelihood",
+    "relevance": "relevance",
+}
+YEAR_RANGES = {
+    "start_year": "start_year_value",
+    "end_year": "end_year_value",
+}
+RANGE_OPERATORS = {"eq": "exact", "min": "gte", "max": "lte"}
+
+# Every query parameter compile_filters reads.
+FILTER_PARAMS = (
+    {"match", "swot"}
+    | set(DIMENSION_COLUMNS)
+    | {f"{prefix}_{suffix}" for prefix in MEASURE_RANGES for suffix in ("min", "max")}
+    | {f"{prefix}{suffix}" for prefix in YEAR_RANGES for suffix in ("", "_min", "_max")}
+)
+
+# Spec fields the rollup table can answer (its grouping key, see rollups.py).
+ROLLUP_FIELDS = {"country", "region", "topic", "end_year"}
+
+
+def _int_param(name, value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}.")
+
+
+def _year_param(name, value):
+    year = year_value(value)
+    if year is None:
+        raise ValueError(f"{name} must be a year, got {value!r}.")
+    return year
+
+
+class CompiledFilter:
+    """
+    The dashboard filters of one request in canonical form.
+
+    `spec` is a sorted tuple of (field, operator, value) triples, so the same
+    logical filter always yields the same spec, `key` and SQL no matter how
+    the parameters were spelled or ordered. `q` is the single Q object every
+    action applies.
+    """
+
+    def __init__(self, spec):
+        self.spec = tuple(sorted(spec))
+        self.key = json.dumps(self.spec, separators=(",", ":"))
+        self.fields = {field for field, _, _ in self.spec}
+        self._q = None
+
+    @property
+    def rollup(self):
+        """True when every filter is a rollup dimension."""
+        return self.fields <= ROLLUP_FIELDS
+
+    @property
+    def q(self):
+        if self._q is None:
+            q = Q()
+            for field, operator, value in self.spec:
+                if field in DIMENSION_COLUMNS:
+                    q &= dimension_q(field, value, operator)
+                elif field in YEAR_RANGES:
+                    q &= Q(**{f"{YEAR_RANGES[field]}__{RANGE_OPERATORS[operator]}": value})
+                else:
+                    q &= Q(**{f"{MEASURE_RANGES[field]}__{RANGE_OPERATORS[operator]}": value})
+            self._q = q
+        return self._q
+
+    def apply(self, queryset):
+        return queryset.filter(self.q) if self.spec else queryset
+
+
+def compile_filters(params):
+    """
+    Compiles dashboard query parameters into a CompiledFilter. Unknown
+    parameters are ignored; malformed values raise ValueError.
+
+    Dimension filters (country, region, sector, topic, pestle, source and swot,
+    which maps to a pestle) follow `match` (auto, exact or contains). Integer
+    ranges use <name>_min/<name>_max for intensity, likelihood, relevance,
+    start_year and end_year; the years also accept an exact value.
+    """
+    match = params.get("match") or "auto"
+    if match not in MATCH_MODES:
+        raise ValueError(f"match must be one of {', '.join(MATCH_MODES)}.")
+
+    def dimension(field, value):
+        value = value.strip()
+        canonical = value.lower() if match == "contains" else normalise_name(value)
+        return (field, match, canonical)
+
+    spec = set()
+    for field in DIMENSION_COLUMNS:
+        value = params.get(field)
+        if value and value.strip():
+            spec.add(dimension(field, value))
+
+    swot = params.get("swot")
+    if swot:
+        mapped_pestle = SWOT_MAPPING.get(swot.strip().lower())
+        if mapped_pestle:
+            spec.add(dimension("pestle", mapped_pestle))
+
+    for prefix in MEASURE_RANGES:
+        for suffix in ("min", "max"):
+            name = f"{prefix}_{suffix}"
+            if params.get(name):
+                spec.add((prefix, suffix, _int_param(name, params.get(name))))
+
+    for prefix in YEAR_RANGES:
+        for operator, name in (("eq", prefix), ("min", f"{prefix}_min"), ("max", f"{prefix}_max")):
+            if params.get(name):
+                spec.add((prefix, operator, _year_param(name, params.get(name))))
+
+    return CompiledFilter(spec)
+
 
 class DataFilter(django_filters.FilterSet):
     # Time-Based Filters
@@ -27,12 +163,7 @@ class DataFilter(django_filters.FilterSet):
     swot = django_filters.CharFilter(method='filter_swot')
     title_insight = django_filters.CharFilter(method='filter_title_insight')
 
-    SWOT_MAPPING = {
-        "strength": "Economic",
-        "weakness": "Social",
-        "opportunity": "Technological",
-        "threat": "Political"
-    }
+    SWOT_MAPPING = SWOT_MAPPING
 
     def filter_swot(self, queryset, name, value):
         mapped_pestle = self.SWOT_MAPPING.get(value.lower())
@@ -41,6 +172,9 @@ class DataFilter(django_filters.FilterSet):
         return queryset
 
     def filter_title_insight(self, queryset, name, value):
+        # Indexed word search on PostgreSQL; substring scan elsewhere.
+        if uses_tsvector(queryset.db):
+            return queryset.filter(search_vector=search_query(value))
         return queryset.filter(Q(title__icontains=value) | Q(insight__icontains=value))
 
     class Meta:
@@ -48,6 +182,6 @@ class DataFilter(django_filters.FilterSet):
         fields = [
             'end_year', 'start_year', 'added', 'published',
             'intensity', 'relevance', 'likelihood', 'impact',
-            'sector', 'topic', 'region', 'country', 'city', 'pestle', 'source',
+            'sector', 'topic', 'region', 'country', 'pestle', 'source',
             'swot', 'title_insight'
-        ]
\ No newline at end of file
+        ]
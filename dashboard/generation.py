@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Data, DatasetGeneration
+from .signals import data_load_finished, dataset_replaced
+
+GENERATION_ID = 1
+
+
+def current_generation(using=None):
+    """Returns the dataset generation with one primary-key lookup."""
+    generation = (
+        DatasetGeneration.objects.using(using)
+        .filter(pk=GENERATION_ID)
+        .values_list("generation", flat=True)
+        .first()
+    )
+    return generation or 0
+
+
+def bump_generation(using=None):
+    """Atomically increments the dataset generation."""
+    manager = DatasetGeneration.objects.using(using)
+    updated = manager.filter(pk=GENERATION_ID).update(
+        generation=F("generation") + 1, date_updated=timezone.now()
+    )
+    if not updated:
+        _, created = manager.get_or_create(pk=GENERATION_ID, defaults={"generation": 1})
+        if not created:
+            manager.filter(pk=GENERATION_ID).update(
+                generation=F("generation") + 1, date_updated=timezone.now()
+            )
+
+
+@receiver(data_load_finished, sender=Data)
+def bump_generation_on_load(sender, using, **kwargs):
+    # Once per load, and only once it is committed, so readers never cache a
+    # generation number alongside rows they cannot see yet.
+    transaction.on_commit(lambda: bump_generation(using), using=using)
+
+
+@receiver(dataset_replaced, sender=Data)
+def bump_generation_on_replace(sender, using, **kwargs):
+    # Sent inside the swap transaction: the bump commits with the renames.
+    bump_generation(using)
@@ -0,0 +1,305 @@
+import codecs
+import itertools
+import json
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+
+from .loaders import bulk_load, upsert_load
+from .models import Data
+from .validators import DATE_ERROR, DataValidator
+
+DATE_FIELDS = ['added', 'published']
+DATE_FORMAT = "%B, %d %Y %H:%M:%S"
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+_WHITESPACE = " \t\n\r"
+_GZIP_MAGIC = b"\x1f\x8b"
+_decoder = json.JSONDecoder()
+
+
+class IngestError(ValueError):
+    """Raised when the uploaded stream itself cannot be parsed."""
+
+
+def normalise_record(record):
+    """
+    Replaces empty strings with None and converts the upstream date format
+    into ISO 8601 in place. Returns a dict of field errors, or None.
+    """
+    for key, value in record.items():
+        if value == "":
+            record[key] = None
+
+    for field in DATE_FIELDS:
+        if field in record and record[field]:
+            try:
+                record[field] = datetime.strptime(record[field], DATE_FORMAT).strftime("%Y-%m-%dT%H:%M:%S")
+            except (TypeError, ValueError):
+                return {field: DATE_ERROR}
+    return None
+
+
+def iter_file_chunks(fileobj, chunk_size=READ_CHUNK_SIZE):
+    """Yields raw byte chunks from an uploaded file or any binary file object."""
+    if hasattr(fileobj, "chunks"):
+        yield from fileobj.chunks(chunk_size)
+        return
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _peek(chunks, size):
+    """Returns at least `size` leading bytes (if available) and the re-chained chunk iterator."""
+    chunks = iter(chunks)
+    head = b""
+    consumed = []
+    for chunk in chunks:
+        consumed.append(chunk)
+        head += chunk
+        if len(head) >= size:
+            break
+    return head, itertools.chain(consumed, chunks)
+
+
+def iter_decompressed_chunks(chunks):
+    """Transparently gunzips the stream when it starts with the gzip magic bytes."""
+    head, chunks = _peek(chunks, len(_GZIP_MAGIC))
+    if not head.startswith(_GZIP_MAGIC):
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        data = decompressor.flush()
+    except zlib.error:
+        raise IngestError("Invalid gzip data in uploaded file.")
+    if data:
+        yield data
+    if not decompressor.eof:
+        raise IngestError("Truncated gzip data in uploaded file.")
+
+
+def _record_too_large(description, limit):
+    return IngestError(f"{description} of uploaded file is larger than {limit} bytes.")
+
+
+def iter_ndjson_records(chunks):
+    """
+    Parses newline-delimited JSON, one record per non-blank line. Only the
+    new chunk is split, so a line spanning many chunks is joined once; a
+    line longer than DATA_INGEST_MAX_RECORD_BYTES fails the upload instead
+    of being buffered.
+    """
+    limit = settings.DATA_INGEST_MAX_RECORD_BYTES
+    pending = []
+    pending_size = 0
+    line_number = 0
+    for chunk in itertools.chain(chunks, [b"\n"]):
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join([*pending, lines[0]])
+            pending, pending_size = [], 0
+        if rest:
+            pending.append(rest)
+            pending_size += len(rest)
+        for line in lines:
+            line_number += 1
+            if len(line) > limit:
+                raise _record_too_large(f"Line {line_number}", limit)
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise IngestError(f"Invalid JSON on line {line_number} of uploaded file.")
+        if pending_size > limit:
+            raise _record_too_large(f"Line {line_number + 1}", limit)
+
+
+def iter_records(chunks):
+    """
+    Yields records from a JSON array or NDJSON stream, optionally gzip
+    compressed. The format is detected from the first significant byte.
+    """
+    chunks = iter_decompressed_chunks(chunks)
+    head = b""
+    consumed = []
+    for chunk in chunks:
+        consumed.append(chunk)
+        head = (head + chunk).lstrip(b" \t\r\n\xef\xbb\xbf")
+        if head:
+            break
+    chunks = itertools.chain(consumed, chunks)
+    if head[:1] == b"{":
+        yield from iter_ndjson_records(chunks)
+    else:
+        yield from iter_json_records(chunks)
+
+
+def iter_json_records(chunks):
+    """
+    Incrementally parses a top-level JSON array from an iterable of byte chunks,
+    yielding one element at a time. Only the current element is kept in memory,
+    and one longer than DATA_INGEST_MAX_RECORD_BYTES fails the upload.
+    """
+    limit = settings.DATA_INGEST_MAX_RECORD_BYTES
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        for chunk in chunks:
+            text = decode(chunk)
+            if text:
+                buf = buf[pos:] + text
+                pos = 0
+                return True
+        buf = buf[pos:] + decode(b"", True)
+        pos = 0
+        eof = True
+        return False
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof or not fill():
+                return
+
+    skip_whitespace()
+    if pos < len(buf) and buf[pos] == "\ufeff":
+        pos += 1
+        skip_whitespace()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise IngestError("Expected a list of records in JSON file.")
+    pos += 1
+
+    index = 0
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise IngestError("Invalid JSON format in uploaded file.")
+        if buf[pos] == "]":
+            break
+        if index:
+            if buf[pos] != ",":
+                raise IngestError("Invalid JSON format in uploaded file.")
+            pos += 1
+            skip_whitespace()
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Characters never outnumber the bytes they were decoded from.
+                if len(buf) - pos > limit:
+                    raise _record_too_large(f"Record {index}", limit)
+                if eof or not fill():
+                    raise IngestError("Invalid JSON format in uploaded file.")
+                continue
+            # A value touching the end of the buffer may be a truncated number.
+            if end == len(buf) and not eof and fill():
+                continue
+            break
+        if end - pos > limit:
+            raise _record_too_large(f"Record {index}", limit)
+        pos = end
+        index += 1
+        yield value
+
+    pos += 1
+    skip_whitespace()
+    if pos < len(buf):
+        raise IngestError("Invalid JSON format in uploaded file.")
+
+
+def iter_batches(records, batch_size):
+    """Groups an iterable of records into (start_index, list) batches."""
+    batch = []
+    start = 0
+    for index, record in enumerate(records):
+        if not batch:
+            start = index
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield start, batch
+            batch = []
+    if batch:
+        yield start, batch
+
+
+def validate_batch(batch, start, validator=None):
+    """
+    Normalises and validates a batch of raw records.
+    Returns the valid rows as unsaved Data instances plus a list of errors.
+    """
+    return (validator or DataValidator()).validate_many(batch, start)
+
+
+def stream_ingest(fileobj, batch_size=None, on_duplicate=None, progress=None, model=Data):
+    """
+    Streams a JSON array or NDJSON upload (optionally gzipped) into the Data
+    table in fixed-size batches.
+    Each batch is validated and bulk loaded in its own transaction, so memory
+    use is bounded by the batch size instead of the upload size. Passing
+    on_duplicate ("skip" or "touch") deduplicates records by content hash.
+    If given, progress(summary, bytes_read) is called after every batch.
+    `model` lets the rows be loaded into another table with Data's schema.
+    """
+    batch_size = batch_size or settings.DATA_INGEST_BATCH_SIZE
+    summary = {"batches": 0, "received": 0, "inserted": 0, "rejected": 0, "load_seconds": 0.0, "errors": []}
+    if on_duplicate:
+        summary.update(updated=0, skipped=0)
+
+    bytes_read = 0
+
+    def counted(chunks):
+        nonlocal bytes_read
+        for chunk in chunks:
+            bytes_read += len(chunk)
+            yield chunk
+
+    validator = DataValidator(model)
+    records = iter_records(counted(iter_file_chunks(fileobj)))
+    try:
+        for batch_number, (start, batch) in enumerate(iter_batches(records, batch_size)):
+            rows, errors = validate_batch(batch, start, validator)
+            if rows and on_duplicate:
+                load = upsert_load(rows, on_duplicate, batch_size=batch_size)
+                summary["updated"] += load["updated"]
+                summary["skipped"] += load["skipped"]
+            elif rows:
+                load = bulk_load(rows, model=model, batch_size=batch_size)
+            if rows:
+                summary["method"] = load["method"] or summary.get("method")
+                summary["inserted"] += load["inserted"]
+                summary["load_seconds"] = round(summary["load_seconds"] + load["seconds"], 4)
+
+            summary["batches"] += 1
+            summary["received"] += len(batch)
+            summary["rejected"] += len(errors)
+            for error in errors:
+                if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                    summary["errors"].append({"batch": batch_number, **error})
+            if progress:
+                progress(summary, bytes_read)
+    except IngestError as e:
+        # Batches committed before the malformed input stay committed.
+        summary["error"] = str(e)
+
+    return summary
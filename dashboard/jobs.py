@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .datasets import replace_dataset
+from .ingest import stream_ingest
+from .models import IngestJob
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_ERROR = "The worker running this job stopped before it finished (process restarted or ended)."
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the process-wide worker pool that runs ingest jobs. Creating it
+    (the first job this process runs) first fails the jobs an earlier
+    process left running.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            fail_stale_jobs()
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DATA_INGEST_WORKERS, thread_name_prefix="ingest"
+            )
+        return _executor
+
+
+def store_upload(uploaded_file, suffix=".json"):
+    """Writes an uploaded file to the ingest upload directory chunk by chunk."""
+    os.makedirs(settings.DATA_INGEST_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(settings.DATA_INGEST_UPLOAD_DIR, f"{uuid.uuid4().hex}{suffix}")
+    size = 0
+    with open(path, "wb") as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+            size += len(chunk)
+    return path, size
+
+
+def run_ingest(fileobj, mode="stream", on_duplicate=None, batch_size=None, progress=None):
+    """Runs one of the load modes (stream, upsert or replace) over a file object."""
+    if mode == "replace":
+        return replace_dataset(fileobj, batch_size=batch_size, progress=progress)
+    return stream_ingest(fileobj, batch_size=batch_size, on_duplicate=on_duplicate, progress=progress)
+
+
+def submit_ingest_job(path, size, mode="stream", on_duplicate=None, batch_size=None):
+    """
+    Records a queued job for a file already on disk and hands it to the worker
+    pool once the surrounding transaction commits.
+
+    The pool is threads of the web process that accepted the upload, so jobs
+    need a long-lived server process; a serverless deployment (vercel.json)
+    freezes or ends the process after the response and the job stops with
+    it. Such jobs are failed by fail_stale_jobs.
+    """
+    job = IngestJob.objects.create(
+        file_path=path, file_size=size, mode=mode, on_duplicate=on_duplicate, batch_size=batch_size
+    )
+    transaction.on_commit(lambda: get_executor().submit(run_ingest_job, job.pk))
+    return job
+
+
+def run_ingest_job(job_id):
+    """Runs a queued job in a worker thread, recording progress after every batch."""
+    close_old_connections()
+    try:
+        job = IngestJob.objects.get(pk=job_id)
+        started_at = timezone.now()
+        IngestJob.objects.filter(pk=job_id).update(
+            status=IngestJob.STATUS_RUNNING, started_at=started_at, date_updated=started_at
+        )
+
+        def progress(summary, bytes_read):
+            IngestJob.objects.filter(pk=job_id).update(
+                bytes_processed=bytes_read,
+                rows_processed=summary["received"],
+                rows_inserted=summary["inserted"],
+                rows_updated=summary.get("updated", 0),
+                rows_skipped=summary.get("skipped", 0),
+                rows_rejected=summary["rejected"],
+                errors=summary["errors"],
+                date_updated=timezone.now(),
+            )
+
+        with open(job.file_path, "rb") as fileobj:
+            summary = run_ingest(
+                fileobj, mode=job.mode, on_duplicate=job.on_duplicate, batch_size=job.batch_size, progress=progress
+            )
+
+        progress(summary, job.file_size)
+        IngestJob.objects.filter(pk=job_id).update(
+            status=IngestJob.STATUS_FAILED if summary.get("error") else IngestJob.STATUS_SUCCEEDED,
+            error_message=summary.get("error"),
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        logger.exception("Ingest job %s failed", job_id)
+        IngestJob.objects.filter(pk=job_id).update(
+            status=IngestJob.STATUS_FAILED, error_message=str(e), finished_at=timezone.now()
+        )
+    finally:
+        job = IngestJob.objects.filter(pk=job_id).only("file_path").first()
+        if job and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        close_old_connections()
+
+
+def fail_stale_jobs(minutes=None):
+    """
+    Marks running jobs whose progress has not moved for
+    DATA_INGEST_STALE_MINUTES as failed and removes their spooled uploads:
+    their worker thread went down with its process, so nothing will finish
+    them. Running jobs record progress after every batch. Returns the
+    number of jobs failed.
+    """
+    minutes = settings.DATA_INGEST_STALE_MINUTES if minutes is None else minutes
+    now = timezone.now()
+    stale = IngestJob.objects.filter(status=IngestJob.STATUS_RUNNING, date_updated__lt=now - timedelta(minutes=minutes))
+    jobs = dict(stale.values_list("pk", "file_path"))
+    if not jobs:
+        return 0
+    failed = stale.filter(pk__in=list(jobs)).update(
+        status=IngestJob.STATUS_FAILED, error_message=STALE_JOB_ERROR, finished_at=now, date_updated=now
+    )
+    for path in jobs.values():
+        if os.path.exists(path):
+            os.remove(path)
+    logger.warning("Failed %s stale ingest jobs", failed)
+    return failed
+
+
+def job_status(job):
+    """Serialises a job with its throughput and estimated time remaining."""
+    elapsed = None
+    throughput = None
+    eta = None
+    if job.started_at:
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        if elapsed > 0:
+            throughput = round(job.rows_processed / elapsed, 1)
+        if job.status == IngestJob.STATUS_RUNNING and job.bytes_processed:
+            remaining = max(job.file_size - job.bytes_processed, 0)
+            eta = round(elapsed * remaining / job.bytes_processed, 1)
+
+    return {
+        "id": str(job.id),
+        "status": job.status,
+        "rows_processed": job.rows_processed,
+        "rows_inserted": job.rows_inserted,
+        "rows_updated": job.rows_updated,
+        "rows_skipped": job.rows_skipped,
+        "rows_rejected": job.rows_rejected,
+        "bytes_processed": job.bytes_processed,
+        "file_size": job.file_size,
+        "elapsed_seconds": round(elapsed, 2) if elapsed is not None else None,
+        "rows_per_sec": throughput,
+        "eta_seconds": eta,
+        "errors": job.errors,
+        "error_message": job.error_message,
+        "date_created": job.date_created,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -0,0 +1,528 @@
+import hashlib
+import io
+import json
+import re
+import time
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Field
+from django.utils import timezone
+
+from .dimensions import CODE_FIELDS, DIMENSION_COLUMNS, add_dimensions, encode_dimensions
+from .models import Data, Dimension
+from .search import index_rows, last_pk, search_vector_sql
+from .signals import data_load_finished, data_loaded
+from .tables import table_model
+from .years import fill_years
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_SPECIAL = re.compile(r"[\\\t\n\r]").search
+
+# Business fields identifying a record's content. Kept explicit so adding
+# derived columns to Data never changes the hashes of stored rows.
+CONTENT_HASH_FIELDS = (
+    "end_year", "intensity", "sector", "topic", "insight", "url", "region",
+    "start_year", "impact", "added", "published", "country", "relevance",
+    "pestle", "source", "title", "likelihood",
+)
+# "touch" refreshes date_updated on the stored row; every business field is
+# part of the hash, so there are no incoming values left to apply.
+DUPLICATE_POLICIES = ("skip", "touch")
+# Earlier name of "touch", still accepted from clients and queued jobs.
+DUPLICATE_ALIASES = {"update": "touch"}
+# Derived columns a staged load fills (see _insert_staged); tables without
+# all of them are loaded from the rows' own values.
+STAGED_FIELDS = ("content_hash", "search_vector", "start_year_value", "end_year_value") + CODE_FIELDS
+
+
+def _hash_value(value):
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = value.astimezone(dt_timezone.utc)
+        return value.isoformat()
+    return value
+
+
+def content_hash(row):
+    """Returns a stable SHA-256 hex digest of a row's business fields."""
+    payload = json.dumps(
+        [_hash_value(getattr(row, name)) for name in CONTENT_HASH_FIELDS],
+        ensure_ascii=False, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def duplicate_policy(value):
+    """Returns the canonical on_duplicate policy, or raises ValueError."""
+    policy = DUPLICATE_ALIASES.get(value, value)
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"on_duplicate must be one of: {', '.join(DUPLICATE_POLICIES)}.")
+    return policy
+
+
+def split_duplicates(rows, model=Data, using=None):
+    """
+    Splits hashed rows by whether they may claim their content hash, which is
+    unique. Returns (fresh, repeated, stored): rows with a new hash, rows
+    repeating a hash earlier in the list, and rows whose hash is already
+    stored. Stored hashes are looked up with one indexed query.
+    """
+    by_hash = {}
+    repeated = []
+    for row in rows:
+        if row.content_hash in by_hash:
+            repeated.append(row)
+        else:
+            by_hash[row.content_hash] = row
+    existing = set(
+        model._default_manager.using(using)
+        .filter(content_hash__in=list(by_hash))
+        .values_list("content_hash", flat=True)
+    )
+    fresh = [row for key, row in by_hash.items() if key not in existing]
+    stored = [row for key, row in by_hash.items() if key in existing]
+    return fresh, repeated, stored
+
+
+def backfill_content_hashes(model=Data, using=None, batch_size=2000):
+    """
+    Hashes stored rows that have no content_hash yet. Only the first row of
+    each content gets the hash; later duplicates keep NULL, as they would
+    when loaded today. Returns the number of rows hashed.
+    """
+    using = using or router.db_for_write(model)
+    manager = model._default_manager.using(using)
+    hashed = 0
+    after = 0
+    while True:
+        rows = list(manager.filter(content_hash__isnull=True, pk__gt=after).order_by("pk")[:batch_size])
+        if not rows:
+            return hashed
+        after = rows[-1].pk
+        for row in rows:
+            row.content_hash = content_hash(row)
+        fresh, _, _ = split_duplicates(rows, model, using)
+        manager.bulk_update(fresh, ["content_hash"], batch_size=batch_size)
+        hashed += len(fresh)
+
+
+def _chunks(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value):
+    """Encodes a value for PostgreSQL's COPY text format."""
+    if value is None:
+        return "\\N"
+    # Exact-type fast paths for the common values; searching a string for
+    # the escaped characters is much cheaper than translating it.
+    if value.__class__ is str:
+        return value.translate(_COPY_ESCAPES) if _COPY_SPECIAL(value) else value
+    if value.__class__ is int:
+        return str(value)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_getter(field):
+    """Reads a field for COPY, calling pre_save only where it sets the value (auto_now)."""
+    if type(field).pre_save is Field.pre_save:
+        return attrgetter(field.attname)
+    return lambda obj: field.pre_save(obj, True)
+
+
+def _copy_batch(connection, model, fields, batch, table=None):
+    """COPYs a batch into `table`, the model's own table by default."""
+    getters = [_copy_getter(field) for field in fields]
+    buffer = io.StringIO()
+    for obj in batch:
+        buffer.write("\t".join([_copy_value(get(obj)) for get in getters]))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        quote(table or model._meta.db_table), ", ".join(quote(field.column) for field in fields)
+    )
+    with connection.cursor() as cursor, connection.wrap_database_errors:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def _computed(field):
+    """Whether _insert_staged computes a field in SQL rather than COPYing it."""
+    return (
+        field.name == "content_hash" or field.name == "search_vector" or field.name in CODE_FIELDS
+        or getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    )
+
+
+def _stage_fields(fields):
+    return [field for field in fields if not _computed(field)]
+
+
+def _kept_fields(model):
+    # Every column but search_vector, which no receiver reads.
+    return [field for field in model._meta.concrete_fields if field.name != "search_vector"]
+
+
+def _create_stage(connection, model, fields):
+    """
+    Creates a temporary table with the COPYed columns, for batches to be
+    moved on by _insert_staged, and for loads into Data a {stage}_rows table
+    that keeps the loaded rows for data_load_finished receivers. Returns the
+    stage's name.
+    """
+    quote = connection.ops.quote_name
+    name = f"load_{uuid.uuid4().hex[:8]}"
+    table = quote(model._meta.db_table)
+    stages = [(name, _stage_fields(fields))]
+    if model is Data:
+        stages.append((f"{name}_rows", _kept_fields(model)))
+    with connection.cursor() as cursor:
+        for stage, columns in stages:
+            cursor.execute("CREATE TEMPORARY TABLE {} AS SELECT {} FROM {} WITH NO DATA".format(
+                quote(stage), ", ".join(quote(field.column) for field in columns), table,
+            ))
+    return name
+
+
+def _drop_stage(connection, stage):
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS {}, {}".format(
+            connection.ops.quote_name(stage), connection.ops.quote_name(f"{stage}_rows"),
+        ))
+
+
+def content_hash_sql(connection, model):
+    """
+    SQL computing content_hash from a row's columns: the JSON array
+    content_hash builds, with datetimes formatted as isoformat() does in UTC,
+    hashed with sha256(). Lets a set-based insert hash rows in PostgreSQL.
+    """
+    quote = connection.ops.quote_name
+    parts = []
+    for name in CONTENT_HASH_FIELDS:
+        field = model._meta.get_field(name)
+        column = quote(field.column)
+        internal_type = field.get_internal_type()
+        if internal_type == "DateTimeField":
+            moment = f"({column} AT TIME ZONE 'UTC')" if settings.USE_TZ else column
+            offset = "+00:00" if settings.USE_TZ else ""
+            value = (
+                f"'\"' || to_char({moment}, 'YYYY-MM-DD\"T\"HH24:MI:SS') || CASE to_char({moment}, 'US') "
+                f"WHEN '000000' THEN '' ELSE '.' || to_char({moment}, 'US') END || '{offset}\"'"
+            )
+        elif internal_type in ("CharField", "TextField"):
+            value = f"to_json({column})::text"
+        else:
+            value = f"{column}::text"
+        parts.append(f"coalesce({value}, 'null')")
+    return "encode(sha256(convert_to('[' || {} || ']', 'UTF8')), 'hex')".format(" || ',' || ".join(parts))
+
+
+def _add_staged_dimensions(connection, model, stage):
+    """Adds the staged batch's dimension names missing from the dictionary."""
+    quote = connection.ops.quote_name
+    pairs = ", ".join(
+        f"('{column}', {quote(model._meta.get_field(column).column)})" for column in DIMENSION_COLUMNS
+    )
+    dimension = quote(Dimension._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT pair.dimension, pair.name FROM {quote(stage)} "
+            f"CROSS JOIN LATERAL (VALUES {pairs}) AS pair (dimension, name) "
+            f"WHERE pair.name IS NOT NULL AND NOT EXISTS ("
+            f"SELECT 1 FROM {dimension} WHERE {dimension}.{quote('column')} = pair.dimension "
+            f"AND {dimension}.{quote('name')} = pair.name)"
+        )
+        missing = cursor.fetchall()
+    if missing:
+        add_dimensions(missing, connection.alias)
+
+
+def _insert_staged(connection, model, fields, batch, stage, on_duplicate, now):
+    """
+    COPYs a batch into the stage, then moves it into the model's table with
+    one statement that computes content hashes, dimension codes (a join on
+    the dictionary) and search_vector on the way. Each row is written once,
+    and nothing but the business fields and years is encoded in Python.
+
+    The first row of each content claims its hash with ON CONFLICT DO
+    NOTHING, which also covers hashes stored earlier or by a concurrent
+    load. Without on_duplicate the rows that lost are inserted in the same
+    statement without a hash; "touch" refreshes date_updated on the stored
+    rows they match. The inserted rows are also saved in {stage}_rows, if any.
+    Returns the inserted, updated and skipped counts.
+    """
+    _copy_batch(connection, model, _stage_fields(fields), batch, stage)
+    _add_staged_dimensions(connection, model, stage)
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    kept = ", ".join(quote(field.column) for field in _kept_fields(model))
+    hash_column = quote(model._meta.get_field("content_hash").column)
+    dimension = quote(Dimension._meta.db_table)
+    vector, vector_params = search_vector_sql(connection, model)
+
+    def insert(hash_value):
+        columns, values, joins, params = [], [], [], []
+        for field in fields:
+            columns.append(quote(field.column))
+            if field.name == "content_hash":
+                values.append(hash_value)
+            elif field.name == "search_vector":
+                values.append(vector)
+                params += vector_params
+            elif field.name in CODE_FIELDS:
+                alias = quote(f"{field.name}_dimension")
+                column = model._meta.get_field(field.name[:-len("_code")]).column
+                values.append(f"{alias}.{quote('id')}")
+                joins.append(
+                    f"LEFT JOIN {dimension} AS {alias} ON {alias}.{quote('column')} = '{field.name[:-len('_code')]}' "
+                    f"AND {alias}.{quote('name')} = {table}.{quote(column)}"
+                )
+            elif _computed(field):
+                values.append("%s")
+                params.append(field.get_db_prep_save(now, connection))
+            else:
+                values.append(f"{table}.{quote(field.column)}")
+        # Aliased as the model's table, which the compiled vector SQL names.
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(values)} "
+            f"FROM staged AS {table} {' '.join(joins)}"
+        )
+        return sql, params
+
+    claim, params = insert(f"{table}._hash")
+    ctes = [
+        # ctid follows COPY order in the freshly truncated stage.
+        f"staged AS (SELECT *, row_number() OVER (PARTITION BY _hash ORDER BY _row) AS _n "
+        f"FROM (SELECT *, ctid AS _row, {content_hash_sql(connection, model)} AS _hash FROM {quote(stage)}) AS hashed)",
+        f"claimed AS ({claim} WHERE {table}._n = 1 "
+        f"ON CONFLICT ({hash_column}) DO NOTHING RETURNING {kept})",
+    ]
+    inserted = [f"SELECT {kept} FROM claimed"]
+    counts = {
+        "staged": "(SELECT count(*) FROM staged)",
+        "claimed": "(SELECT count(*) FROM claimed)",
+        "repeated": "0",
+        "updated": "0",
+    }
+    if on_duplicate is None:
+        repeat, repeat_params = insert("NULL")
+        ctes.append(
+            f"repeated AS ({repeat} WHERE {table}._n > 1 OR NOT EXISTS ("
+            f"SELECT 1 FROM claimed WHERE claimed.{hash_column} = {table}._hash) RETURNING {kept})"
+        )
+        params += repeat_params
+        inserted.append(f"SELECT {kept} FROM repeated")
+        counts["repeated"] = "(SELECT count(*) FROM repeated)"
+    elif on_duplicate == "touch":
+        # Sees the table as it was before the statement, so only stored rows.
+        # A hash a concurrent load committed meanwhile counts as skipped.
+        ctes.append(
+            f"touched AS (UPDATE {table} SET {quote(model._meta.get_field('date_updated').column)} = %s "
+            f"WHERE {hash_column} IN (SELECT _hash FROM staged WHERE _n = 1) RETURNING 1)"
+        )
+        params.append(model._meta.get_field("date_updated").get_db_prep_save(now, connection))
+        counts["updated"] = "(SELECT count(*) FROM touched)"
+    if model is Data:
+        ctes.append(f"saved AS (INSERT INTO {quote(f'{stage}_rows')} {' UNION ALL '.join(inserted)})")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"WITH {', '.join(ctes)} SELECT {', '.join(counts.values())}", params)
+        staged, claimed, repeated, updated = cursor.fetchone()
+        cursor.execute(f"TRUNCATE {quote(stage)}")
+    return {
+        "inserted": claimed + repeated,
+        "updated": updated,
+        "skipped": staged - claimed - repeated - updated,
+    }
+
+
+def _insert_batch(connection, model, fields, batch, use_copy, using, batch_size):
+    if use_copy:
+        _copy_batch(connection, model, fields, batch)
+    else:
+        model.objects.using(using).bulk_create(batch, batch_size=batch_size)
+
+
+def _load_staged(connection, model, fields, rows, batch_size, on_duplicate, counts):
+    """
+    Loads rows batch by batch through a stage (see _insert_staged). Returns
+    the stage's name, whose {stage}_rows table keeps the loaded rows until
+    _drop_stage, and the number of batches.
+    """
+    stage = _create_stage(connection, model, fields)
+    now = timezone.now()
+    batches = 0
+    for batch in _chunks(rows, batch_size):
+        fill_years(batch)
+        for key, value in _insert_staged(connection, model, fields, batch, stage, on_duplicate, now).items():
+            counts[key] += value
+        batches += 1
+    return stage, batches
+
+
+def _load_rows(connection, model, fields, rows, using, batch_size, use_copy, on_duplicate, counts, load):
+    """
+    Loads rows batch by batch from their own values, hashing and encoding
+    them in Python. Returns the number of batches and the seconds spent in
+    data_loaded receivers.
+    """
+    hashed = any(field.name == "content_hash" for field in fields)
+    encoded = any(field.name == "sector_code" for field in fields)
+    typed_years = any(field.name == "end_year_value" for field in fields)
+    batches = 0
+    maintenance = 0.0
+    for batch in _chunks(rows, batch_size):
+        if hashed:
+            for row in batch:
+                row.content_hash = row.content_hash or content_hash(row)
+        if encoded:
+            encode_dimensions(batch, using)
+        if typed_years:
+            fill_years(batch)
+        for attempt in range(2):
+            if hashed:
+                fresh, repeated, stored = split_duplicates(batch, model, using)
+                if on_duplicate:
+                    loaded = fresh
+                else:
+                    for row in repeated + stored:
+                        row.content_hash = None
+                    loaded = batch
+            else:
+                loaded, repeated, stored = batch, [], []
+            try:
+                with transaction.atomic(using=using):
+                    if loaded:
+                        _insert_batch(connection, model, fields, loaded, use_copy, using, batch_size)
+                break
+            except IntegrityError:
+                if attempt or not hashed:
+                    raise
+                for row in repeated + stored:
+                    row.content_hash = content_hash(row)
+        if on_duplicate == "touch" and stored:
+            model.objects.using(using).filter(
+                content_hash__in=[row.content_hash for row in stored]
+            ).update(date_updated=timezone.now())
+            counts["updated"] += len(stored)
+        elif on_duplicate:
+            counts["skipped"] += len(stored)
+        if on_duplicate:
+            counts["skipped"] += len(repeated)
+        if model is Data and loaded:
+            signalled = time.perf_counter()
+            data_loaded.send(sender=Data, rows=loaded, using=using, load=load)
+            maintenance += time.perf_counter() - signalled
+        counts["inserted"] += len(loaded)
+        batches += 1
+    return batches, maintenance
+
+
+def bulk_load(rows, model=Data, using=None, batch_size=None, returning=False, on_duplicate=None):
+    """
+    Loads an iterable of unsaved model rows in a single transaction.
+
+    On PostgreSQL rows are streamed with COPY FROM STDIN one batch at a time;
+    other backends (SQLite in tests) fall back to batched bulk_create. Pass
+    returning=True when the caller needs primary keys set on the rows, which
+    COPY cannot provide. Tables with Data's derived columns are loaded
+    through a temporary stage that computes content hashes, dimension codes
+    and search vectors in SQL (see _insert_staged); other loads hash and
+    encode each batch in Python, and bulk_create loads on PostgreSQL fill
+    search vectors with one UPDATE after the last batch. Integer years are
+    filled in Python either way. Loads into the live Data table send
+    data_load_finished at the end, with load["rows"] the staged rows'
+    queryset, or after data_loaded per batch when the rows were loaded from
+    their own values. Returns the counts and timings: rows_per_sec covers
+    the whole call, load_rows_per_sec the loader alone, without the
+    maintenance_seconds spent on derived tables.
+
+    Each content hash is claimed by one row only (the column is unique).
+    Without on_duplicate, rows repeating stored or earlier content are still
+    loaded, without a hash. With "skip" they are left out, and with "touch"
+    the stored rows they match also get date_updated refreshed. Staged loads
+    claim hashes with ON CONFLICT DO NOTHING; elsewhere a batch that loses a
+    hash to a concurrent load is rolled back to its savepoint and split again.
+    """
+    if on_duplicate is not None:
+        on_duplicate = duplicate_policy(on_duplicate)
+    using = using or router.db_for_write(model)
+    batch_size = batch_size or settings.DATA_INGEST_BATCH_SIZE
+    connection = connections[using]
+    use_copy = connection.vendor == "postgresql" and not returning
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    staged = use_copy and set(STAGED_FIELDS) <= {field.name for field in fields}
+    searchable = connection.vendor == "postgresql" and any(field.name == "search_vector" for field in fields)
+
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    load = {}
+    stage = after = None
+    start = time.perf_counter()
+    with transaction.atomic(using=using):
+        if staged:
+            stage, batches = _load_staged(connection, model, fields, rows, batch_size, on_duplicate, counts)
+            maintenance = 0.0
+        else:
+            after = last_pk(model, using) if searchable else None
+            batches, maintenance = _load_rows(
+                connection, model, fields, rows, using, batch_size, use_copy, on_duplicate, counts, load,
+            )
+        finishing = time.perf_counter()
+        if after is not None and counts["inserted"]:
+            index_rows(model, using, after)
+        if model is Data and counts["inserted"]:
+            if stage:
+                rows_model = table_model(f"{stage}_rows", with_indexes=False, fields=[
+                    field.name for field in _kept_fields(model)
+                ])
+                load["rows"] = rows_model.objects.using(using).all()
+            data_load_finished.send(sender=Data, using=using, load=load)
+        if stage:
+            _drop_stage(connection, stage)
+        maintenance += time.perf_counter() - finishing
+    seconds = time.perf_counter() - start
+    inserted = counts["inserted"]
+    loading = seconds - maintenance
+
+    return {
+        "method": "copy" if use_copy else "bulk_create",
+        **counts,
+        "batches": batches,
+        "seconds": round(seconds, 4),
+        "maintenance_seconds": round(maintenance, 4),
+        "rows_per_sec": round(inserted / seconds) if seconds and inserted else None,
+        "load_rows_per_sec": round(inserted / loading) if loading > 0 and inserted else None,
+    }
+
+
+def upsert_load(rows, on_duplicate="skip", using=None, batch_size=None):
+    """
+    Loads Data rows, skipping any whose content hash is already stored or
+    repeated within the same batch. With on_duplicate="touch" the stored rows
+    they match have their date_updated refreshed and are counted as updated.
+    Re-sending an identical file performs no inserts.
+    """
+    return bulk_load(rows, using=using, batch_size=batch_size, on_duplicate=duplicate_policy(on_duplicate))
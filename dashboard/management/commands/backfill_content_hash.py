@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.loaders import backfill_content_hashes
+
+
+class Command(BaseCommand):
+    help = (
+        "Computes content_hash for Data rows stored before upsert ingestion existed. "
+        "Rows repeating earlier content keep NULL, since the column is unique."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        updated = backfill_content_hashes(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Backfilled content_hash for {updated} rows."))
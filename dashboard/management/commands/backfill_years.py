@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.years import backfill_years
+
+
+class Command(BaseCommand):
+    help = "Fills the integer start/end year columns for Data rows stored before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filled = backfill_years(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Filled integer years for {filled} rows."))
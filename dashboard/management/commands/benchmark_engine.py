@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from dashboard import columnar
+from dashboard.models import Data
+from dashboard.views import DashboardView
+
+ACTIONS = (
+    "getOverview", "getIntensity", "getTopicDistribution",
+    "getTrendsOverYears", "getWorldMapData", "getBubbleChartData",
+)
+FILTER_SETS = (
+    {},
+    {"region": "Asia"},
+    {"intensity_min": "5", "end_year_min": "2025"},
+)
+
+
+def _canonical(value):
+    """Float-tolerant form of a response for parity checks; order matters."""
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    if isinstance(value, float):
+        return round(value, 9)
+    return value
+
+
+class Command(BaseCommand):
+    help = "Compares each dashboard action's latency and results on the ORM and NumPy engines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def run_action(self, action, params, engine):
+        request = Request(APIRequestFactory().get("/data/dashboard/", {"action": action, **params}))
+        view = DashboardView()
+        view.filters = None
+        view.base_model = None
+        with override_settings(DASHBOARD_ENGINE=engine):
+            start = time.perf_counter()
+            getattr(view, action)(request)
+            elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, view.status, view.ctx
+
+    def handle(self, *args, **options):
+        if columnar.np is None:
+            raise CommandError("NumPy is not installed.")
+
+        with override_settings(DASHBOARD_ENGINE="numpy"):
+            start = time.perf_counter()
+            columnar.columnar_engine()
+            load_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(f"rows {Data.objects.count()}  engine load {load_ms:.1f} ms")
+
+        mismatches = 0
+        for params in FILTER_SETS:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"filters {params or '{}'}"))
+            for action in ACTIONS:
+                medians = {}
+                results = {}
+                for engine in ("orm", "numpy"):
+                    timings = []
+                    for _ in range(options["repeat"]):
+                        elapsed, code, ctx = self.run_action(action, {"records_number": 1000, **params}, engine)
+                        timings.append(elapsed)
+                    medians[engine] = statistics.median(timings)
+                    results[engine] = (code, _canonical(ctx))
+                same = results["orm"] == results["numpy"]
+                mismatches += not same
+                self.stdout.write(
+                    f"{action:<22} orm {medians['orm']:8.2f} ms  numpy {medians['numpy']:8.2f} ms  "
+                    f"x{medians['orm'] / medians['numpy']:6.1f}  {'parity ok' if same else 'MISMATCH'}"
+                )
+
+        if mismatches:
+            raise CommandError(f"{mismatches} action results differ between engines.")
+        self.stdout.write(self.style.SUCCESS("All engine results match the ORM."))
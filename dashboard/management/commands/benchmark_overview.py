@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from django.db import connection
+from django.db.models import Avg, Count
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.aggregates import overview_aggregates
+from dashboard.models import Data
+
+
+def legacy_overview():
+    """The getOverview implementation before the single-scan rewrite."""
+    return {
+        "avg_intensity": Data.objects.aggregate(avg_intensity=Avg("intensity"))["avg_intensity"],
+        "avg_likelihood": Data.objects.aggregate(avg_likelihood=Avg("likelihood"))["avg_likelihood"],
+        "avg_relevance": Data.objects.aggregate(avg_relevance=Avg("relevance"))["avg_relevance"],
+        "end_year_distribution": list(Data.objects.values("end_year").annotate(count=Count("end_year"))),
+        "country_distribution": list(Data.objects.values("country").annotate(count=Count("country"))),
+        "topic_distribution": list(Data.objects.values("topic").annotate(count=Count("topic"))),
+        "region_distribution": list(Data.objects.values("region").annotate(count=Count("region"))),
+        "total_topic": Data.objects.exclude(topic="").values("topic").distinct().count(),
+        "total_country": Data.objects.exclude(country="").values("country").distinct().count(),
+        "total_region": Data.objects.exclude(region="").values("region").distinct().count(),
+    }
+
+
+class Command(BaseCommand):
+    help = "Compares getOverview latency and query count against the pre-rewrite implementation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        for label, run in (("legacy", legacy_overview), ("single-scan", overview_aggregates)):
+            timings = []
+            for _ in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    run()
+                    timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"{label:<12} median {statistics.median(timings):8.2f} ms  "
+                f"queries {len(queries.captured_queries)}  rows {Data.objects.count()}"
+            )
@@ -0,0 +1,77 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from dashboard import middleware
+from dashboard.middleware import CompressionMiddleware
+from dashboard.models import Data
+from dashboard.renderers import FastJSONRenderer, orjson
+from dashboard.views import DashboardView
+
+REQUESTS = (
+    ("getFilter", {}),
+    ("getOverview", {}),
+    ("getIntensity", {"records_number": "100"}),
+    ("getTopicDistribution", {}),
+    ("getTrendsOverYears", {}),
+    ("getWorldMapData", {}),
+    ("getWorldMapData", {"format": "columnar"}),
+    ("getBubbleChartData", {}),
+    ("getBubbleChartData", {"format": "columnar"}),
+)
+
+
+def _median_ms(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports, per dashboard action, the time to serialise its payload with the stock "
+        "and the fast JSON renderer and the bytes sent per Accept-Encoding."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def wire_bytes(self, params, encoding):
+        request = APIRequestFactory().get("/data/dashboard/", params, HTTP_ACCEPT_ENCODING=encoding)
+        response = DashboardView.as_view()(request)
+        response.render()
+        response = CompressionMiddleware(lambda request: response).process_response(request, response)
+        return response, len(response.content)
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        encodings = ["identity", "gzip"] + (["br"] if middleware.brotli is not None else [])
+        self.stdout.write(
+            f"rows {Data.objects.count()}  orjson {'yes' if orjson else 'no'}  "
+            f"brotli {'yes' if middleware.brotli else 'no'}"
+        )
+        self.stdout.write(
+            f"{'action':<32}{'stock ms':>10}{'fast ms':>10}{'speedup':>9}"
+            + "".join(f"{encoding + ' B':>12}" for encoding in encodings)
+        )
+
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        for action, extra in REQUESTS:
+            params = {"action": action, **extra}
+            response, _ = self.wire_bytes(params, "identity")
+            data = response.data
+            stock_ms = _median_ms(lambda: stock.render(data), repeat)
+            fast_ms = _median_ms(lambda: fast.render(data), repeat)
+            sizes = [self.wire_bytes(params, encoding)[1] for encoding in encodings]
+
+            label = action + (f" ({extra['format']})" if "format" in extra else "")
+            self.stdout.write(
+                f"{label:<32}{stock_ms:>10.2f}{fast_ms:>10.2f}{stock_ms / max(fast_ms, 1e-6):>8.1f}x"
+                + "".join(f"{size:>12}" for size in sizes)
+            )
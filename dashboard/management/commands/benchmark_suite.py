@@ -0,0 +1,296 @@
+import contextlib
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from dashboard.models import Data
+from dashboard.response_cache import get_cache
+from dashboard.synthetic import generate_records
+from users.models import User
+
+SUITE_VERSION = 1
+GROUPS = ("dashboard", "ingest", "login")
+
+BY_REGION = {"region": "Asia"}
+NARROW = {"sector": "Energy", "intensity_min": "10"}
+BATCH = {"actions": "getOverview,getTopicDistribution,getTrendsOverYears,getWorldMapData"}
+
+DASHBOARD_REQUESTS = (
+    ("getFilter", {}),
+    ("getOverview", {}),
+    ("getOverview", BY_REGION),
+    ("getOverview", NARROW),
+    ("getIntensity", {"records_number": "100"}),
+    ("getIntensity", {"records_number": "100", **NARROW}),
+    ("getTopicDistribution", {}),
+    ("getTopicDistribution", NARROW),
+    ("getTrendsOverYears", {}),
+    ("getTrendsOverYears", NARROW),
+    ("getWorldMapData", {}),
+    ("getWorldMapData", {"format": "columnar"}),
+    ("getWorldMapData", NARROW),
+    ("getBubbleChartData", {}),
+    ("getBubbleChartData", NARROW),
+    ("getSearchResults", {"q": "oil outlook"}),
+    ("getSearchResults", {"q": "gas -coal", **BY_REGION}),
+    ("getBatch", BATCH),
+    ("getBatch", {**BATCH, **NARROW}),
+    ("getCacheStats", {}),
+)
+
+LOGIN_PHONE = "+10000000000"
+LOGIN_PASSWORD = "benchmark-password"
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _consume(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class Case:
+    """One benchmarked request: how to send it, plus optional per-run setup."""
+
+    def __init__(self, name, group, send, before=None):
+        self.name = name
+        self.group = group
+        self.send = send
+        self.before = before
+
+
+class Command(BaseCommand):
+    help = (
+        "Times every DashboardView action, DataAPIView ingest and LoginView through the full "
+        "middleware stack and writes p50/p95 latency, SQL query counts and peak memory as "
+        "JSON. Runs against whatever database is configured (SQLite or PostgreSQL); pass "
+        "--compare with an earlier results file to see the change between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per case first.")
+        parser.add_argument("--groups", default=",".join(GROUPS),
+                            help=f"Comma-separated subset of: {', '.join(GROUPS)}.")
+        parser.add_argument("--cache", choices=("cold", "warm"), default="cold",
+                            help="cold clears the dashboard response cache before every request.")
+        parser.add_argument("--ingest-rows", type=int, default=1000)
+        parser.add_argument("--accept-encoding", default="gzip, deflate, br")
+        parser.add_argument("--label", default=None, help="Defaults to the current git commit.")
+        parser.add_argument("--output", default=None, help="Results file; benchmark-<label>.json by default.")
+        parser.add_argument("--compare", default=None, help="An earlier results file to compare against.")
+        parser.add_argument("--fail-over", type=float, default=None,
+                            help="Exit with an error if any p95 is this many percent slower than --compare.")
+
+    def handle(self, *args, **options):
+        groups = [name.strip() for name in options["groups"].split(",") if name.strip()]
+        unknown = [name for name in groups if name not in GROUPS]
+        if not groups or unknown:
+            raise CommandError(f"--groups must be a comma-separated list of: {', '.join(GROUPS)}.")
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        if options["fail_over"] is not None and not options["compare"]:
+            raise CommandError("--fail-over needs --compare.")
+        baseline = self.read_results(options["compare"]) if options["compare"] else None
+
+        self.options = options
+        self.client = Client(HTTP_ACCEPT_ENCODING=options["accept_encoding"])
+        self.using = router.db_for_read(Data)
+        self.connection = connections[self.using]
+        label = options["label"] or git_commit() or "unlabelled"
+        meta = {
+            "suite": SUITE_VERSION,
+            "label": label,
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": self.connection.vendor,
+            "rows": Data.objects.using(self.using).count(),
+            "engine": settings.DASHBOARD_ENGINE,
+            "cache": options["cache"],
+            "repeat": options["repeat"],
+            "warmup": options["warmup"],
+            "ingest_rows": options["ingest_rows"],
+            "accept_encoding": options["accept_encoding"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        }
+        self.stdout.write(
+            f"{meta['label']}: {meta['database']}, {meta['rows']:,} rows, engine {meta['engine']}, "
+            f"{meta['cache']} cache, {meta['repeat']} runs per case"
+        )
+
+        results = []
+        # The test client's host must be allowed; LoginSerializer prints to stdout.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]), \
+                open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for group in groups:
+                results.extend(getattr(self, f"run_{group}")())
+
+        path = options["output"] or f"benchmark-{label}.json"
+        with open(path, "w") as handle:
+            json.dump({"meta": meta, "results": results}, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {path}"))
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results)
+            limit = options["fail_over"]
+            if limit is not None and any(change > limit for change in regressions.values()):
+                slow = ", ".join(f"{name} (+{change:.0f}%)" for name, change in regressions.items() if change > limit)
+                raise CommandError(f"p95 regressed by more than {limit:g}%: {slow}")
+
+    # Measurement
+
+    def measure(self, case):
+        """Warm-up runs, timed runs, then one run traced for queries and memory."""
+        for _ in range(self.options["warmup"]):
+            self.run_once(case)
+        timings = []
+        for _ in range(self.options["repeat"]):
+            timings.append(self.run_once(case)[0])
+
+        if case.before:
+            case.before()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(self.connection) as queries:
+                response, body = self.send(case)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "name": case.name,
+            "group": case.group,
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(sum(timings) / len(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "queries": len(queries),
+            "peak_memory_kib": round(peak / 1024, 1),
+            "response_bytes": len(body),
+        }
+        self.stdout.write(
+            f"{case.name:<72} {result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f} ms"
+            f"{result['queries']:>5} q{result['peak_memory_kib']:>10.0f} KiB"
+        )
+        if response.status_code >= 400:
+            self.stderr.write(f"  {case.name} returned {response.status_code}: {body[:200]!r}")
+        return result
+
+    def run_once(self, case):
+        if case.before:
+            case.before()
+        start = time.perf_counter()
+        response, body = self.send(case)
+        return (time.perf_counter() - start) * 1000, response, body
+
+    def send(self, case):
+        response = case.send()
+        return response, _consume(response)
+
+    # Groups
+
+    def run_dashboard(self):
+        clear = get_cache().clear if self.options["cache"] == "cold" else None
+        results = []
+        for action, extra in DASHBOARD_REQUESTS:
+            params = {"action": action, **extra}
+            name = f"GET /data/dashboard/?{urlencode(params)}"
+            results.append(self.measure(Case(
+                name, "dashboard", lambda params=params: self.client.get("/data/dashboard/", params), before=clear,
+            )))
+        return results
+
+    def run_ingest(self):
+        """
+        Uploads a synthetic file through each ingest path. Every run is rolled
+        back, so the dataset (and so the other timings) stay the same.
+        """
+        payload = json.dumps(list(generate_records(self.options["ingest_rows"], seed=SUITE_VERSION))).encode()
+        results = []
+        for mode in (None, "stream", "upsert"):
+            data = {"mode": mode} if mode else {}
+
+            def send(data=data):
+                with transaction.atomic(using=self.using):
+                    upload = SimpleUploadedFile("data.json", payload, content_type="application/json")
+                    response = self.client.post("/data/", {"datafile": upload, **data})
+                    transaction.set_rollback(True, using=self.using)
+                return response
+
+            name = f"POST /data/ {mode or 'serializer'} ({self.options['ingest_rows']} rows)"
+            results.append(self.measure(Case(name, "ingest", send)))
+        return results
+
+    def run_login(self):
+        """Logs in a throwaway user, rolled back afterwards."""
+        with transaction.atomic(using=router.db_for_write(User)):
+            User.objects.create_user(
+                LOGIN_PHONE, LOGIN_PASSWORD, first_name="Bench", last_name="Mark", email="benchmark@example.com",
+            )
+            credentials = {"phone": LOGIN_PHONE, "password": LOGIN_PASSWORD}
+            result = self.measure(Case(
+                "POST /users/login/", "login",
+                lambda: self.client.post("/users/login/", credentials, content_type="application/json"),
+            ))
+            transaction.set_rollback(True, using=router.db_for_write(User))
+        return [result]
+
+    # Comparison
+
+    def read_results(self, path):
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+    def compare(self, baseline, results):
+        """Prints p50/p95/query changes per case; returns {name: p95 change %}."""
+        previous = {result["name"]: result for result in baseline.get("results", [])}
+        meta = baseline.get("meta", {})
+        self.stdout.write(f"\nCompared with {meta.get('label')} ({meta.get('database')}, {meta.get('rows')} rows):")
+        changes = {}
+        for result in results:
+            before = previous.get(result["name"])
+            if before is None:
+                continue
+            p50 = (result["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0.0
+            p95 = (result["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+            changes[result["name"]] = p95
+            self.stdout.write(
+                f"{result['name']:<72} p50 {p50:>+7.1f}%  p95 {p95:>+7.1f}%  "
+                f"queries {before['queries']}->{result['queries']}"
+            )
+        return changes
@@ -0,0 +1,51 @@
+import copy
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.ingest import normalise_record
+from dashboard.serializers import DataSerializer
+from dashboard.synthetic import generate_records
+from dashboard.validators import DataValidator
+
+
+class Command(BaseCommand):
+    help = "Compares rows/sec of DataSerializer validation against the fast-path DataValidator."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        records = list(generate_records(options["rows"], seed=options["seed"]))
+        # Sprinkle in invalid records so both paths exercise their reject branches.
+        for index in range(0, len(records), 97):
+            records[index]["intensity"] = "n/a"
+        for index in range(13, len(records), 89):
+            records[index]["added"] = "Smarch, 40 2017 99:00:00"
+
+        serializer_accepted, serializer_seconds = self.run_serializer(copy.deepcopy(records))
+        validator_accepted, validator_seconds = self.run_validator(records)
+
+        rows = len(records)
+        self.stdout.write(f"rows:             {rows}")
+        self.stdout.write(f"DataSerializer:   {rows / serializer_seconds:,.0f} rows/sec ({serializer_accepted} accepted)")
+        self.stdout.write(f"DataValidator:    {rows / validator_seconds:,.0f} rows/sec ({validator_accepted} accepted)")
+        self.stdout.write(f"speedup:          {serializer_seconds / validator_seconds:.1f}x")
+        if serializer_accepted != validator_accepted:
+            self.stderr.write("Accept/reject results differ between the two paths!")
+
+    def run_serializer(self, records):
+        start = time.perf_counter()
+        accepted = 0
+        for record in records:
+            if normalise_record(record):
+                continue
+            if DataSerializer(data=record).is_valid():
+                accepted += 1
+        return accepted, time.perf_counter() - start
+
+    def run_validator(self, records):
+        start = time.perf_counter()
+        rows, _ = DataValidator().validate_many(records)
+        return len(rows), time.perf_counter() - start
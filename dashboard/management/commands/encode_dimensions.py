@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.dimensions import encode_existing
+from dashboard.models import Dimension
+
+
+class Command(BaseCommand):
+    help = "Fills the dimension code columns for Data rows stored before dictionary encoding existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        encoded = encode_existing(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Encoded {encoded} rows; dictionary holds {Dimension.objects.count()} names."
+        ))
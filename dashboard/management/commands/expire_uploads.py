@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.uploads import expire_upload_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Removes chunked upload sessions idle for DATA_UPLOAD_SESSION_EXPIRY_HOURS "
+        "and their spool files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, help="Override DATA_UPLOAD_SESSION_EXPIRY_HOURS.")
+
+    def handle(self, *args, **options):
+        removed = expire_upload_sessions(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired upload sessions."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from dashboard.dimensions import dimension_q
+from dashboard.models import Data, Dimension
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints the query plans of common dashboard filters in exact-match mode "
+        "next to the substring scans they replace, to check index use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--country", help="Country name to filter on (defaults to a stored one).")
+        parser.add_argument("--topic", help="Topic name to filter on (defaults to a stored one).")
+        parser.add_argument("--end-year-min", type=int, default=2020)
+
+    def _sample(self, column):
+        return Dimension.objects.filter(column=column).exclude(name="").values_list("name", flat=True).first()
+
+    def handle(self, *args, **options):
+        country = options["country"] or self._sample("country")
+        topic = options["topic"] or self._sample("topic")
+        year_min = options["end_year_min"]
+
+        plans = [
+            ("country (contains)", Q(country__icontains=country)),
+            ("country (exact)", dimension_q("country", country, "exact")),
+            ("country + end_year range (exact)",
+             dimension_q("country", country, "exact") & Q(end_year_value__gte=year_min)),
+            ("topic + end_year range (exact)",
+             dimension_q("topic", topic, "exact") & Q(end_year_value__gte=year_min)),
+        ]
+        for label, q in plans:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(Data.objects.filter(q).values("id").explain())
+            self.stdout.write("")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.jobs import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Marks ingest jobs left running by a stopped process as failed, once their "
+        "progress has not moved for DATA_INGEST_STALE_MINUTES."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--minutes", type=int, help="Override DATA_INGEST_STALE_MINUTES.")
+
+    def handle(self, *args, **options):
+        failed = fail_stale_jobs(options["minutes"])
+        self.stdout.write(self.style.SUCCESS(f"Marked {failed} stale ingest jobs as failed."))
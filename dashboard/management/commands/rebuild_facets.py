@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.facets import rebuild_facets
+from dashboard.models import FacetRange, FacetValue
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the getFilter facet catalogue from the Data table."
+
+    def handle(self, *args, **options):
+        rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(
+            f"Facet catalogue rebuilt with {FacetValue.objects.count()} values "
+            f"and {FacetRange.objects.count()} ranges."
+        ))
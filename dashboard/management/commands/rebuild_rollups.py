@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.models import DataRollup
+from dashboard.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the dashboard rollup table from the Data table."
+
+    def handle(self, *args, **options):
+        rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rollup rebuilt with {DataRollup.objects.count()} groups."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, router
+
+from dashboard.models import Data
+from dashboard.search import backfill_search, build_search_index, has_search_index, uses_tsvector
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the GIN search index on the Data table if it is missing and fills "
+        "search vectors for rows stored before search existed (PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        using = router.db_for_write(Data)
+        if not uses_tsvector(using):
+            self.stdout.write("Not PostgreSQL: searches use the in-memory index, nothing to build.")
+            return
+        connection = connections[using]
+        if not has_search_index(connection, Data._meta.db_table):
+            build_search_index(connection, Data)
+            self.stdout.write("Created the search index.")
+        filled = backfill_search(using, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Filled search vectors for {filled} rows."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.datasets import DatasetError, rollback_dataset
+
+
+class Command(BaseCommand):
+    help = "Swaps the previous Data generation back in after a replace-mode ingest."
+
+    def handle(self, *args, **options):
+        try:
+            rollback_dataset()
+        except DatasetError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS("Previous dataset generation restored."))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import columnar
+from dashboard.generation import current_generation
+from dashboard.snapshots import prune_snapshots, snapshot_dir, snapshot_lock, write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a memory-mapped columnar snapshot of the Data table for the numpy "
+        "dashboard engine and makes it current for every worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--directory", help="Snapshot directory (defaults to DASHBOARD_SNAPSHOT_DIR).")
+
+    def handle(self, *args, **options):
+        if columnar.np is None:
+            raise CommandError("NumPy is not installed.")
+        directory = options["directory"] or snapshot_dir()
+        if not directory:
+            raise CommandError("DASHBOARD_SNAPSHOT_DIR is not set; pass --directory.")
+
+        start = time.perf_counter()
+        with snapshot_lock(directory):
+            engine = columnar.ColumnarEngine.from_database(current_generation())
+            path = write_snapshot(engine, directory)
+        elapsed = time.perf_counter() - start
+
+        removed = prune_snapshots(directory)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {path} (generation {engine.generation}, {engine.size} rows) in {elapsed:.2f}s; "
+            f"pruned {len(removed)} old snapshots."
+        ))
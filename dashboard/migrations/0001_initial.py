@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Data',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('end_year', models.CharField(blank=True, max_length=10, null=True)),
+                ('intensity', models.IntegerField(blank=True, null=True)),
+                ('sector', models.CharField(blank=True, max_length=100, null=True)),
+                ('topic', models.CharField(blank=True, max_length=100, null=True)),
+                ('insight', models.TextField(blank=True, null=True)),
+                ('url', models.TextField(blank=True, null=True)),
+                ('region', models.CharField(blank=True, max_length=100, null=True)),
+                ('start_year', models.CharField(blank=True, max_length=10, null=True)),
+                ('impact', models.TextField(blank=True, null=True)),
+                ('added', models.DateTimeField(blank=True, null=True)),
+                ('published', models.DateTimeField(blank=True, null=True)),
+                ('country', models.CharField(blank=True, max_length=100, null=True)),
+                ('relevance', models.IntegerField(blank=True, null=True)),
+                ('pestle', models.CharField(blank=True, max_length=100, null=True)),
+                ('source', models.TextField(blank=True, null=True)),
+                ('title', models.TextField(blank=True, null=True)),
+                ('likelihood', models.IntegerField(blank=True, null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'Data',
+                'verbose_name_plural': 'Data',
+                'db_table': 'Data',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        # Indexed first so the backfill in 0003 can look up earlier hashes.
+        migrations.AddField(
+            model_name='data',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+# The business fields and encoding loaders.content_hash used when this
+# migration was written. Frozen here, so rows hashed by the migration match
+# rows hashed at ingest whatever later happens to the app code.
+CONTENT_HASH_FIELDS = (
+    "end_year", "intensity", "sector", "topic", "insight", "url", "region",
+    "start_year", "impact", "added", "published", "country", "relevance",
+    "pestle", "source", "title", "likelihood",
+)
+BATCH_SIZE = 2000
+
+
+def content_hash(row):
+    values = []
+    for name in CONTENT_HASH_FIELDS:
+        value = getattr(row, name)
+        if isinstance(value, datetime):
+            if value.tzinfo is not None and value.utcoffset() is not None:
+                value = value.astimezone(timezone.utc)
+            value = value.isoformat()
+        values.append(value)
+    payload = json.dumps(values, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hash_existing(apps, schema_editor):
+    """
+    Hashes the stored rows in primary-key order. Only the first row of each
+    content gets the hash; later duplicates keep NULL, since 0003 makes the
+    column unique.
+    """
+    Data = apps.get_model("dashboard", "Data")
+    manager = Data.objects.using(schema_editor.connection.alias)
+    after = 0
+    while True:
+        rows = list(manager.filter(content_hash__isnull=True, pk__gt=after).order_by("pk")[:BATCH_SIZE])
+        if not rows:
+            return
+        after = rows[-1].pk
+        by_hash = {}
+        for row in rows:
+            by_hash.setdefault(content_hash(row), row)
+        stored = set(manager.filter(content_hash__in=list(by_hash)).values_list("content_hash", flat=True))
+        fresh = []
+        for key, row in by_hash.items():
+            if key not in stored:
+                row.content_hash = key
+                fresh.append(row)
+        manager.bulk_update(fresh, ["content_hash"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_data_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_existing, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='data',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_backfill_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('file_path', models.TextField()),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('on_duplicate', models.CharField(blank=True, max_length=20, null=True)),
+                ('batch_size', models.IntegerField(blank=True, null=True)),
+                ('bytes_processed', models.BigIntegerField(default=0)),
+                ('rows_processed', models.BigIntegerField(default=0)),
+                ('rows_inserted', models.BigIntegerField(default=0)),
+                ('rows_updated', models.BigIntegerField(default=0)),
+                ('rows_skipped', models.BigIntegerField(default=0)),
+                ('rows_rejected', models.BigIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'Ingest Job',
+                'verbose_name_plural': 'Ingest Jobs',
+                'db_table': 'ingest_job',
+            },
+        ),
+    ]
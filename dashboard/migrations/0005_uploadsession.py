@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_ingestjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('finalised', 'Finalised')], default='open', max_length=20)),
+                ('file_path', models.TextField()),
+                ('next_index', models.IntegerField(default=0)),
+                ('bytes_received', models.BigIntegerField(default=0)),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'Upload Session',
+                'verbose_name_plural': 'Upload Sessions',
+                'db_table': 'upload_session',
+            },
+        ),
+    ]
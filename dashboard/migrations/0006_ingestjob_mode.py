@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='mode',
+            field=models.CharField(default='stream', max_length=20),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+# The columns getFilter lists or reports ranges for, as of this migration.
+FACET_COLUMNS = (
+    "start_year", "end_year", "topic", "region", "country", "sector", "pestle", "source",
+    "intensity", "likelihood", "relevance", "impact",
+)
+
+
+def build_catalogue(apps, schema_editor):
+    """Fills the catalogue with the distinct stored values of every facet column."""
+    using = schema_editor.connection.alias
+    Data = apps.get_model("dashboard", "Data")
+    FacetValue = apps.get_model("dashboard", "FacetValue")
+    for column in FACET_COLUMNS:
+        values = Data.objects.using(using).values_list(column, flat=True).distinct()
+        FacetValue.objects.using(using).bulk_create(
+            [FacetValue(column=column, value=None if value is None else str(value)) for value in values],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_ingestjob_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column', models.CharField(max_length=50)),
+                ('value', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Facet Value',
+                'verbose_name_plural': 'Facet Values',
+                'db_table': 'facet_value',
+                'constraints': [models.UniqueConstraint(fields=('column', 'value'), name='facet_value_column_value_uniq')],
+            },
+        ),
+        migrations.RunPython(build_catalogue, migrations.RunPython.noop),
+    ]
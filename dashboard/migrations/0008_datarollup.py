@@ -0,0 +1,76 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+import hashlib
+import json
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# The rollup's grouping key and totals as of this migration.
+DIMENSIONS = ("country", "region", "topic", "end_year")
+COUNTED = ("sector", "pestle")
+MEASURES = ("intensity", "likelihood", "relevance")
+
+
+def dims_key(values):
+    return hashlib.sha1(json.dumps(list(values), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def build_rollup(apps, schema_editor):
+    """Groups the stored rows into the rollup with one GROUP BY."""
+    using = schema_editor.connection.alias
+    Data = apps.get_model("dashboard", "Data")
+    DataRollup = apps.get_model("dashboard", "DataRollup")
+    annotations = {"rows": Count("pk")}
+    for name in COUNTED + MEASURES:
+        annotations[f"{name}_n"] = Count(name)
+    for measure in MEASURES:
+        annotations[f"{measure}_total"] = Sum(measure)
+    entries = Data.objects.using(using).values(*DIMENSIONS).annotate(**annotations).order_by()
+    groups = []
+    for entry in entries:
+        group = DataRollup(
+            dims_key=dims_key(entry[dimension] for dimension in DIMENSIONS),
+            row_count=entry["rows"],
+            **{dimension: entry[dimension] for dimension in DIMENSIONS},
+            **{f"{name}_count": entry[f"{name}_n"] for name in COUNTED + MEASURES},
+            **{f"{measure}_sum": entry[f"{measure}_total"] or 0 for measure in MEASURES},
+        )
+        groups.append(group)
+    DataRollup.objects.using(using).bulk_create(groups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_facetvalue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dims_key', models.CharField(max_length=40, unique=True)),
+                ('country', models.CharField(blank=True, max_length=100, null=True)),
+                ('region', models.CharField(blank=True, max_length=100, null=True)),
+                ('topic', models.CharField(blank=True, max_length=100, null=True)),
+                ('end_year', models.CharField(blank=True, max_length=10, null=True)),
+                ('row_count', models.BigIntegerField(default=0)),
+                ('sector_count', models.BigIntegerField(default=0)),
+                ('pestle_count', models.BigIntegerField(default=0)),
+                ('intensity_sum', models.BigIntegerField(default=0)),
+                ('intensity_count', models.BigIntegerField(default=0)),
+                ('likelihood_sum', models.BigIntegerField(default=0)),
+                ('likelihood_count', models.BigIntegerField(default=0)),
+                ('relevance_sum', models.BigIntegerField(default=0)),
+                ('relevance_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Data Rollup',
+                'verbose_name_plural': 'Data Rollups',
+                'db_table': 'data_rollup',
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# The dictionary-encoded Data columns as of this migration.
+DIMENSION_COLUMNS = ("sector", "topic", "region", "country", "pestle", "source")
+
+
+def encode_stored_rows(apps, schema_editor):
+    """
+    Adds every stored name to the dictionary, then sets each column's codes
+    with one UPDATE that looks the names up. NULL names keep a NULL code.
+    """
+    using = schema_editor.connection.alias
+    Data = apps.get_model("dashboard", "Data")
+    Dimension = apps.get_model("dashboard", "Dimension")
+    for column in DIMENSION_COLUMNS:
+        names = Data.objects.using(using).filter(**{f"{column}__isnull": False}).values_list(column, flat=True)
+        Dimension.objects.using(using).bulk_create(
+            [Dimension(column=column, name=name) for name in names.distinct()], ignore_conflicts=True,
+        )
+        codes = Dimension.objects.using(using).filter(column=column, name=OuterRef(column)).values("pk")[:1]
+        Data.objects.using(using).filter(**{f"{column}__isnull": False}).update(**{f"{column}_code": Subquery(codes)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_datarollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dimension',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column', models.CharField(max_length=50)),
+                ('name', models.TextField()),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+            ],
+            options={
+                'verbose_name': 'Dimension',
+                'verbose_name_plural': 'Dimensions',
+                'db_table': 'dimension',
+                'constraints': [models.UniqueConstraint(fields=('column', 'name'), name='dimension_column_name_uniq')],
+            },
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='sector_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='topic_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='region_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='country_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='pestle_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='source_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(encode_stored_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+def year_value(value):
+    """Parses a stored year string; blanks and malformed values become None."""
+    value = str(value).strip()
+    if not value.isdigit() or len(value) > 4:
+        return None
+    return int(value) or None
+
+
+def fill_stored_years(apps, schema_editor):
+    """
+    Sets the integer years of stored Data rows and rollup groups with one
+    UPDATE per distinct text year (there are few of them).
+    """
+    using = schema_editor.connection.alias
+    targets = (
+        (apps.get_model("dashboard", "Data"), (("start_year", "start_year_value"), ("end_year", "end_year_value"))),
+        (apps.get_model("dashboard", "DataRollup"), (("end_year", "end_year_value"),)),
+    )
+    for model, fields in targets:
+        for field, value_field in fields:
+            rows = model.objects.using(using).filter(**{f"{field}__isnull": False})
+            for text in rows.values_list(field, flat=True).distinct().order_by():
+                year = year_value(text)
+                if year is not None:
+                    rows.filter(**{field: text}).update(**{value_field: year})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_dimension_data_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='data',
+            name='start_year_value',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='data',
+            name='end_year_value',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='datarollup',
+            name='end_year_value',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(fill_stored_years, migrations.RunPython.noop),
+    ]
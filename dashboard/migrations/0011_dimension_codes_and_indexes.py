@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Rollup dimensions that gain dictionary codes here.
+ROLLUP_CODE_COLUMNS = ("country", "region", "topic")
+
+
+def normalise_name(value):
+    """Case-folds a name and collapses its whitespace, as exact-match filters do."""
+    return " ".join(str(value).split()).casefold()
+
+
+def fill_lookup_columns(apps, schema_editor):
+    """
+    Fills the normalised name of every stored dictionary entry, and the
+    codes of every rollup group with one UPDATE per column that looks its
+    name up in the dictionary.
+    """
+    using = schema_editor.connection.alias
+    Dimension = apps.get_model("dashboard", "Dimension")
+    DataRollup = apps.get_model("dashboard", "DataRollup")
+
+    names = list(Dimension.objects.using(using).filter(normalised__isnull=True))
+    for dimension in names:
+        dimension.normalised = normalise_name(dimension.name)
+    Dimension.objects.using(using).bulk_update(names, ["normalised"], batch_size=1000)
+
+    for column in ROLLUP_CODE_COLUMNS:
+        codes = Dimension.objects.using(using).filter(column=column, name=OuterRef(column)).values("pk")[:1]
+        DataRollup.objects.using(using).filter(**{f"{column}__isnull": False}).update(
+            **{f"{column}_code": Subquery(codes)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_year_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dimension',
+            name='normalised',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datarollup',
+            name='country_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datarollup',
+            name='region_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='datarollup',
+            name='topic_code',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['country_code', 'end_year_value'], name='data_country_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['topic_code', 'end_year_value'], name='data_topic_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['region_code', 'country_code'], name='data_region_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['sector_code', 'topic_code'], name='data_sector_topic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dimension',
+            index=models.Index(fields=['column', 'normalised'], name='dimension_normalised_idx'),
+        ),
+        migrations.RunPython(fill_lookup_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Q
+
+# Searched columns and their ts_rank weights as of this migration.
+SEARCH_WEIGHTS = (("title", "A"), ("insight", "B"))
+
+
+def build_search(apps, schema_editor):
+    # PostgreSQL only: other backends search with the in-memory index, and
+    # a GIN index in Meta.indexes would not build there.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Data = apps.get_model("dashboard", "Data")
+    schema_editor.add_index(Data, GinIndex(fields=["search_vector"], name="data_search_vector_gin"))
+
+    config = settings.DASHBOARD_SEARCH_CONFIG
+    vector = None
+    searchable = Q()
+    for field, weight in SEARCH_WEIGHTS:
+        part = SearchVector(field, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+        searchable |= Q(**{f"{field}__isnull": False})
+    Data.objects.using(schema_editor.connection.alias).filter(searchable).update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_datasetgeneration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='data',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(build_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# The rollup's grouping key and totals as of this migration.
+DIMENSIONS = ("country_code", "region_code", "topic_code", "end_year_value")
+COUNTED = ("sector", "pestle")
+MEASURES = ("intensity", "likelihood", "relevance")
+
+
+def dims_key(values):
+    return ".".join("" if value is None else str(value) for value in values)
+
+
+def regroup_rollup(apps, schema_editor):
+    """Rebuilds the rollup from the stored rows, grouped on the codes and integer year."""
+    using = schema_editor.connection.alias
+    Data = apps.get_model("dashboard", "Data")
+    DataRollup = apps.get_model("dashboard", "DataRollup")
+    annotations = {"rows": Count("pk")}
+    for name in COUNTED + MEASURES:
+        annotations[f"{name}_n"] = Count(name)
+    for measure in MEASURES:
+        annotations[f"{measure}_total"] = Sum(measure)
+    entries = Data.objects.using(using).values(*DIMENSIONS).annotate(**annotations).order_by()
+    groups = [
+        DataRollup(
+            dims_key=dims_key(entry[dimension] for dimension in DIMENSIONS),
+            row_count=entry["rows"],
+            **{dimension: entry[dimension] for dimension in DIMENSIONS},
+            **{f"{name}_count": entry[f"{name}_n"] for name in COUNTED + MEASURES},
+            **{f"{measure}_sum": entry[f"{measure}_total"] or 0 for measure in MEASURES},
+        )
+        for entry in entries
+    ]
+    DataRollup.objects.using(using).all().delete()
+    DataRollup.objects.using(using).bulk_create(groups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_data_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='datarollup',
+            name='country',
+        ),
+        migrations.RemoveField(
+            model_name='datarollup',
+            name='end_year',
+        ),
+        migrations.RemoveField(
+            model_name='datarollup',
+            name='region',
+        ),
+        migrations.RemoveField(
+            model_name='datarollup',
+            name='topic',
+        ),
+        migrations.AlterField(
+            model_name='data',
+            name='country_code',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='data',
+            name='region_code',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='data',
+            name='sector_code',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='data',
+            name='topic_code',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(regroup_rollup, migrations.RunPython.noop),
+    ]
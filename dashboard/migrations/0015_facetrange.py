@@ -0,0 +1,64 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+# The columns getFilter reports ranges for, and which of them are integers,
+# as of this migration.
+RANGE_COLUMNS = ("intensity", "likelihood", "relevance", "impact")
+INTEGER_COLUMNS = ("intensity", "likelihood", "relevance")
+
+
+def build_ranges(apps, schema_editor):
+    """Stores the min/max of every range column and drops their distinct values from the catalogue."""
+    using = schema_editor.connection.alias
+    Data = apps.get_model("dashboard", "Data")
+    FacetRange = apps.get_model("dashboard", "FacetRange")
+    FacetValue = apps.get_model("dashboard", "FacetValue")
+    ranges = []
+    for column in RANGE_COLUMNS:
+        bounds = Data.objects.using(using).aggregate(low=Min(column), high=Max(column))
+        kind = "number" if column in INTEGER_COLUMNS else "text"
+        ranges.append(FacetRange(column=column, **{f"min_{kind}": bounds["low"], f"max_{kind}": bounds["high"]}))
+    FacetRange.objects.using(using).bulk_create(ranges)
+    FacetValue.objects.using(using).filter(column__in=RANGE_COLUMNS).delete()
+
+
+def restore_values(apps, schema_editor):
+    """Puts the distinct values of the range columns back into the catalogue."""
+    using = schema_editor.connection.alias
+    Data = apps.get_model("dashboard", "Data")
+    FacetValue = apps.get_model("dashboard", "FacetValue")
+    for column in RANGE_COLUMNS:
+        values = Data.objects.using(using).values_list(column, flat=True).distinct()
+        FacetValue.objects.using(using).bulk_create(
+            [FacetValue(column=column, value=None if value is None else str(value)) for value in values],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_rollup_codes_and_code_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetRange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column', models.CharField(max_length=50, unique=True)),
+                ('min_number', models.BigIntegerField(blank=True, null=True)),
+                ('max_number', models.BigIntegerField(blank=True, null=True)),
+                ('min_text', models.TextField(blank=True, null=True)),
+                ('max_text', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Facet Range',
+                'verbose_name_plural': 'Facet Ranges',
+                'db_table': 'facet_range',
+            },
+        ),
+        migrations.RunPython(build_ranges, restore_values),
+    ]
@@ -1,3 +1,6 @@
+import uuid
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 class Data(models.Model):
@@ -6,7 +9,7 @@ class Data(models.Model):
     sector = models.CharField(max_length=100,blank=True, null=True)
     topic = models.CharField(max_length=100,blank=True, null=True)
     insight = models.TextField(blank=True, null=True)
-    url = models.CharField(blank=True, null=True)
+    url = models.TextField(blank=True, null=True)
     region = models.CharField(max_length=100,blank=True, null=True)
     start_year = models.CharField(max_length=10, blank=True, null=True)
     impact = models.TextField(blank=True, null=True)
@@ -19,6 +22,29 @@ class Data(models.Model):
     title = models.TextField(blank=True, null=True)
     likelihood = models.IntegerField(blank=True, null=True)
 
+    # SHA-256 over the business fields, used to skip re-sent records on upsert.
+    # Unique: repeated content keeps NULL here (see loaders.split_duplicates).
+    content_hash = models.CharField(max_length=64, blank=True, null=True, editable=False, unique=True)
+
+    # Dictionary codes (Dimension primary keys) for the categorical columns,
+    # resolved at ingest so grouping and filtering can run on integers.
+    # sector, topic, region and country lead a composite index in Meta, which
+    # serves their filters, so they have no index of their own.
+    sector_code = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    topic_code = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    region_code = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    country_code = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    pestle_code = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+    source_code = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+
+    # Integer copies of the text years, NULL when blank or malformed.
+    start_year_value = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, db_index=True)
+    end_year_value = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, db_index=True)
+
+    # Weighted tsvector over title and insight, filled at ingest on PostgreSQL
+    # and GIN-indexed there by migration 0013 (see search.py).
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+
     date_created = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Date Created"
@@ -33,6 +59,220 @@ class Data(models.Model):
         db_table = "Data"
         verbose_name = "Data"
         verbose_name_plural = "Data"
+        # Composite indexes for the filter combinations the dashboard sends most.
+        indexes = [
+            models.Index(fields=["country_code", "end_year_value"], name="data_country_year_idx"),
+            models.Index(fields=["topic_code", "end_year_value"], name="data_topic_year_idx"),
+            models.Index(fields=["region_code", "country_code"], name="data_region_country_idx"),
+            models.Index(fields=["sector_code", "topic_code"], name="data_sector_topic_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+class IngestJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    file_path = models.TextField()
+    file_size = models.BigIntegerField(default=0)
+    mode = models.CharField(max_length=20, default="stream")
+    on_duplicate = models.CharField(max_length=20, blank=True, null=True)
+    batch_size = models.IntegerField(blank=True, null=True)
+
+    bytes_processed = models.BigIntegerField(default=0)
+    rows_processed = models.BigIntegerField(default=0)
+    rows_inserted = models.BigIntegerField(default=0)
+    rows_updated = models.BigIntegerField(default=0)
+    rows_skipped = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    error_message = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Date Updated"
+    )
+
+    class Meta:
+        db_table = "ingest_job"
+        verbose_name = "Ingest Job"
+        verbose_name_plural = "Ingest Jobs"
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class UploadSession(models.Model):
+    STATUS_OPEN = "open"
+    STATUS_FINALISED = "finalised"
+    STATUS_CHOICES = [
+        (STATUS_OPEN, "Open"),
+        (STATUS_FINALISED, "Finalised"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    file_path = models.TextField()
+    next_index = models.IntegerField(default=0)
+    bytes_received = models.BigIntegerField(default=0)
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Date Updated"
+    )
+
+    class Meta:
+        db_table = "upload_session"
+        verbose_name = "Upload Session"
+        verbose_name_plural = "Upload Sessions"
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class FacetValue(models.Model):
+    """
+    Distinct value of a filterable Data column, maintained at ingest time so
+    getFilter reads one small table instead of scanning Data per column.
+    """
+    column = models.CharField(max_length=50)
+    value = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = "facet_value"
+        verbose_name = "Facet Value"
+        verbose_name_plural = "Facet Values"
+        constraints = [
+            models.UniqueConstraint(fields=["column", "value"], name="facet_value_column_value_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.column}={self.value}"
+
+
+class FacetRange(models.Model):
+    """
+    Smallest and largest stored value of a Data column getFilter reports a
+    range for, widened at ingest time. Integer columns keep their bounds in
+    the number fields and text columns in the text fields, so each compares
+    the way MIN/MAX on the Data column does.
+    """
+    column = models.CharField(max_length=50, unique=True)
+    min_number = models.BigIntegerField(blank=True, null=True)
+    max_number = models.BigIntegerField(blank=True, null=True)
+    min_text = models.TextField(blank=True, null=True)
+    max_text = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = "facet_range"
+        verbose_name = "Facet Range"
+        verbose_name_plural = "Facet Ranges"
+
+    def __str__(self):
+        return self.column
+
+
+class DataRollup(models.Model):
+    """
+    Pre-aggregated Data measures per combination of the dashboard dimensions,
+    keyed on their dictionary codes and the integer end year. Sums and
+    non-null counts are kept so averages can be re-derived for any coarser
+    grouping.
+    """
+    dims_key = models.CharField(max_length=40, unique=True)
+
+    country_code = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    region_code = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    topic_code = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    end_year_value = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True)
+
+    row_count = models.BigIntegerField(default=0)
+    # Non-null counts of the columns that are not part of the grouping key.
+    sector_count = models.BigIntegerField(default=0)
+    pestle_count = models.BigIntegerField(default=0)
+    intensity_sum = models.BigIntegerField(default=0)
+    intensity_count = models.BigIntegerField(default=0)
+    likelihood_sum = models.BigIntegerField(default=0)
+    likelihood_count = models.BigIntegerField(default=0)
+    relevance_sum = models.BigIntegerField(default=0)
+    relevance_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "data_rollup"
+        verbose_name = "Data Rollup"
+        verbose_name_plural = "Data Rollups"
+
+    def __str__(self):
+        return self.dims_key
+
+
+class Dimension(models.Model):
+    """Dictionary of the distinct names of one categorical Data column."""
+    column = models.CharField(max_length=50)
+    name = models.TextField()
+    # Case-folded, whitespace-collapsed name used by exact-match filters.
+    normalised = models.TextField(blank=True, null=True)
+
+    date_created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Date Created"
+    )
+
+    class Meta:
+        db_table = "dimension"
+        verbose_name = "Dimension"
+        verbose_name_plural = "Dimensions"
+        constraints = [
+            models.UniqueConstraint(fields=["column", "name"], name="dimension_column_name_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["column", "normalised"], name="dimension_normalised_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.column}: {self.name}"
+
+
+class DatasetGeneration(models.Model):
+    """
+    Single-row counter bumped after every committed change to the Data table.
+    Caches key their entries on it, so bumping it retires every stale entry.
+    """
+    generation = models.BigIntegerField(default=0)
+
+    date_updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Date Updated"
+    )
+
+    class Meta:
+        db_table = "dataset_generation"
+        verbose_name = "Dataset Generation"
+        verbose_name_plural = "Dataset Generations"
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return str(self.generation)
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+
+from django.db.models import F, Q
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values):
+    """Opaque next-page token for the sort key of a page's last row."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, width):
+    """Inverse of encode_cursor; raises ValueError for tokens it did not make."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("cursor is not a valid page token.")
+    if not isinstance(values, list) or len(values) != width:
+        raise ValueError("cursor is not a valid page token.")
+    if any(isinstance(value, (list, dict)) for value in values):
+        raise ValueError("cursor is not a valid page token.")
+    return values
+
+
+def page_size(params):
+    value = params.get("records_number") or DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"records_number must be an integer, got {value!r}.")
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise ValueError(f"records_number must be between 1 and {MAX_PAGE_SIZE}.")
+    return size
+
+
+def page_params(params):
+    """
+    Reads records_number, cursor, the legacy page offset and include_total.
+    Totals cost a second query, so by default only the first page has one.
+    """
+    size = page_size(params)
+    cursor = params.get("cursor")
+    offset = 0
+    if params.get("page") and not cursor:
+        offset = (int(params.get("page")) - 1) * size
+        if offset < 0:
+            raise ValueError("page must be 1 or more.")
+    include_total = str(params.get("include_total", "false" if cursor else "true")).lower() == "true"
+    return size, cursor, offset, include_total
+
+
+def paging_requested(params):
+    """
+    True when the request asks for a page. Lists that were always returned
+    whole (topics, countries) only page when it does.
+    """
+    return any(params.get(name) for name in ("records_number", "cursor", "page"))
+
+
+class Keyset:
+    """
+    A total order over grouped rows, for keyset (seek) pagination.
+
+    `ordering` is a sequence of (field, descending) pairs whose last field is
+    unique per row. NULL sorts below every value on both backends (last when
+    descending, first when ascending), so the SQL order, the seek predicate
+    and the in-memory sort agree.
+    """
+
+    def __init__(self, *ordering):
+        self.ordering = ordering
+        self.fields = [field for field, _ in ordering]
+
+    def order_by(self):
+        return [
+            F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_first=True)
+            for field, descending in self.ordering
+        ]
+
+    @staticmethod
+    def _after(field, descending, value):
+        if descending:
+            return None if value is None else Q(**{f"{field}__lt": value}) | Q(**{f"{field}__isnull": True})
+        return Q(**{f"{field}__isnull": False}) if value is None else Q(**{f"{field}__gt": value})
+
+    @staticmethod
+    def _equal(field, value):
+        return Q(**{f"{field}__isnull": True}) if value is None else Q(**{field: value})
+
+    def seek_q(self, last):
+        """
+        Q matching the rows that sort strictly after `last` (a list of key
+        values), or None when no row can.
+        """
+        q = None
+        prefix = Q()
+        for (field, descending), value in zip(self.ordering, last):
+            after = self._after(field, descending, value)
+            if after is not None:
+                q = prefix & after if q is None else q | (prefix & after)
+            prefix &= self._equal(field, value)
+        return q
+
+    def sort_key(self, row):
+        key = []
+        for field, descending in self.ordering:
+            value = row[field]
+            if descending:
+                key += [value is None, 0 if value is None else -value]
+            else:
+                key += [value is not None, "" if value is None else value]
+        return key
+
+    def cursor(self, row):
+        return encode_cursor(row[field] for field in self.fields)
+
+    def page(self, rows, size, token=None, offset=0):
+        """
+        One page of an annotated queryset (sorted and filtered in SQL) or of a
+        list of dicts (sorted and filtered here). Returns (rows, next cursor).
+        `offset` only serves the legacy page parameter; cursors never need it.
+        """
+        last = decode_cursor(token, len(self.fields)) if token else None
+        if last is not None:
+            try:
+                boundary = self.sort_key(dict(zip(self.fields, last)))
+            except TypeError:
+                raise ValueError("cursor is not a valid page token.")
+        if isinstance(rows, list):
+            rows = sorted(rows, key=self.sort_key)
+            if last is not None:
+                try:
+                    rows = [row for row in rows if self.sort_key(row) > boundary]
+                except TypeError:
+                    raise ValueError("cursor is not a valid page token.")
+        else:
+            rows = rows.order_by(*self.order_by())
+            if last is not None:
+                seek = self.seek_q(last)
+                try:
+                    rows = rows.filter(seek) if seek is not None else rows.none()
+                except (TypeError, ValueError):
+                    # A key value the field cannot compare with.
+                    raise ValueError("cursor is not a valid page token.")
+        rows = list(rows[offset:offset + size + 1])
+        next_cursor = self.cursor(rows[size - 1]) if len(rows) > size else None
+        return rows[:size], next_cursor
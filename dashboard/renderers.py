@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import QuerySet
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: the stock json module is used without it
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: format=arrow is refused without pyarrow
+    pa = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # orjson encodes datetimes, dates, UUIDs and NumPy values itself.
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    return _encoder.default(obj)
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson: datetimes, Decimals and QuerySets are encoded
+    without going through the json module's Python fallbacks. Indented output
+    (the browsable API) and installs without orjson use the stock renderer.
+    The bytes match the stock renderer's, except that floats below 1e-4 or
+    from 1e16 up are written with a bare exponent (1e16, not 1e+16).
+    """
+    # The stock renderer escapes these so the JSON is valid JavaScript too.
+    line_separators = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        content = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        for raw, escaped in self.line_separators:
+            if raw in content:
+                content = content.replace(raw, escaped)
+        return content
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON. Exports stream their rows themselves; this only
+    renders ordinary responses (errors) as a single line.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return (json.dumps(data, cls=DjangoJSONEncoder) + "\n").encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV; ordinary responses (errors) become key,value lines."""
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for key, value in items:
+            writer.writerow([key, value if isinstance(value, str) else json.dumps(value, cls=DjangoJSONEncoder)])
+        return buffer.getvalue().encode(self.charset)
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    Plain JSON selected with ?format=columnar; DashboardView then builds chart
+    data as one array per field instead of one object per row.
+    """
+    format = "columnar"
+
+
+class ArrowRenderer(BaseRenderer):
+    """
+    Apache Arrow IPC stream of a columnar chart payload (?format=arrow). The
+    columns become the record batch; the message travels as schema metadata.
+    """
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        table = pa.table(data["data"]).replace_schema_metadata({"message": data.get("message", "")})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
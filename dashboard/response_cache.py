@@ -0,0 +1,97 @@
+import hashlib
+import json
+import pickle
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import parse_etags
+
+from .filters import FILTER_PARAMS, compile_filters
+
+HITS_KEY = "dashboard:hits"
+MISSES_KEY = "dashboard:misses"
+
+
+def get_cache():
+    return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+
+def canonical_request(action, params, columns=False):
+    """
+    Canonical form of a dashboard request: the action, the compiled filter
+    spec, the remaining parameters in sorted order and whether the data is
+    laid out in columns (which the Accept header alone can ask for). Raises
+    ValueError for malformed filters.
+    """
+    extras = sorted(
+        (name, params.get(name)) for name in params
+        if name not in FILTER_PARAMS and name != "action" and params.get(name)
+    )
+    key = [action, compile_filters(params).key, extras]
+    if columns:
+        key.append("columns")
+    return json.dumps(key, separators=(",", ":"))
+
+
+def cache_key(canonical):
+    return "dashboard:" + hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def response_etag(canonical, generation, media_type):
+    """
+    Strong ETag for a canonical request in a dataset generation, rendered
+    as the negotiated media type (JSON, Arrow, the browsable API, ...).
+    """
+    digest = hashlib.sha1(f"{canonical}\n{media_type}".encode("utf-8")).hexdigest()[:20]
+    return f'"{generation}-{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    tags = parse_etags(if_none_match)
+    if tags == ["*"]:
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _count(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def cached_response(canonical, generation):
+    """Returns the stored (ctx, status) for a request in this generation, or None."""
+    payload = get_cache().get(cache_key(canonical), version=generation)
+    _count(HITS_KEY if payload is not None else MISSES_KEY)
+    return payload
+
+
+def store_response(canonical, generation, ctx, status_code):
+    """
+    Stores a computed response under the generation it was computed for.
+    Payloads over DASHBOARD_CACHE_MAX_ITEM_BYTES are not cached; the backend's
+    MAX_ENTRIES bounds the entry count (local memory evicts least recently used).
+    """
+    payload = (ctx, status_code)
+    if len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)) > settings.DASHBOARD_CACHE_MAX_ITEM_BYTES:
+        return False
+    get_cache().set(cache_key(canonical), payload, version=generation)
+    return True
+
+
+def cache_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+        "backend": settings.CACHES[settings.DASHBOARD_CACHE_ALIAS]["BACKEND"],
+    }
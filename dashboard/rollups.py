@@ -0,0 +1,244 @@
+from django.db import connections, router, transaction
+from django.db.models import Avg, Count, FloatField, Q, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.dispatch import receiver
+
+from .models import Data, DataRollup
+from .signals import data_load_finished, data_loaded
+
+# Grouping key: the dimensions dashboard filters and groupings use most, as
+# dictionary codes, and the integer end year. Adding sector and pestle
+# multiplied the groups about fourfold (18k groups for 20k synthetic rows),
+# so those are kept as non-null counts instead and filters on them read the
+# raw rows.
+DIMENSIONS = ("country_code", "region_code", "topic_code", "end_year_value")
+COUNTED = ("sector", "pestle")
+MEASURES = ("intensity", "likelihood", "relevance")
+TOTAL_FIELDS = (
+    ("row_count",)
+    + tuple(f"{column}_count" for column in COUNTED)
+    + tuple(f"{measure}_{part}" for measure in MEASURES for part in ("sum", "count"))
+)
+# Rollup groups per INSERT ... ON CONFLICT statement on PostgreSQL.
+UPSERT_BATCH_SIZE = 1000
+
+
+def dims_key(values):
+    """
+    Key for one combination of dimension values: the integers joined with
+    dots, empty for NULL. At most 38 characters.
+    """
+    return ".".join("" if value is None else str(value) for value in values)
+
+
+def _merge(groups, dims, row_count, counts, sums):
+    """Adds one row's (or GROUP BY entry's) totals to its group."""
+    key = dims_key(dims)
+    group = groups.get(key)
+    if group is None:
+        group = groups[key] = {"dims_key": key, **dict(zip(DIMENSIONS, dims))}
+        for field in TOTAL_FIELDS:
+            group[field] = 0
+    group["row_count"] += row_count
+    for column in COUNTED:
+        group[f"{column}_count"] += counts[column]
+    for measure in MEASURES:
+        group[f"{measure}_sum"] += sums[measure] or 0
+        group[f"{measure}_count"] += counts[measure]
+
+
+def _conflict_sql(connection, rollup_model):
+    """The ON CONFLICT clause adding a group's totals to the stored ones."""
+    quote = connection.ops.quote_name
+    table = quote(rollup_model._meta.db_table)
+    updates = ", ".join(
+        f"{quote(name)} = {table}.{quote(name)} + EXCLUDED.{quote(name)}" for name in TOTAL_FIELDS
+    )
+    return f"ON CONFLICT ({quote('dims_key')}) DO UPDATE SET {updates}"
+
+
+def _upsert(connection, rollup_model, groups):
+    """
+    Adds group totals with INSERT ... ON CONFLICT (dims_key) DO UPDATE, so
+    concurrent loads touching the same groups add up instead of colliding.
+    """
+    quote = connection.ops.quote_name
+    table = quote(rollup_model._meta.db_table)
+    fields = [rollup_model._meta.get_field(name) for name in groups[0]]
+    conflict = _conflict_sql(connection, rollup_model)
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+    size = min(UPSERT_BATCH_SIZE, connection.ops.bulk_batch_size(fields, groups))
+    with connection.cursor() as cursor:
+        for start in range(0, len(groups), size):
+            chunk = groups[start:start + size]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+                f"VALUES {', '.join([row] * len(chunk))} {conflict}",
+                [field.get_db_prep_save(group[field.name], connection) for group in chunk for field in fields],
+            )
+
+
+def add_rollups(deltas, rows):
+    """Adds newly loaded rows to a {dims_key: group} dict of pending totals."""
+    for row in rows:
+        values = {name: getattr(row, name) for name in COUNTED + MEASURES}
+        _merge(
+            deltas, tuple(getattr(row, name) for name in DIMENSIONS), 1,
+            {name: int(value is not None) for name, value in values.items()}, values,
+        )
+
+
+def write_rollups(deltas, using=None, rollup_model=DataRollup):
+    """
+    Adds pending group totals to the rollup. On PostgreSQL and SQLite that is
+    one INSERT ... ON CONFLICT per UPSERT_BATCH_SIZE groups, in dims_key order
+    so concurrent loads lock shared groups in the same order; other backends
+    add the stored totals in Python and write them with
+    bulk_create(update_conflicts).
+    """
+    if not deltas:
+        return
+    using = using or router.db_for_write(rollup_model)
+    connection = connections[using]
+    groups = [deltas[key] for key in sorted(deltas)]
+    if connection.vendor in ("postgresql", "sqlite"):
+        _upsert(connection, rollup_model, groups)
+        return
+
+    manager = rollup_model.objects.using(using)
+    with transaction.atomic(using=using):
+        for rollup in manager.select_for_update().filter(dims_key__in=list(deltas)).order_by("dims_key"):
+            for field in TOTAL_FIELDS:
+                deltas[rollup.dims_key][field] += getattr(rollup, field)
+        manager.bulk_create(
+            [rollup_model(**group) for group in groups],
+            update_conflicts=True, unique_fields=["dims_key"], update_fields=list(TOTAL_FIELDS),
+        )
+
+
+def record_rollups(rows, using=None, rollup_model=DataRollup):
+    """Adds a batch of newly loaded rows to the rollup."""
+    deltas = {}
+    add_rollups(deltas, rows)
+    write_rollups(deltas, using, rollup_model)
+
+
+def _grouped(queryset):
+    """A queryset's rows grouped by DIMENSIONS, with the rollup's TOTAL_FIELDS."""
+    annotations = {"row_count": Count("pk")}
+    for column in COUNTED:
+        annotations[f"{column}_count"] = Count(column)
+    for measure in MEASURES:
+        annotations[f"{measure}_sum"] = Coalesce(Sum(measure), 0)
+        annotations[f"{measure}_count"] = Count(measure)
+    return queryset.values(*DIMENSIONS).annotate(**annotations).order_by()
+
+
+def add_grouped(groups, queryset):
+    """Adds the totals of a queryset of Data rows, from one GROUP BY, to a {dims_key: group} dict."""
+    for entry in _grouped(queryset):
+        _merge(
+            groups, tuple(entry[dimension] for dimension in DIMENSIONS), entry["row_count"],
+            {name: entry[f"{name}_count"] for name in COUNTED + MEASURES},
+            {measure: entry[f"{measure}_sum"] for measure in MEASURES},
+        )
+
+
+def write_grouped(queryset, using=None, rollup_model=DataRollup):
+    """
+    Adds the totals of a queryset of Data rows to the rollup. On PostgreSQL
+    that is one INSERT ... SELECT ... GROUP BY ... ON CONFLICT, in the
+    dims_key order write_rollups uses, so the groups never travel through
+    Python; elsewhere they go through add_grouped and write_rollups.
+    """
+    using = using or router.db_for_write(rollup_model)
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        groups = {}
+        add_grouped(groups, queryset)
+        write_rollups(groups, using, rollup_model)
+        return
+
+    quote = connection.ops.quote_name
+    names = DIMENSIONS + TOTAL_FIELDS
+    sql, params = _grouped(queryset.using(using)).query.sql_with_params()
+    # Same key as dims_key(): the values joined with dots, empty for NULL.
+    key = "concat_ws('.', {})".format(", ".join(f"coalesce({quote(name)}::text, '')" for name in DIMENSIONS))
+    columns = ", ".join(quote(rollup_model._meta.get_field(name).column) for name in names)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(rollup_model._meta.db_table)} ({quote('dims_key')}, {columns}) "
+            f"SELECT {key}, {', '.join(quote(name) for name in names)} FROM ({sql}) AS grouped "
+            f"ORDER BY {key} COLLATE \"C\" "
+            f"{_conflict_sql(connection, rollup_model)}",
+            params,
+        )
+
+
+def rebuild_rollups(using=None, model=Data, rollup_model=DataRollup):
+    """
+    Recomputes the rollup from the Data table with one GROUP BY. `model` and
+    `rollup_model` let a shadow generation's rollup be built from its rows.
+    """
+    groups = {}
+    add_grouped(groups, model.objects.using(using))
+
+    with transaction.atomic(using=using):
+        rollup_model.objects.using(using).all().delete()
+        rollup_model.objects.using(using).bulk_create(
+            [rollup_model(**group) for group in groups.values()], batch_size=1000
+        )
+
+
+def rollup_avg(measure):
+    """Average of a measure over rollup groups, NULL when no values (like AVG)."""
+    return Cast(Sum(f"{measure}_sum"), FloatField()) / NullIf(Sum(f"{measure}_count"), 0)
+
+
+def rollup_count(column):
+    """COUNT(column) over the raw rows behind a set of rollup groups."""
+    if column in COUNTED:
+        return Coalesce(Sum(f"{column}_count"), 0)
+    return Coalesce(Sum("row_count", filter=Q(**{f"{column}_code__isnull": False})), 0)
+
+
+def rollup_rows():
+    """COUNT(*) over the raw rows behind a set of rollup groups."""
+    return Coalesce(Sum("row_count"), 0)
+
+
+def average_of(measure, rollup):
+    """
+    AVG(measure) on the rollup or on raw Data rows, as a double either way.
+    PostgreSQL averages integers as numeric, which a float page cursor
+    would not compare equal to, so the seek could return its own row.
+    """
+    return rollup_avg(measure) if rollup else Cast(Avg(measure), FloatField())
+
+
+def count_of(column, rollup):
+    """COUNT(column) of a dimension column on the rollup or on raw Data rows (by its code)."""
+    return rollup_count(column) if rollup else Count(f"{column}_code")
+
+
+def rows_of(rollup):
+    """COUNT(*) on the rollup or on raw Data rows."""
+    return rollup_rows() if rollup else Count("pk")
+
+
+@receiver(data_loaded, sender=Data)
+def update_rollups_on_load(sender, rows, using, load=None, **kwargs):
+    if load is None:
+        record_rollups(rows, using)
+    else:
+        # Written once per load by write_rollups_on_load.
+        add_rollups(load.setdefault("rollups", {}), rows)
+
+
+@receiver(data_load_finished, sender=Data)
+def write_rollups_on_load(sender, using, load, **kwargs):
+    if "rows" in load:
+        # Staged loads pass their rows as a queryset instead of data_loaded batches.
+        write_grouped(load["rows"], using)
+    write_rollups(load.get("rollups"), using)
+
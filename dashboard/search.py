@@ -0,0 +1,244 @@
+import math
+import re
+import threading
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import connections, router
+from django.db.models import Case, F, Max, Q, When
+from django.db.models.sql import Query
+
+from .generation import current_generation
+from .models import Data
+
+# Derived search column, kept out of API payloads and exports.
+SEARCH_FIELDS = ("search_vector",)
+# Searched columns and their ts_rank weights (A ranks above B).
+SEARCH_WEIGHTS = (("title", "A"), ("insight", "B"))
+# The fallback index ranks with the same relative weights ts_rank uses for A and B.
+FALLBACK_WEIGHTS = {"A": 1.0, "B": 0.4}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or "
+    "that the their this to was were will with".split()
+)
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def search_vector():
+    """The weighted tsvector expression stored in Data.search_vector."""
+    config = settings.DASHBOARD_SEARCH_CONFIG
+    vector = None
+    for field, weight in SEARCH_WEIGHTS:
+        part = SearchVector(field, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def search_query(text):
+    """A web-search style query (words, "phrases", or, -exclusions)."""
+    return SearchQuery(text, config=settings.DASHBOARD_SEARCH_CONFIG, search_type="websearch")
+
+
+def uses_tsvector(using=None):
+    return connections[using or router.db_for_read(Data)].vendor == "postgresql"
+
+
+def _searchable():
+    searchable = Q()
+    for field, _ in SEARCH_WEIGHTS:
+        searchable |= Q(**{f"{field}__isnull": False})
+    return searchable
+
+
+def last_pk(model, using=None):
+    """Highest primary key in a table, read before a load."""
+    return model.objects.using(using).aggregate(last=Max("pk"))["last"] or 0
+
+
+def index_rows(model, using=None, after_pk=0):
+    """
+    Computes search_vector for rows inserted after `after_pk` (PostgreSQL
+    only). Called by bulk_load once after its last batch, as one UPDATE, so
+    COPY-loaded rows are searchable as soon as the load commits.
+    """
+    if connections[using].vendor != "postgresql":
+        return 0
+    return (
+        model.objects.using(using)
+        .filter(pk__gt=after_pk, search_vector__isnull=True)
+        .filter(_searchable())
+        .update(search_vector=search_vector())
+    )
+
+
+def search_vector_sql(connection, model):
+    """
+    The SQL and params of the value index_rows stores (NULL for rows with
+    nothing to search), over `model`'s table columns, so a set-based insert
+    can compute it.
+    """
+    query = Query(model)
+    expression = Case(When(_searchable(), then=search_vector()), output_field=SearchVectorField())
+    return query.get_compiler(connection=connection).compile(expression.resolve_expression(query))
+
+
+def build_search_index(connection, model):
+    """Creates the GIN index on search_vector for a table (PostgreSQL only)."""
+    if connection.vendor != "postgresql":
+        return
+    name = f"data_{uuid.uuid4().hex[:8]}_search"
+    with connection.schema_editor() as editor:
+        editor.add_index(model, GinIndex(fields=["search_vector"], name=name))
+
+
+def has_search_index(connection, table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return any(
+        info.get("index") and info.get("type") == "gin" and info.get("columns") == ["search_vector"]
+        for info in constraints.values()
+    )
+
+
+def backfill_search(using=None, batch_size=2000, model=Data):
+    """
+    Fills search_vector for Data rows that lack it (PostgreSQL only), for
+    manage.py rebuild_search. Migration 0013 filled the rows stored before
+    the column existed; searches assume vectors are filled.
+    """
+    using = using or router.db_for_write(model)
+    if not uses_tsvector(using):
+        return 0
+    filled = 0
+    after = 0
+    pending = model.objects.using(using).filter(search_vector__isnull=True).filter(_searchable())
+    while True:
+        pks = list(pending.filter(pk__gt=after).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        filled += model.objects.using(using).filter(pk__in=pks).update(search_vector=search_vector())
+        after = pks[-1]
+    return filled
+
+
+# Pure-Python fallback
+
+
+def tokens(text):
+    """
+    Lower-cased words without stopwords, with plural endings trimmed: a
+    rough stand-in for the PostgreSQL text search configuration.
+    """
+    words = []
+    for word in _TOKEN.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def parse_query(text):
+    """Splits a query into required and excluded terms (-word excludes)."""
+    required, excluded = [], []
+    for part in text.split():
+        target = excluded if part.startswith("-") and len(part) > 1 else required
+        target.extend(tokens(part.lstrip("-") if target is excluded else part))
+    return required, excluded
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over Data titles and insights for backends
+    without tsvector. Postings map a term to {pk: weighted term frequency};
+    matches must contain every required term and are ranked with BM25.
+    """
+
+    def __init__(self, generation, using=None):
+        self.generation = generation
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        rows = Data.objects.using(using).filter(_searchable()).values_list(
+            "pk", *(field for field, _ in SEARCH_WEIGHTS)
+        )
+        for pk, *texts in rows.iterator(chunk_size=2000):
+            frequencies = Counter()
+            length = 0
+            for (_, weight), text in zip(SEARCH_WEIGHTS, texts):
+                words = tokens(text or "")
+                length += len(words)
+                for word in words:
+                    frequencies[word] += FALLBACK_WEIGHTS[weight]
+            for word, frequency in frequencies.items():
+                self.postings[word][pk] = frequency
+            self.lengths[pk] = length
+        self.average_length = (sum(self.lengths.values()) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, text):
+        """Returns {pk: score} for the documents matching a query."""
+        required, excluded = parse_query(text)
+        if not required:
+            return {}
+        postings = [self.postings.get(term, {}) for term in dict.fromkeys(required)]
+        postings.sort(key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting.keys()
+        for term in excluded:
+            matches -= self.postings.get(term, {}).keys()
+
+        count = len(self.lengths)
+        scores = {}
+        for pk in matches:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[pk] / (self.average_length or 1))
+            score = 0.0
+            for posting in postings:
+                frequency = posting[pk]
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            scores[pk] = score
+        return scores
+
+
+def inverted_index():
+    """The process's fallback index, rebuilt when the dataset generation moves on."""
+    global _index
+    generation = current_generation()
+    with _index_lock:
+        if _index is None or _index.generation != generation:
+            _index = InvertedIndex(generation)
+        return _index
+
+
+def search_matches(text, filters):
+    """
+    Ranked matches for a search query under a CompiledFilter: a queryset of
+    Data rows annotated with `rank` on PostgreSQL, otherwise a list of
+    {"id", "rank"} dicts from the inverted index.
+    """
+    queryset = filters.apply(Data.objects.all())
+    if uses_tsvector():
+        query = search_query(text)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .values("id", "rank")
+        )
+
+    scores = inverted_index().search(text)
+    if scores and filters.spec:
+        allowed = set(queryset.values_list("pk", flat=True))
+        scores = {pk: score for pk, score in scores.items() if pk in allowed}
+    return [{"id": pk, "rank": score} for pk, score in scores.items()]
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from .dimensions import CODE_FIELDS
 from .models import Data
+from .search import SEARCH_FIELDS
+from .years import VALUE_FIELDS
 
 class DataSerializer(serializers.ModelSerializer):
     class Meta:
         model = Data
-        fields = '__all__'
\ No newline at end of file
+        exclude = CODE_FIELDS + VALUE_FIELDS + SEARCH_FIELDS
\ No newline at end of file
@@ -0,0 +1,18 @@
+from django.dispatch import Signal
+
+# Sent inside the load transaction after a batch of rows is written to the
+# live Data table. Arguments: rows (the saved Data instances), using, load (a
+# dict shared by the batches of one load, for receivers that defer work to
+# data_load_finished).
+data_loaded = Signal()
+
+# Sent inside the load transaction after the last batch of a load into the
+# live Data table. Arguments: using, load. Staged loads, which compute the
+# derived columns in SQL and send no data_loaded, put a queryset of the
+# loaded rows in load["rows"].
+data_load_finished = Signal()
+
+# Sent inside the swap transaction when a replace-mode ingest renames a new
+# generation (Data with its rollups and facets) in for the live tables, or a
+# rollback renames the previous one back. Arguments: using.
+dataset_replaced = Signal()
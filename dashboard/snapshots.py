@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: rebuilds are then not serialised between processes
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:  # optional, like the engine itself
+    np = None
+
+SNAPSHOT_FORMAT = 1
+POINTER_NAME = "CURRENT"
+LOCK_NAME = ".lock"
+META_NAME = "meta.json"
+# Snapshots kept on disk besides the current one, for workers still mapping them.
+KEEP_PREVIOUS = 1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_dir():
+    return settings.DASHBOARD_SNAPSHOT_DIR
+
+
+def _pointer_path(directory):
+    return os.path.join(directory, POINTER_NAME)
+
+
+@contextmanager
+def snapshot_lock(directory=None):
+    """
+    Exclusive lock on the snapshot directory, so one worker per host rebuilds
+    a stale snapshot while the others wait and then map its result.
+    """
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_NAME), "a") as lockfile:
+        if fcntl is not None:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+
+def current_snapshot(directory=None):
+    """Returns the path of the snapshot the pointer file names, or None."""
+    directory = directory or snapshot_dir()
+    try:
+        with open(_pointer_path(directory)) as pointer:
+            name = pointer.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(directory, name) if name else None
+
+
+def write_snapshot(engine, directory=None):
+    """
+    Writes a ColumnarEngine to a new snapshot and makes it current.
+
+    Each column is a fixed-width .npy file; meta.json holds the generation and
+    the string dictionaries the codes refer to. The snapshot is written under
+    a temporary name, renamed into place and only then published by replacing
+    the pointer file, so readers see either the old snapshot or the complete
+    new one.
+    """
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"gen-{engine.generation}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(directory, f".{name}.tmp")
+    os.makedirs(staging)
+    try:
+        fields = []
+        for field, array in engine.arrays().items():
+            np.save(os.path.join(staging, f"{field}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+            fields.append(field)
+        meta = {
+            "format": SNAPSHOT_FORMAT,
+            "generation": engine.generation,
+            "size": engine.size,
+            "fields": fields,
+            "dictionary": engine.dictionary(),
+        }
+        with open(os.path.join(staging, META_NAME), "w") as handle:
+            json.dump(meta, handle, separators=(",", ":"))
+        path = os.path.join(directory, name)
+        os.rename(staging, path)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = f"{_pointer_path(directory)}.{uuid.uuid4().hex[:8]}"
+    with open(pointer, "w") as handle:
+        handle.write(name)
+    os.replace(pointer, _pointer_path(directory))
+    prune_snapshots(directory)
+    return path
+
+
+def read_snapshot(path):
+    """
+    Opens a snapshot written by write_snapshot. The columns are memory-mapped
+    read-only, so every worker on the host shares the page cache copy.
+    Returns (generation, arrays, dictionary).
+    """
+    try:
+        with open(os.path.join(path, META_NAME)) as handle:
+            meta = json.load(handle)
+    except (FileNotFoundError, ValueError) as e:
+        raise SnapshotError(f"Unreadable snapshot {path}: {e}")
+    if meta.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Snapshot {path} has format {meta.get('format')}, expected {SNAPSHOT_FORMAT}.")
+
+    arrays = {}
+    for field in meta["fields"]:
+        array = np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r", allow_pickle=False)
+        if len(array) != meta["size"]:
+            raise SnapshotError(f"Snapshot {path} column {field} has {len(array)} rows, expected {meta['size']}.")
+        arrays[field] = array
+    return meta["generation"], arrays, meta["dictionary"]
+
+
+def prune_snapshots(directory=None, keep=KEEP_PREVIOUS):
+    """
+    Removes all but the current snapshot and the `keep` newest before it.
+    Workers still mapping a removed snapshot keep reading it until they
+    switch; the files are freed once the last mapping closes.
+    """
+    directory = directory or snapshot_dir()
+    current = current_snapshot(directory)
+    current_name = os.path.basename(current) if current else None
+    others = [
+        entry for entry in os.scandir(directory)
+        if entry.is_dir() and entry.name.startswith("gen-") and entry.name != current_name
+    ]
+    others.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    removed = []
+    for entry in others[keep:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed.append(entry.name)
+    return removed
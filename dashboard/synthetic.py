@@ -0,0 +1,139 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from .models import Data
+
+# Countries in rough order of how often they appear upstream, with their region.
+COUNTRY_REGIONS = {
+    "United States of America": "Northern America", "India": "Southern Asia", "China": "Eastern Asia",
+    "Russia": "Eastern Europe", "Saudi Arabia": "Western Asia", "Iran": "Southern Asia",
+    "Nigeria": "Western Africa", "Brazil": "South America", "Germany": "Western Europe",
+    "Japan": "Eastern Asia", "Canada": "Northern America", "Mexico": "Central America",
+    "Indonesia": "South-Eastern Asia", "Egypt": "Northern Africa", "United Kingdom": "Northern Europe",
+    "Australia": "Oceania", "Norway": "Northern Europe", "Iraq": "Western Asia",
+    "Kuwait": "Western Asia", "Venezuela": "South America",
+}
+COUNTRIES = list(COUNTRY_REGIONS)
+REGIONS = list(dict.fromkeys(COUNTRY_REGIONS.values())) + ["World", "Europe", "Central Asia"]
+SECTORS = [
+    "Energy", "Environment", "Government", "Aerospace & defence", "Manufacturing",
+    "Retail", "Financial services", "Support services", "Information Technology",
+    "Healthcare", "Food & agriculture", "Automotive", "Tourism & hospitality",
+]
+TOPICS = [
+    "oil", "gas", "market", "gdp", "war", "production", "export", "battery",
+    "biofuel", "policy", "consumption", "economy", "strategy", "economic growth",
+    "financing", "inflation", "interest rate", "climate", "power", "coal", "shale gas",
+]
+PESTLES = ["Economic", "Political", "Industries", "Technological", "Environmental", "Social", "Organization"]
+SOURCES = ["EIA", "Reuters", "OPEC", "WSJ", "Vanguard News", "SBWire", "CleanTechnica", "The Hill", "Bloomberg"]
+
+TITLE_TEMPLATES = [
+    "{Topic} outlook for {country} as {sector} demand shifts",
+    "{country} {topic} forecast revised for {year}",
+    "Why {topic} matters for {sector} in {region}",
+    "{Topic} prices and the {sector} sector",
+]
+INSIGHT_TEMPLATES = [
+    "{Topic} trends in {country}",
+    "{Sector} exposure to {topic}",
+    "{Topic} risk across {region}",
+]
+
+UPSTREAM_DATE_FORMAT = "%B, %d %Y %H:%M:%S"
+DEFAULT_SKEW = 1.2
+
+
+def _weights(values, skew):
+    """Zipf-like weights so the first few values dominate."""
+    return [1 / (rank + 1) ** skew for rank in range(len(values))]
+
+
+def _skewed(rng, values, skew=DEFAULT_SKEW):
+    """Picks from values with a Zipf-like skew so a few values dominate."""
+    return rng.choices(values, weights=_weights(values, skew))[0]
+
+
+def generate_values(count, seed=0, blank_ratio=0.1, skew=DEFAULT_SKEW):
+    """
+    Yields synthetic Data field values: aware datetimes, ints, and None for
+    missing values. Countries, topics, sectors and the other dimensions
+    follow a Zipf-like skew (higher `skew`, fewer dominant values), regions
+    mostly follow the country, and titles and insights are short sentences
+    built from the row's dimensions so text search has something to rank.
+    """
+    rng = random.Random(seed)
+    epoch = datetime(2016, 1, 1, tzinfo=timezone.utc)
+    # Cumulative weights once, rather than per choice.
+    cumulative = {}
+    for name, values in (("country", COUNTRIES), ("region", REGIONS), ("sector", SECTORS),
+                         ("topic", TOPICS), ("pestle", PESTLES), ("source", SOURCES)):
+        total = 0.0
+        cumulative[name] = []
+        for weight in _weights(values, skew):
+            total += weight
+            cumulative[name].append(total)
+
+    def pick(name, values):
+        return rng.choices(values, cum_weights=cumulative[name])[0]
+
+    def maybe(value):
+        return None if rng.random() < blank_ratio else value
+
+    for index in range(count):
+        added = epoch + timedelta(minutes=rng.randrange(0, 60 * 24 * 365 * 2))
+        published = added - timedelta(days=rng.randrange(0, 30))
+        start_year = rng.randrange(2010, 2030)
+        end_year = start_year + rng.randrange(0, 30)
+        country = pick("country", COUNTRIES)
+        region = COUNTRY_REGIONS[country] if rng.random() < 0.9 else pick("region", REGIONS)
+        topic = pick("topic", TOPICS)
+        sector = pick("sector", SECTORS)
+        words = {
+            "topic": topic, "Topic": topic.capitalize(), "country": country, "region": region,
+            "sector": sector.lower(), "Sector": sector, "year": end_year,
+        }
+        yield {
+            "end_year": maybe(str(end_year)),
+            "intensity": maybe(rng.randrange(1, 49)),
+            "sector": maybe(sector),
+            "topic": maybe(topic),
+            "insight": rng.choice(INSIGHT_TEMPLATES).format(**words),
+            "url": f"https://example.com/articles/{seed}/{index}",
+            "region": maybe(region),
+            "start_year": maybe(str(start_year)),
+            "impact": maybe(str(rng.randrange(1, 5))),
+            "added": added,
+            "published": maybe(published),
+            "country": maybe(country),
+            "relevance": maybe(rng.randrange(1, 7)),
+            "pestle": maybe(pick("pestle", PESTLES)),
+            "source": pick("source", SOURCES),
+            "title": rng.choice(TITLE_TEMPLATES).format(**words),
+            "likelihood": maybe(rng.randrange(1, 5)),
+        }
+
+
+def generate_records(count, seed=0, blank_ratio=0.1, skew=DEFAULT_SKEW):
+    """
+    Yields synthetic records in the upstream export format: dates as
+    "Month, DD YYYY HH:MM:SS" and missing values as empty strings.
+    """
+    for values in generate_values(count, seed, blank_ratio, skew):
+        record = {}
+        for field, value in values.items():
+            if value is None:
+                value = ""
+            elif isinstance(value, datetime):
+                value = value.strftime(UPSTREAM_DATE_FORMAT)
+            record[field] = value
+        yield record
+
+
+def generate_rows(count, seed=0, blank_ratio=0.1, skew=DEFAULT_SKEW, model=Data):
+    """
+    Yields unsaved rows for bulk_load, skipping the upstream format. `model`
+    may be a shadow copy of Data (see tables.table_model).
+    """
+    for values in generate_values(count, seed, blank_ratio, skew):
+        yield model(**values)
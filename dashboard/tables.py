@@ -0,0 +1,28 @@
+import uuid
+
+from django.apps.registry import Apps
+from django.db import models
+
+from .models import Data
+
+
+def table_model(table, with_indexes=True, fields=None, model=Data):
+    """
+    Builds an unregistered copy of a model (Data by default) bound to another
+    table, so the ORM, schema editor and loaders can work on shadow generations.
+    `fields` limits the copy to some columns (the primary key is always kept).
+    Without indexes, unique columns are copied as plain columns too; their
+    constraints are added under table-specific names by datasets._build_unique.
+    """
+    attrs = {
+        "__module__": __name__,
+        "Meta": type("Meta", (), {"db_table": table, "app_label": model._meta.app_label, "apps": Apps()}),
+    }
+    for field in model._meta.local_fields:
+        if fields is not None and not field.primary_key and field.name not in fields:
+            continue
+        name, path, args, kwargs = field.deconstruct()
+        if not with_indexes and not field.primary_key:
+            kwargs.update(db_index=False, unique=False)
+        attrs[field.name] = field.__class__(*args, **kwargs)
+    return type(f"{model.__name__}_{uuid.uuid4().hex[:8]}", (models.Model,), attrs)
@@ -1,3 +1,1170 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Max, Min, Q
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse, QueryDict, StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from . import columnar, middleware, renderers
+from .datasets import DERIVED_MODELS, replace_dataset_with, rollback_dataset
+from .exports import EXPORT_FIELDS
+from .facets import RANGE_COLUMNS, facet_catalogue, rebuild_facets
+from .filters import DataFilter, compile_filters
+from .generation import bump_generation, current_generation
+from .jobs import STALE_JOB_ERROR, fail_stale_jobs
+from .ingest import IngestError, iter_records, normalise_record
+from .loaders import bulk_load, content_hash
+from .models import Data, DataRollup, FacetRange, FacetValue, IngestJob, UploadSession
+from .middleware import CompressionMiddleware, choose_encoding
+from .pagination import Keyset, encode_cursor
+from .response_cache import cache_stats, canonical_request, get_cache
+from .rollups import rebuild_rollups
+from .search import has_search_index
+from .serializers import DataSerializer
+from .synthetic import generate_records, generate_rows
+from .uploads import expire_upload_sessions, open_upload_session
+from .validators import DataValidator
+from .views import DashboardView
+
+SEED_ROWS = 3000
+REGION = "Southern Asia"
+
+
+def canonical(value, ordered=False):
+    """
+    Float-tolerant form of a response. Lists are sorted unless `ordered`,
+    for results whose order the action does not define.
+    """
+    if isinstance(value, dict):
+        return {key: canonical(item, ordered) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [canonical(item, ordered) for item in value]
+        return items if ordered else sorted(items, key=repr)
+    if isinstance(value, float):
+        return round(value, 9)
+    return value
+
+
+class DashboardActionTestCase(TestCase):
+    """Seeds a synthetic dataset and calls DashboardView actions directly."""
+
+    @classmethod
+    def setUpTestData(cls):
+        bulk_load(generate_rows(SEED_ROWS, seed=11))
+
+    def run_action(self, action, **params):
+        request = Request(APIRequestFactory().get("/data/dashboard/", {"action": action, **params}))
+        view = DashboardView()
+        view.filters = None
+        view.base_model = None
+        getattr(view, action)(request)
+        self.assertEqual(view.status, status.HTTP_200_OK, view.ctx)
+        return view.ctx
+
+
+def legacy_overview(queryset):
+    """getOverview's fields as the original per-field queries computed them."""
+    return {
+        "avg_intensity": queryset.aggregate(value=Avg("intensity"))["value"],
+        "avg_likelihood": queryset.aggregate(value=Avg("likelihood"))["value"],
+        "avg_relevance": queryset.aggregate(value=Avg("relevance"))["value"],
+        "end_year_distribution": list(queryset.values("end_year").annotate(count=Count("end_year"))),
+        "country_distribution": list(queryset.values("country").annotate(count=Count("country"))),
+        "topic_distribution": list(queryset.values("topic").annotate(count=Count("topic"))),
+        "region_distribution": list(queryset.values("region").annotate(count=Count("region"))),
+        "total_topic": queryset.exclude(topic="").values("topic").distinct().count(),
+        "total_country": queryset.exclude(country="").values("country").distinct().count(),
+        "total_region": queryset.exclude(region="").values("region").distinct().count(),
+    }
+
+
+def legacy_filter():
+    values = {
+        column: list(Data.objects.exclude(**{column: ""}).values_list(column, flat=True).distinct())
+        for column in ("end_year", "topic", "region", "country", "sector", "pestle", "source")
+    }
+    ranges = {
+        f"{column}_range": {
+            "min": Data.objects.aggregate(value=Min(column))["value"],
+            "max": Data.objects.aggregate(value=Max(column))["value"],
+        }
+        for column in ("intensity", "likelihood", "relevance", "impact")
+    }
+    return {
+        "start_years": list(Data.objects.exclude(start_year="").values_list("start_year", flat=True).distinct()),
+        "end_years": values["end_year"],
+        **ranges,
+        **values,
+        "swot": ["Strength", "Weakness", "Opportunity", "Threat"],
+    }
+
+
+def legacy_intensity(queryset):
+    return {
+        "data": list(queryset.values("country").annotate(avg_intensity=Avg("intensity"))),
+        "total_count": queryset.count(),
+    }
+
+
+def legacy_topic_distribution(queryset):
+    return {
+        "data": list(queryset.values("topic").annotate(count=Count("topic"))),
+        "total_topics": queryset.values("topic").distinct().count(),
+    }
+
+
+def legacy_trends(queryset):
+    rows = (
+        queryset.exclude(end_year__isnull=True).exclude(end_year="")
+        .values("end_year")
+        .annotate(avg_intensity=Avg("intensity"), avg_likelihood=Avg("likelihood"), avg_relevance=Avg("relevance"))
+        .order_by("end_year")
+    )
+    return [
+        {"year": int(row["end_year"]), "avg_intensity": row["avg_intensity"],
+         "avg_likelihood": row["avg_likelihood"], "avg_relevance": row["avg_relevance"]}
+        for row in rows
+    ]
+
+
+def legacy_world_map(queryset):
+    return list(
+        queryset.exclude(country__isnull=True).exclude(country="")
+        .values("country")
+        .annotate(
+            total_events=Count("country"),
+            avg_intensity=Avg("intensity"),
+            avg_likelihood=Avg("likelihood"),
+            most_common_sector=Count("sector"),
+            most_common_topic=Count("topic"),
+            pestle_distribution=Count("pestle"),
+        )
+    )
+
+
+def legacy_bubble_chart(queryset):
+    return list(
+        queryset.exclude(intensity__isnull=True).exclude(relevance__isnull=True)
+        .values("topic", "sector", "country")
+        .annotate(
+            avg_intensity=Avg("intensity"),
+            avg_relevance=Avg("relevance"),
+            avg_likelihood=Avg("likelihood"),
+            event_count=Count("id"),
+        )
+    )
+
+
+class DashboardQueryTests(DashboardActionTestCase):
+    """
+    The rewritten actions return what the original one-query-per-field code
+    did, in a fixed, small number of queries. Actions that group on dimension
+    codes spend one of them decoding the names.
+    """
+
+    def cases(self):
+        """(params, matching raw rows, dimension code lookups the filter costs)."""
+        return (
+            ({}, Data.objects.all(), 0),
+            ({"region": REGION}, Data.objects.filter(region=REGION), 1),
+        )
+
+    def assertSameResult(self, actual, expected):
+        self.assertEqual(canonical(actual), canonical(expected))
+
+    def test_overview(self):
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(2 + lookups):
+                ctx = self.run_action("getOverview", **params)
+            self.assertSameResult(ctx, legacy_overview(queryset))
+
+    def test_filter(self):
+        with self.assertNumQueries(2):
+            ctx = self.run_action("getFilter")
+        self.assertSameResult(ctx, legacy_filter())
+
+    def test_intensity(self):
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(3 + lookups):
+                ctx = self.run_action("getIntensity", records_number=1000, **params)
+            self.assertSameResult({"data": ctx["data"], "total_count": ctx["total_count"]}, legacy_intensity(queryset))
+
+    def test_topic_distribution(self):
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(3 + lookups):
+                ctx = self.run_action("getTopicDistribution", **params)
+            self.assertSameResult(
+                {"data": ctx["data"], "total_topics": ctx["total_topics"]}, legacy_topic_distribution(queryset),
+            )
+
+    def test_trends_over_years(self):
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(1 + lookups):
+                ctx = self.run_action("getTrendsOverYears", **params)
+            self.assertEqual(canonical(ctx["data"], ordered=True), canonical(legacy_trends(queryset), ordered=True))
+
+    def test_world_map(self):
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(2 + lookups):
+                ctx = self.run_action("getWorldMapData", **params)
+            self.assertSameResult(ctx["data"], legacy_world_map(queryset))
+
+    def test_bubble_chart(self):
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(2 + lookups):
+                ctx = self.run_action("getBubbleChartData", **params)
+            self.assertSameResult(ctx["data"], legacy_bubble_chart(queryset))
+
+    def test_batch(self):
+        actions = "getOverview,getTopicDistribution,getTrendsOverYears,getWorldMapData"
+        for params, queryset, lookups in self.cases():
+            with self.subTest(params=params), self.assertNumQueries(8 + lookups):
+                ctx = self.run_action("getBatch", actions=actions, **params)
+            data = ctx["data"]
+            self.assertSameResult(data["getOverview"], legacy_overview(queryset))
+            self.assertSameResult(data["getWorldMapData"]["data"], legacy_world_map(queryset))
+            self.assertEqual(
+                canonical(data["getTrendsOverYears"]["data"], ordered=True),
+                canonical(legacy_trends(queryset), ordered=True),
+            )
+
+
+@skipIf(connection.vendor == "sqlite", "SQLite plans are not checked; the indexes target PostgreSQL.")
+class FilterIndexTests(DashboardActionTestCase):
+    """compile_filters querysets are answered from the lookup and composite indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Without statistics the planner ties between indexes sharing a
+        # column and picks either, depending on whether autovacuum got there.
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(Data._meta.db_table)}")
+
+    def plan(self, params):
+        queryset = compile_filters(params).apply(Data.objects.all()).values("id")
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The seeded table is small enough that a sequential scan would
+            # win on cost; rule it out so the plan shows which index fits.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def test_dimension_filters_use_code_indexes(self):
+        for params in ({"country": "India"}, {"pestle": "economic"}, {"topic": "oil", "match": "exact"},
+                       {"topic": "gas", "match": "contains"}, {"swot": "Strength"}):
+            with self.subTest(params=params):
+                plan = self.plan(params)
+                self.assertIn("Index", plan)
+                self.assertNotIn("Seq Scan", plan)
+
+    def test_common_combinations_use_composite_indexes(self):
+        for params, index in (
+            ({"country": "India", "end_year_min": "2030"}, "data_country_year_idx"),
+            ({"topic": "oil", "end_year": "2035"}, "data_topic_year_idx"),
+            ({"region": REGION, "country": "India"}, "data_region_country_idx"),
+            ({"sector": "Energy", "topic": "oil"}, "data_sector_topic_idx"),
+        ):
+            with self.subTest(params=params):
+                self.assertIn(index, self.plan(params))
+
+
+@skipIf(columnar.np is None, "NumPy is not installed.")
+class ColumnarEngineTests(DashboardActionTestCase):
+    """The numpy engine returns exactly what the ORM path does, in the same order."""
+
+    actions = (
+        ("getOverview", {}),
+        ("getIntensity", {"records_number": "1000"}),
+        ("getIntensity", {"records_number": "3", "page": "2"}),
+        ("getTopicDistribution", {}),
+        ("getTopicDistribution", {"records_number": "4"}),
+        ("getTrendsOverYears", {}),
+        ("getWorldMapData", {}),
+        ("getWorldMapData", {"records_number": "4"}),
+        ("getBubbleChartData", {}),
+    )
+    filter_sets = (
+        {},
+        {"region": REGION},
+        {"sector": "Energy", "intensity_min": "10"},
+        {"topic": "gas", "match": "contains", "end_year_min": "2030"},
+    )
+
+    def setUp(self):
+        columnar._engine = None
+
+    def tearDown(self):
+        columnar._engine = None
+
+    @override_settings(DASHBOARD_SNAPSHOT_DIR="")
+    def test_actions_match_orm(self):
+        columnar._engine = columnar.load_engine(current_generation())
+        for filters in self.filter_sets:
+            for action, params in self.actions:
+                with self.subTest(action=action, filters=filters):
+                    with override_settings(DASHBOARD_ENGINE="orm"):
+                        expected = self.run_action(action, **params, **filters)
+                    with override_settings(DASHBOARD_ENGINE="numpy"):
+                        actual = self.run_action(action, **params, **filters)
+                    self.assertEqual(canonical(actual, ordered=True), canonical(expected, ordered=True))
+
+    @override_settings(DASHBOARD_ENGINE="numpy", DASHBOARD_SNAPSHOT_DIR="")
+    def test_stale_engine_uses_orm_while_rebuilding(self):
+        columnar._engine = columnar.load_engine(current_generation())
+        bump_generation()
+        with mock.patch.object(columnar, "schedule_refresh") as schedule_refresh:
+            self.assertIsNone(columnar.columnar_engine())
+        schedule_refresh.assert_called_once_with()
+
+        # What the refresh thread runs; in a test the connection must stay open.
+        with mock.patch.object(columnar, "close_old_connections"):
+            columnar.refresh_engine()
+        self.assertEqual(columnar.columnar_engine().generation, current_generation())
+
+
+class SearchResultsTests(DashboardActionTestCase):
+    def test_ranked_matches(self):
+        ctx = self.run_action("getSearchResults", q="oil outlook", records_number="50")
+        ranks = [row["rank"] for row in ctx["data"]]
+        self.assertTrue(ranks)
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertTrue(all("oil" in (row["title"] + " " + row["insight"]).lower() for row in ctx["data"]))
+
+
+class KeysetTests(SimpleTestCase):
+    keyset = Keyset(("score", True), ("code", False))
+    rows = [
+        {"score": 2.0, "code": 3}, {"score": None, "code": 1}, {"score": 2.0, "code": None},
+        {"score": 5.0, "code": 2}, {"score": 2.0, "code": 1}, {"score": None, "code": None},
+    ]
+
+    def walk(self, size):
+        pages, cursor = [], None
+        while True:
+            page, cursor = self.keyset.page(list(self.rows), size, cursor)
+            pages.append(page)
+            if cursor is None:
+                return pages
+
+    def test_order_puts_nulls_below_every_value(self):
+        page, _ = self.keyset.page(list(self.rows), len(self.rows))
+        self.assertEqual([(row["score"], row["code"]) for row in page], [
+            (5.0, 2), (2.0, None), (2.0, 1), (2.0, 3), (None, None), (None, 1),
+        ])
+
+    def test_pages_split_ties_and_nulls(self):
+        full, _ = self.keyset.page(list(self.rows), len(self.rows))
+        for size in (1, 2, 4):
+            with self.subTest(size=size):
+                pages = self.walk(size)
+                self.assertEqual([row for page in pages for row in page], full)
+                self.assertTrue(all(0 < len(page) <= size for page in pages))
+
+    def test_seek_q_after_null_keys(self):
+        self.assertIsNone(Keyset(("score", True)).seek_q([None]))
+        self.assertEqual(
+            str(self.keyset.seek_q([None, None])), str(Q(score__isnull=True) & Q(code__isnull=False)),
+        )
+
+    def test_tampered_cursors(self):
+        for token in ("not a token", encode_cursor([1.0]), encode_cursor(["high", 1]), encode_cursor([1.0, [2]])):
+            with self.subTest(token=token), self.assertRaises(ValueError):
+                self.keyset.page(list(self.rows), 2, token)
+
+
+class PaginationTests(DashboardActionTestCase):
+    """
+    Cursor paging of getIntensity, getTopicDistribution and getWorldMapData,
+    answered from the rollup table (no filter) and from the raw rows (a
+    sector filter). Extra rows add tied averages and a NULL average.
+    """
+
+    paths = ({}, {"sector": "Energy"})
+    actions = ("getIntensity", "getTopicDistribution", "getWorldMapData")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        bulk_load([
+            Data(country=country, region="Oceania", sector="Energy", topic=topic, intensity=intensity,
+                 title=f"{country} {topic}", insight=f"{country} {topic}")
+            for country, topic, intensity in (
+                ("Tieland", "tie-a", 7), ("Evenland", "tie-b", 7), ("Nulland", "tie-c", None),
+            )
+        ])
+
+    def test_paths(self):
+        self.assertTrue(compile_filters(self.paths[0]).rollup)
+        self.assertFalse(compile_filters(self.paths[1]).rollup)
+
+    def walk(self, action, size, **params):
+        rows, cursor = [], None
+        # Bounded, so a cursor that returns its own row fails instead of looping.
+        for _ in range(100):
+            page = {"cursor": cursor} if cursor else {}
+            ctx = self.run_action(action, records_number=size, **page, **params)
+            self.assertLessEqual(len(ctx["data"]), size)
+            rows += ctx["data"]
+            cursor = ctx["next_cursor"]
+            if cursor is None:
+                return rows
+        self.fail(f"{action} pages did not end")
+
+    def test_walking_every_page_reproduces_the_list(self):
+        for params in self.paths:
+            for action in self.actions:
+                full = self.run_action(action, records_number=1000, **params)["data"]
+                for size in (1, 3):
+                    with self.subTest(params=params, action=action, size=size):
+                        self.assertEqual(self.walk(action, size, **params), full)
+
+    def test_ties_and_nulls(self):
+        for params in self.paths:
+            with self.subTest(params=params):
+                rows = self.walk("getIntensity", 2, **params)
+                averages = {row["country"]: row["avg_intensity"] for row in rows}
+                self.assertEqual(averages["Tieland"], averages["Evenland"])
+                self.assertIsNone(averages["Nulland"])
+                present = [row["avg_intensity"] for row in rows if row["avg_intensity"] is not None]
+                self.assertEqual(present, sorted(present, reverse=True))
+                self.assertTrue(all(row["avg_intensity"] is None for row in rows[len(present):]))
+                self.assertEqual(len({row["country"] for row in rows}), len(rows))
+
+    def test_unpaged_lists_stay_whole(self):
+        for action in ("getTopicDistribution", "getWorldMapData"):
+            with self.subTest(action=action):
+                ctx = self.run_action(action)
+                self.assertNotIn("next_cursor", ctx)
+                self.assertEqual(ctx["data"], self.run_action(action, records_number=1000)["data"])
+
+    def test_legacy_page_parameter(self):
+        for params in self.paths:
+            for action in self.actions:
+                with self.subTest(params=params, action=action):
+                    full = self.run_action(action, records_number=1000, **params)["data"]
+                    self.assertEqual(self.run_action(action, records_number=3, page=2, **params)["data"], full[3:6])
+
+    def test_include_total_defaults_to_first_page_only(self):
+        for params in self.paths:
+            with self.subTest(params=params):
+                first = self.run_action("getIntensity", records_number=3, **params)
+                self.assertIn("total_count", first)
+                following = {"records_number": 3, "cursor": first["next_cursor"], **params}
+                self.assertNotIn("total_count", self.run_action("getIntensity", **following))
+                self.assertEqual(
+                    self.run_action("getIntensity", include_total="true", **following)["total_count"],
+                    first["total_count"],
+                )
+                self.assertNotIn("total_count", self.run_action("getIntensity", include_total="false", **params))
+
+    def test_invalid_cursors_are_rejected(self):
+        tokens = ("not a token", encode_cursor([1]), encode_cursor(["high", 1]), encode_cursor([1, "x"]))
+        for params in self.paths:
+            for action in self.actions:
+                for token in tokens:
+                    with self.subTest(params=params, action=action, token=token):
+                        response = self.client.get(
+                            "/data/dashboard/", {"action": action, "records_number": 3, "cursor": token, **params},
+                        )
+                        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                        self.assertIn("cursor is not a valid page token", response.json()["message"])
+
+
+class ResponseCacheTests(DashboardActionTestCase):
+    """Dashboard responses are cached per canonical request and dataset generation."""
+
+    def setUp(self):
+        get_cache().clear()
+
+    def get(self, **params):
+        response = self.client.get("/data/dashboard/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_repeat_call_is_a_hit(self):
+        first = self.get(action="getIntensity", region=REGION)
+        self.assertEqual(cache_stats()["misses"], 1)
+        # Only the generation is read.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(action="getIntensity", region=REGION), first)
+        self.assertEqual(cache_stats()["hits"], 1)
+
+    def test_bulk_load_invalidates(self):
+        before = self.get(action="getIntensity")
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_load(generate_rows(25, seed=12))
+        after = self.get(action="getIntensity")
+        self.assertEqual(cache_stats()["misses"], 2)
+        self.assertEqual(after["total_count"], before["total_count"] + 25)
+
+    def test_parameter_order_does_not_change_the_key(self):
+        self.assertEqual(
+            canonical_request("getIntensity", QueryDict("region=Oceania&records_number=5&sector=Energy")),
+            canonical_request("getIntensity", QueryDict("sector=Energy&records_number=5&region=Oceania")),
+        )
+        first = self.get(action="getIntensity", region=REGION, records_number=5, sector="Energy")
+        second = self.get(sector="Energy", records_number=5, action="getIntensity", region=REGION)
+        self.assertEqual(second, first)
+        stats = cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_batch_matches_individual_actions(self):
+        actions = (
+            "getFilter", "getOverview", "getIntensity", "getTopicDistribution",
+            "getTrendsOverYears", "getWorldMapData", "getBubbleChartData",
+        )
+        for params in ({}, {"region": REGION}, {"sector": "Energy"}):
+            with self.subTest(params=params):
+                batch = self.get(action="getBatch", actions=",".join(actions), **params)
+                for action in actions:
+                    self.assertEqual(batch["status"][action], status.HTTP_200_OK)
+                    self.assertEqual(
+                        canonical(batch["data"][action], ordered=True),
+                        canonical(self.get(action=action, **params), ordered=True),
+                        action,
+                    )
+
+
+def vary(response):
+    return [name.strip() for name in response.get("Vary", "").split(",")]
+
+
+class ETagTests(DashboardActionTestCase):
+    """Conditional GETs of dashboard actions."""
+
+    params = {"action": "getWorldMapData"}
+
+    def setUp(self):
+        get_cache().clear()
+
+    def get(self, **headers):
+        return self.client.get("/data/dashboard/", self.params, headers=headers)
+
+    def test_matching_tag_is_not_modified(self):
+        for params in (self.params, {"action": "getIntensity", "region": REGION}):
+            with self.subTest(params=params):
+                response = self.client.get("/data/dashboard/", params)
+                etag = response["ETag"]
+                self.assertIn("Accept", vary(response))
+                with self.assertNumQueries(1):
+                    not_modified = self.client.get("/data/dashboard/", params, headers={"if_none_match": etag})
+                self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(not_modified.content, b"")
+                self.assertEqual(not_modified["ETag"], etag)
+                self.assertIn("Accept", vary(not_modified))
+
+    def test_tag_changes_after_ingest(self):
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_load(generate_rows(10, seed=13))
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_tag_covers_the_media_type(self):
+        plain = self.get(accept="application/json")
+        indented = self.get(accept="application/json; indent=4")
+        self.assertNotEqual(plain.content, indented.content)
+        self.assertNotEqual(plain["ETag"], indented["ETag"])
+        response = self.get(accept="application/json; indent=4", if_none_match=plain["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_weak_tag_matches_after_compression(self):
+        compressed = self.get(accept_encoding="gzip")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        etag = compressed["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(etag, "W/" + self.get()["ETag"])
+        response = self.get(accept_encoding="gzip", if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_BYTES=200)
+class CompressionTests(TestCase):
+    body = b'{"country":"India","avg_intensity":12.5},' * 20
+
+    def respond(self, response, accept_encoding="gzip"):
+        request = APIRequestFactory().get("/data/dashboard/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_threshold(self):
+        small = self.respond(HttpResponse(self.body[:199]))
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertNotIn("Accept-Encoding", vary(small))
+        large = self.respond(HttpResponse(self.body[:200]))
+        self.assertEqual(large["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", vary(large))
+        self.assertEqual(gzip.decompress(large.content), self.body[:200])
+        self.assertEqual(large["Content-Length"], str(len(large.content)))
+
+    def test_accept_encoding_q_values(self):
+        br = "br" if middleware.brotli is not None else "gzip"
+        for header, expected in (
+            ("", None),
+            ("gzip", "gzip"),
+            ("GZIP;q=0.5", "gzip"),
+            ("gzip;q=0", None),
+            ("gzip;q=0.0, identity", None),
+            ("gzip;q=oops", None),
+            ("identity, *;q=0.2", br),
+            ("*;q=1, gzip;q=0", "br" if middleware.brotli is not None else None),
+            ("gzip;q=1, br;q=0.5", "gzip"),
+            ("gzip;q=0.5, br;q=0.9", br),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(choose_encoding(header), expected)
+        refused = self.respond(HttpResponse(self.body), accept_encoding="gzip;q=0")
+        self.assertFalse(refused.has_header("Content-Encoding"))
+        self.assertEqual(refused.content, self.body)
+
+    def test_etag_weakening(self):
+        response = HttpResponse(self.body)
+        response["ETag"] = '"7-abc"'
+        self.assertEqual(self.respond(response)["ETag"], 'W/"7-abc"')
+
+        weak = HttpResponse(self.body)
+        weak["ETag"] = 'W/"7-abc"'
+        self.assertEqual(self.respond(weak)["ETag"], 'W/"7-abc"')
+
+        # Sent as it is when compression would not shrink it: the tag stays strong.
+        incompressible = HttpResponse(os.urandom(400))
+        incompressible["ETag"] = '"7-abc"'
+        response = self.respond(incompressible)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["ETag"], '"7-abc"')
+
+    def test_streaming_is_always_compressed(self):
+        response = self.respond(StreamingHttpResponse(iter([b"a" * 10, b"b" * 10])))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), b"a" * 10 + b"b" * 10)
+
+    def test_export_streams_compressed(self):
+        bulk_load(generate_rows(300, seed=14))
+        response = self.client.get("/data/export/", {"format": "ndjson"}, headers={"accept_encoding": "gzip"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 300)
+        self.assertEqual({json.loads(line)["id"] for line in lines}, set(Data.objects.values_list("id", flat=True)))
+
+
+@skipIf(renderers.orjson is None, "orjson is not installed; FastJSONRenderer is the stock renderer.")
+class RendererParityTests(DashboardActionTestCase):
+    """FastJSONRenderer writes the bytes the stock JSONRenderer does."""
+
+    def assertSameBytes(self, data):
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_scalars(self):
+        self.assertSameBytes({
+            "utc": datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+            "offset": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+            "naive": datetime(2024, 1, 2, 3, 4, 5, 500),
+            "date": date(2024, 1, 2),
+            "decimals": [Decimal("1.10"), Decimal("-0.5"), Decimal("12345.678"), Decimal("0")],
+            "floats": [0.1 + 0.2, 1.5, -3.0, 1e15],
+            "text": "Côte d\u2019Ivoire \u2028 \u2029 \"quoted\" </script>",
+            "empty": [None, [], {}],
+        })
+
+    def test_rows_and_actions(self):
+        self.assertSameBytes(DataSerializer(Data.objects.order_by("id")[:200], many=True).data)
+        for action in ("getOverview", "getIntensity", "getTopicDistribution", "getTrendsOverYears",
+                       "getWorldMapData", "getBubbleChartData", "getFilter"):
+            with self.subTest(action=action):
+                self.assertSameBytes(self.run_action(action))
+
+
+@override_settings(DATA_EXPORT_CHUNK_SIZE=64)
+class ExportTests(TestCase):
+    """/data/export/ streams every filtered row, in several chunks here."""
+
+    filters = {"sector": "energy", "intensity_min": "5"}
+
+    @classmethod
+    def setUpTestData(cls):
+        bulk_load(generate_rows(600, seed=15))
+
+    def export(self, **params):
+        return self.client.get("/data/export/", params)
+
+    def expected(self, fields=EXPORT_FIELDS):
+        rows = DataFilter(self.filters, queryset=Data.objects.all()).qs.order_by("pk")
+        return [
+            {name: row[name] for name in fields} for row in DataSerializer(rows, many=True).data
+        ]
+
+    def assertHeaders(self, response, media_type, extension):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], f"{media_type}; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], f'attachment; filename="data-export.{extension}"')
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+    def test_ndjson(self):
+        response = self.export(format="ndjson", **self.filters)
+        self.assertHeaders(response, "application/x-ndjson", "ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        expected = self.expected()
+        self.assertGreater(len(expected), 128)
+        self.assertEqual(rows, expected)
+
+    def test_csv(self):
+        response = self.export(format="csv", fields="id,title,intensity,published", **self.filters)
+        self.assertHeaders(response, "text/csv", "csv")
+        lines = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8"))))
+        self.assertEqual(lines[0], ["id", "title", "intensity", "published"])
+        expected = self.expected(("id", "title", "intensity", "published"))
+        self.assertEqual(len(lines) - 1, len(expected))
+        for line, row in zip(lines[1:], expected):
+            self.assertEqual(line, ["" if value is None else str(value) for value in row.values()])
+
+    def test_default_format_and_fields(self):
+        response = self.export()
+        self.assertHeaders(response, "application/x-ndjson", "ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), Data.objects.count())
+        self.assertEqual(list(rows[0]), list(EXPORT_FIELDS))
+
+    def test_bad_fields_are_rejected(self):
+        for fields in ("nope", "id,nope", " , ", "country_code", "search_vector"):
+            for export_format in ("ndjson", "csv"):
+                with self.subTest(fields=fields, format=export_format):
+                    response = self.export(format=export_format, fields=fields)
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertFalse(response.streaming)
+                    self.assertIn("fields must be", response.content.decode("utf-8"))
+
+    def test_bad_filters_are_rejected(self):
+        response = self.export(format="csv", intensity_min="high")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ColumnarFormatTests(DashboardActionTestCase):
+    """?format=columnar holds the same data as the row format, one array per field."""
+
+    cases = (
+        ("getWorldMapData", {}),
+        ("getWorldMapData", {"region": REGION}),
+        ("getWorldMapData", {"sector": "Energy", "records_number": "4", "page": "2"}),
+        ("getBubbleChartData", {}),
+        ("getBubbleChartData", {"sector": "Energy"}),
+    )
+
+    def setUp(self):
+        get_cache().clear()
+        columnar._engine = None
+
+    def tearDown(self):
+        columnar._engine = None
+
+    def get(self, **params):
+        response = self.client.get("/data/dashboard/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.json()
+
+    def assertRoundTrip(self, action, params):
+        rows = self.get(action=action, **params)["data"]
+        columns = self.get(action=action, format="columnar", **params)["data"]
+        self.assertTrue(rows)
+        self.assertEqual(list(columns), list(rows[0]))
+        self.assertEqual(len({len(values) for values in columns.values()}), 1)
+        self.assertEqual([dict(zip(columns, values)) for values in zip(*columns.values())], rows)
+
+    def test_round_trip(self):
+        for action, params in self.cases:
+            with self.subTest(action=action, params=params):
+                self.assertRoundTrip(action, params)
+
+    @skipIf(columnar.np is None, "NumPy is not installed.")
+    @override_settings(DASHBOARD_ENGINE="numpy", DASHBOARD_SNAPSHOT_DIR="")
+    def test_round_trip_on_the_engine(self):
+        columnar._engine = columnar.load_engine(current_generation())
+        for action, params in self.cases:
+            with self.subTest(action=action, params=params):
+                self.assertRoundTrip(action, params)
+
+    def test_unsupported_actions(self):
+        for action in ("getIntensity", "getOverview", "getFilter", "getBatch", "getSearchResults"):
+            with self.subTest(action=action):
+                response = self.client.get("/data/dashboard/", {"action": action, "format": "columnar"})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertIn("only supported by getBubbleChartData, getWorldMapData", response.json()["message"])
+
+    @skipIf(renderers.pa is not None, "pyarrow is installed.")
+    def test_arrow_without_pyarrow(self):
+        response = self.client.get("/data/dashboard/", {"action": "getWorldMapData", "format": "arrow"})
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.assertIn("needs pyarrow", response.json()["message"])
+
+
+@skipIf(connection.vendor == "sqlite", "Staged loads run on PostgreSQL only.")
+class StagedLoadTests(TestCase):
+    """bulk_load's staged COPY path computes in SQL what the Python path does."""
+
+    def tricky_rows(self):
+        texts = ['say "hi"', "back\\slash", "tab\tand\nnewline\r", "\x01\x1f\x7f", "ünïcødé ✓ 𝄞", "\u2028", " ", ""]
+        offset = timezone(timedelta(hours=5, minutes=30))
+        return [
+            Data(
+                title=text, insight=text, sector=text or None, impact=text, url=f"https://example.com/{index}",
+                intensity=-index, added=datetime(2017, 1, 9, 3, 4, 5, 1000 * index, tzinfo=offset),
+                published=datetime(1, 1, 1, tzinfo=timezone.utc) if index == 1 else None,
+            )
+            for index, text in enumerate(texts)
+        ]
+
+    def test_sql_hash_matches_python(self):
+        bulk_load(self.tricky_rows())
+        rows = list(Data.objects.all())
+        self.assertEqual(len(rows), 8)
+        for row in rows:
+            with self.subTest(title=row.title):
+                self.assertEqual(row.content_hash, content_hash(row))
+
+    def test_duplicates(self):
+        rows = list(generate_rows(30, seed=5))
+        load = bulk_load(rows[:20] + rows[:5])
+        self.assertEqual((load["inserted"], load["skipped"]), (25, 0))
+        self.assertEqual(Data.objects.filter(content_hash__isnull=True).count(), 5)
+
+        load = bulk_load(list(generate_rows(30, seed=5)), on_duplicate="skip")
+        self.assertEqual((load["inserted"], load["updated"], load["skipped"]), (10, 0, 20))
+        load = bulk_load(list(generate_rows(30, seed=5)) * 2, on_duplicate="touch")
+        self.assertEqual((load["inserted"], load["updated"], load["skipped"]), (0, 30, 30))
+        self.assertEqual(Data.objects.count(), 35)
+
+    def test_derived_columns_and_tables(self):
+        bulk_load(generate_rows(500, seed=6))
+        for row in Data.objects.all()[:50]:
+            self.assertEqual(row.end_year_value, int(row.end_year) if row.end_year else None)
+            self.assertEqual(row.search_vector is None, row.title is None and row.insight is None)
+        self.assertFalse(Data.objects.filter(country__isnull=False, country_code__isnull=True).exists())
+
+        rollup = sorted(DataRollup.objects.values_list(
+            "dims_key", "row_count", "sector_count", "intensity_sum", "intensity_count",
+        ))
+        facets = sorted(FacetValue.objects.values_list("column", "value"), key=repr)
+        ranges = sorted(FacetRange.objects.values_list("column", "min_number", "max_number", "min_text", "max_text"))
+        rebuild_rollups()
+        rebuild_facets()
+        self.assertEqual(rollup, sorted(DataRollup.objects.values_list(
+            "dims_key", "row_count", "sector_count", "intensity_sum", "intensity_count",
+        )))
+        self.assertEqual(facets, sorted(FacetValue.objects.values_list("column", "value"), key=repr))
+        self.assertEqual(ranges, sorted(FacetRange.objects.values_list(
+            "column", "min_number", "max_number", "min_text", "max_text",
+        )))
+
+
+class FacetCatalogueTests(TestCase):
+    """facet_catalogue keeps one min/max row per range column, ordered like MIN/MAX over Data."""
+
+    def rows(self, impacts, intensities):
+        return [
+            Data(title=f"{impact} {intensity}", impact=impact, intensity=intensity, country="India")
+            for impact, intensity in zip(impacts, intensities)
+        ]
+
+    def assertRangesMatch(self):
+        expected = {
+            column: {
+                "min": Data.objects.aggregate(value=Min(column))["value"],
+                "max": Data.objects.aggregate(value=Max(column))["value"],
+            }
+            for column in RANGE_COLUMNS
+        }
+        self.assertEqual(facet_catalogue()["ranges"], expected)
+
+    def test_ranges_widen_across_loads(self):
+        bulk_load(self.rows(["9", "b", None], [9, 2, None]))
+        self.assertRangesMatch()
+        bulk_load(self.rows(["10", "B", "ä", "Z"], [10, -3, 4, None]))
+        self.assertRangesMatch()
+        self.assertLessEqual(FacetRange.objects.count(), len(RANGE_COLUMNS))
+        self.assertFalse(FacetValue.objects.filter(column__in=RANGE_COLUMNS).exists())
+
+    def test_deleted_rows_stay_until_rebuild(self):
+        bulk_load(self.rows(["1", "2"], [1, 20]))
+        Data.objects.filter(intensity=20).delete()
+        self.assertEqual(facet_catalogue()["ranges"]["intensity"], {"min": 1, "max": 20})
+        rebuild_facets()
+        self.assertRangesMatch()
+
+
+@skipIf(connection.vendor == "sqlite", "SQLite cannot rename indexes.")
+class DatasetSwapTests(TestCase):
+    """Swapped-in tables carry the index, constraint and sequence names migrations gave the live ones."""
+
+    def names(self):
+        names = {}
+        with connection.cursor() as cursor:
+            for model in (Data, *DERIVED_MODELS):
+                table = model._meta.db_table
+                constraints = connection.introspection.get_constraints(cursor, table)
+                cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [connection.ops.quote_name(table)])
+                names[table] = (
+                    sorted((name, info["index"]) for name, info in constraints.items()),
+                    cursor.fetchone()[0],
+                )
+        return names
+
+    def test_swap_and_rollback_keep_names(self):
+        if not has_search_index(connection, Data._meta.db_table):
+            self.skipTest("The test database was created without migrations.")
+        bulk_load(generate_rows(50, seed=1))
+        names = self.names()
+        self.assertIn(("data_country_year_idx", True), names[Data._meta.db_table][0])
+        self.assertIn(("data_search_vector_gin", True), names[Data._meta.db_table][0])
+
+        replace_dataset_with(lambda shadow: bulk_load(generate_rows(30, seed=2, model=shadow), model=shadow))
+        self.assertEqual(self.names(), names)
+        rollback_dataset()
+        self.assertEqual(self.names(), names)
+        self.assertEqual(Data.objects.count(), 50)
+
+
+class StaleJobTests(TestCase):
+    """Jobs left running by a stopped process are failed once their progress stops moving."""
+
+    def job(self, status, minutes_ago):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        job = IngestJob.objects.create(file_path=path, status=status)
+        IngestJob.objects.filter(pk=job.pk).update(date_updated=datetime.now(timezone.utc) - timedelta(minutes=minutes_ago))
+        return job
+
+    def test_fail_stale_jobs(self):
+        stale = self.job(IngestJob.STATUS_RUNNING, 45)
+        moving = self.job(IngestJob.STATUS_RUNNING, 5)
+        queued = self.job(IngestJob.STATUS_QUEUED, 45)
+        with override_settings(DATA_INGEST_STALE_MINUTES=30):
+            self.assertEqual(fail_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.error_message), (IngestJob.STATUS_FAILED, STALE_JOB_ERROR))
+        self.assertIsNotNone(stale.finished_at)
+        self.assertFalse(os.path.exists(stale.file_path))
+        for job, status in ((moving, IngestJob.STATUS_RUNNING), (queued, IngestJob.STATUS_QUEUED)):
+            job.refresh_from_db()
+            self.assertEqual(job.status, status)
+            self.assertTrue(os.path.exists(job.file_path))
+            os.remove(job.file_path)
+
+
+class StreamIngestTests(TestCase):
+    """mode=stream uploads are parsed incrementally and loaded batch by batch."""
+
+    records = list(generate_records(250, seed=16))
+
+    def upload(self, data, name="data.json", **params):
+        return self.client.post("/data/", {
+            "datafile": SimpleUploadedFile(name, data), "mode": "stream", "batch_size": "100", **params,
+        })
+
+    def array(self, records=None):
+        return json.dumps(self.records if records is None else records).encode()
+
+    def ndjson(self):
+        return b"\n".join(json.dumps(record).encode() for record in self.records) + b"\n"
+
+    def assertLoaded(self, response, count):
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.json())
+        summary = response.json()
+        self.assertEqual((summary["batches"], summary["received"], summary["inserted"]), (3, count, count))
+        self.assertEqual(summary["errors"], [])
+        self.assertNotIn("error", summary)
+        self.assertEqual(Data.objects.count(), count)
+
+    def test_json_array_in_several_batches(self):
+        self.assertLoaded(self.upload(self.array()), 250)
+        self.assertEqual(
+            sorted(Data.objects.values_list("title", flat=True)), sorted(record["title"] for record in self.records),
+        )
+
+    def test_ndjson(self):
+        self.assertLoaded(self.upload(self.ndjson(), name="data.ndjson"), 250)
+
+    def test_gzip(self):
+        for data in (self.array(), self.ndjson()):
+            with self.subTest(data=data[:1]):
+                Data.objects.all().delete()
+                self.assertLoaded(self.upload(gzip.compress(data), name="data.json.gz"), 250)
+
+    def test_truncated_json(self):
+        data = self.array()
+        # Cut inside record 230: batches 0 and 1 are complete, batch 2 is not.
+        cut = data.index(json.dumps(self.records[230]).encode()) + 20
+        response = self.upload(data[:cut])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        summary = response.json()
+        self.assertIn("error", summary)
+        self.assertEqual((summary["batches"], summary["inserted"]), (2, 200))
+        self.assertEqual(Data.objects.count(), 200)
+
+        Data.objects.all().delete()
+        response = self.upload(data[:data.index(json.dumps(self.records[50]).encode()) + 20])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["inserted"], 0)
+        self.assertEqual(Data.objects.count(), 0)
+
+    def test_truncated_gzip(self):
+        data = gzip.compress(self.ndjson())
+        response = self.upload(data[:len(data) // 2], name="data.ndjson.gz")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.json())
+        self.assertEqual(Data.objects.count(), response.json()["inserted"])
+
+    def test_record_errors_across_batches(self):
+        records = [dict(record) for record in self.records]
+        for index in (5, 150, 240):
+            records[index]["intensity"] = "high"
+        response = self.upload(self.array(records))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        summary = response.json()
+        self.assertEqual((summary["received"], summary["inserted"], summary["rejected"]), (250, 247, 3))
+        self.assertEqual(
+            [(error["batch"], error["index"], list(error["errors"])) for error in summary["errors"]],
+            [(0, 5, ["intensity"]), (1, 150, ["intensity"]), (2, 240, ["intensity"])],
+        )
+        self.assertEqual(Data.objects.count(), 247)
+
+    def test_every_record_rejected(self):
+        response = self.upload(self.array([{**record, "added": "yesterday"} for record in self.records[:10]]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["rejected"], 10)
+        self.assertEqual(Data.objects.count(), 0)
+
+
+class RecordStreamTests(SimpleTestCase):
+    """iter_records splits NDJSON lines and JSON array elements across any chunking, up to a size cap."""
+
+    records = [{"title": f"record {index}", "intensity": index, "insight": "x" * index} for index in range(50)]
+
+    def chunked(self, data, size):
+        return [data[start:start + size] for start in range(0, len(data), size)]
+
+    def test_ndjson_across_chunks(self):
+        data = b"\n\n".join(json.dumps(record).encode() for record in self.records) + b"\r\n"
+        for size in (1, 7, 64, len(data)):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_records(self.chunked(data, size))), self.records)
+
+    @override_settings(DATA_INGEST_MAX_RECORD_BYTES=100)
+    def test_record_size_cap(self):
+        long = {"title": "y" * 200}
+        ndjson = b"\n".join(json.dumps(record).encode() for record in ({"title": "a"}, long, {"title": "b"}))
+        array = json.dumps([{"title": "a"}, long]).encode()
+        for data, message in ((ndjson, "Line 2 "), (ndjson.replace(b"\n", b" ", 1)[:150], "Line 1 "),
+                              (array, "Record 1 ")):
+            for size in (16, len(data)):
+                with self.subTest(data=data[:20], size=size), self.assertRaisesMessage(IngestError, message):
+                    list(iter_records(self.chunked(data, size)))
+
+
+class UploadExpiryTests(TestCase):
+    """Idle upload sessions and stray spool files are removed after DATA_UPLOAD_SESSION_EXPIRY_HOURS."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(DATA_INGEST_UPLOAD_DIR=self.directory, DATA_UPLOAD_SESSION_EXPIRY_HOURS=24)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def session(self, hours_ago, status=UploadSession.STATUS_OPEN):
+        session = open_upload_session()
+        UploadSession.objects.filter(pk=session.pk).update(
+            status=status, date_updated=datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+        )
+        return session
+
+    def test_expire_upload_sessions(self):
+        idle = self.session(30)
+        active = self.session(1)
+        finalised = self.session(30, UploadSession.STATUS_FINALISED)
+        stray = os.path.join(self.directory, "stray.part")
+        open(stray, "wb").close()
+        old = (datetime.now(timezone.utc) - timedelta(hours=30)).timestamp()
+        os.utime(stray, (old, old))
+
+        self.assertEqual(expire_upload_sessions(), 2)
+        self.assertEqual(list(UploadSession.objects.values_list("pk", flat=True)), [active.pk])
+        self.assertFalse(os.path.exists(idle.file_path))
+        self.assertFalse(os.path.exists(stray))
+        self.assertTrue(os.path.exists(active.file_path))
+        # A finalised session's file belongs to its ingest job.
+        self.assertTrue(os.path.exists(finalised.file_path))
+
+
+class ValidatorParityTests(SimpleTestCase):
+    """DataValidator accepts and rejects what normalise_record plus DataSerializer do."""
+
+    cases = (
+        ("blank strings", {"title": "", "intensity": "", "added": "", "country": "   "}),
+        ("upstream date", {"added": "January, 20 2017 03:51:25", "published": "March, 5 2016 7:08:09"}),
+        ("ISO date", {"added": "2017-01-20T03:51:25"}),
+        ("unknown month", {"added": "Smarch, 20 2017 03:51:25"}),
+        ("impossible date", {"published": "April, 31 2017 00:00:00"}),
+        ("date not a string", {"added": 20170120}),
+        ("leap day", {"added": "February, 29 2016 12:00:00"}),
+        ("leap day in a common year", {"added": "February, 29 2017 12:00:00"}),
+        ("integer", {"intensity": 6, "likelihood": "3", "relevance": "2.0"}),
+        ("fractional intensity", {"intensity": 5.5}),
+        ("fractional string intensity", {"intensity": "5.5"}),
+        ("text intensity", {"intensity": "high"}),
+        ("boolean intensity", {"intensity": True}),
+        ("numeric CharField", {"sector": 12, "end_year": 2030}),
+        ("list CharField", {"sector": ["Energy"]}),
+        ("overlong CharField", {"sector": "x" * 101}),
+        ("overlong year", {"end_year": "2" * 11}),
+        ("long TextField", {"insight": "x" * 5000}),
+        ("unknown keys", {"colour": "red", "id": 5, "content_hash": "abc"}),
+        ("several errors", {"intensity": "high", "sector": "x" * 101, "added": "yesterday"}),
+        ("list", ["not", "a", "record"]),
+        ("string", "not a record"),
+        ("number", 42),
+    )
+
+    def reference(self, record):
+        """(valid, error fields, validated data) from the original per-record path."""
+        if isinstance(record, dict):
+            record = dict(record)
+            errors = normalise_record(record)
+            if errors:
+                return False, sorted(errors), None
+        serializer = DataSerializer(data=record)
+        if not serializer.is_valid():
+            return False, sorted(serializer.errors), None
+        return True, [], dict(serializer.validated_data)
+
+    def test_cases(self):
+        records = [record for _, record in self.cases] + list(generate_records(20, seed=4))
+        names = [name for name, _ in self.cases] + [f"synthetic {index}" for index in range(20)]
+        validator = DataValidator()
+        for name, record in zip(names, records):
+            with self.subTest(name):
+                valid, fields, data = self.reference(record)
+                row, errors = validator.validate(record)
+                self.assertEqual((row is not None, sorted(errors or ())), (valid, fields))
+                if valid:
+                    self.assertEqual({key: getattr(row, key) for key in data}, data)
@@ -0,0 +1,112 @@
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+
+
+class UploadError(ValueError):
+    pass
+
+
+def open_upload_session():
+    """Creates an empty spool file and the session tracking it."""
+    os.makedirs(settings.DATA_INGEST_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(settings.DATA_INGEST_UPLOAD_DIR, f"{uuid.uuid4().hex}.part")
+    open(path, "wb").close()
+    return UploadSession.objects.create(file_path=path)
+
+
+def append_chunk(session_id, index, chunk_file):
+    """
+    Appends chunk `index` to the session's spool file.
+
+    Chunks must arrive in order. Re-sending a chunk that was already stored is
+    acknowledged without writing, so a client can retry the last chunk after a
+    dropped connection and carry on from `next_index`.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        if session.status != UploadSession.STATUS_OPEN:
+            raise UploadError("Upload session is already finalised.")
+        if index < session.next_index:
+            return session
+        if index > session.next_index:
+            raise UploadError(f"Expected chunk {session.next_index}, got {index}.")
+
+        # Truncate to the committed length first so a partially written chunk
+        # from an interrupted request never survives.
+        with open(session.file_path, "r+b") as destination:
+            destination.truncate(session.bytes_received)
+            destination.seek(session.bytes_received)
+            for data in chunk_file.chunks():
+                destination.write(data)
+            size = destination.tell()
+
+        session.next_index += 1
+        session.bytes_received = size
+        session.save(update_fields=["next_index", "bytes_received", "date_updated"])
+    return session
+
+
+def finalise_upload_session(session_id):
+    """Closes the session to further chunks and returns it."""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        if session.status != UploadSession.STATUS_OPEN:
+            raise UploadError("Upload session is already finalised.")
+        if session.next_index == 0:
+            raise UploadError("No chunks were uploaded.")
+        session.status = UploadSession.STATUS_FINALISED
+        session.save(update_fields=["status", "date_updated"])
+    return session
+
+
+def expire_upload_sessions(hours=None):
+    """
+    Removes upload sessions idle for DATA_UPLOAD_SESSION_EXPIRY_HOURS: open
+    ones with their spool files, finalised ones as rows only (their files
+    belong to the ingest by then). Spool files older than that which no
+    session refers to are removed too. Returns the number of sessions removed.
+    """
+    hours = settings.DATA_UPLOAD_SESSION_EXPIRY_HOURS if hours is None else hours
+    cutoff = timezone.now() - timedelta(hours=hours)
+    expired = UploadSession.objects.filter(date_updated__lt=cutoff)
+    removed = 0
+    for pk, path in expired.filter(status=UploadSession.STATUS_OPEN).values_list("pk", "file_path"):
+        # Filtered again so a session that just received a chunk survives.
+        if expired.filter(pk=pk, status=UploadSession.STATUS_OPEN).delete()[0]:
+            removed += 1
+            if os.path.exists(path):
+                os.remove(path)
+    removed += expired.filter(status=UploadSession.STATUS_FINALISED).delete()[0]
+
+    directory = settings.DATA_INGEST_UPLOAD_DIR
+    if os.path.isdir(directory):
+        known = set(UploadSession.objects.values_list("file_path", flat=True))
+        for entry in os.scandir(directory):
+            if (
+                entry.name.endswith(".part") and entry.path not in known
+                and entry.stat().st_mtime < cutoff.timestamp()
+            ):
+                os.remove(entry.path)
+    return removed
+
+
+def upload_session_status(session):
+    expires_at = None
+    if session.status == UploadSession.STATUS_OPEN:
+        expires_at = session.date_updated + timedelta(hours=settings.DATA_UPLOAD_SESSION_EXPIRY_HOURS)
+    return {
+        "id": str(session.id),
+        "status": session.status,
+        "next_index": session.next_index,
+        "bytes_received": session.bytes_received,
+        "date_created": session.date_created,
+        "date_updated": session.date_updated,
+        "expires_at": expires_at,
+    }
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import DataAPIView, DashboardView
+from .views import DataAPIView, DashboardView, ExportView, IngestJobView, UploadSessionView
 
 urlpatterns = [
     path('', DataAPIView.as_view(), name='dataentry'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('jobs/', IngestJobView.as_view(), name='ingestjobs'),
+    path('uploads/', UploadSessionView.as_view(), name='uploads'),
 ]
@@ -0,0 +1,185 @@
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import MaxLengthValidator
+from django.db import models
+from django.utils import timezone
+
+from .models import Data
+
+# Mirrors the regex `datetime.strptime` builds for "%B, %d %Y %H:%M:%S",
+# so the fast path accepts and rejects exactly the same strings.
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+UPSTREAM_DATE_RE = re.compile(
+    r"(?P<B>" + "|".join(MONTHS) + r"),\s+"
+    r"(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])\s+"
+    r"(?P<Y>\d\d\d\d)\s+"
+    r"(?P<H>2[0-3]|[0-1]\d|\d):(?P<M>[0-5]\d|\d):(?P<S>6[0-1]|[0-5]\d|\d)",
+    re.IGNORECASE,
+)
+DATE_ERROR = "Invalid date format. Expected: 'Month, DD YYYY HH:MM:SS'"
+DATE_CACHE_SIZE = 100000
+
+# Same guard and decimal handling as rest_framework.fields.IntegerField.
+MAX_INTEGER_STRING_LENGTH = 1000
+_re_decimal = re.compile(r'\.0*\s*$')
+_re_surrogates = re.compile(r'[\ud800-\udfff]')
+
+
+class FieldError(Exception):
+    pass
+
+
+def _char_coercer(field):
+    validators = [v for v in field.validators if not isinstance(v, MaxLengthValidator)]
+    max_length = field.max_length
+    max_length_error = f"Ensure this field has no more than {max_length} characters."
+
+    def coerce(value):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise FieldError("Not a valid string.")
+        value = str(value).strip()
+        if value == "":
+            return value
+        if max_length is not None and len(value) > max_length:
+            raise FieldError(max_length_error)
+        if "\x00" in value:
+            raise FieldError("Null characters are not allowed.")
+        if _re_surrogates.search(value):
+            raise FieldError("Surrogate characters are not allowed.")
+        for validator in validators:
+            try:
+                validator(value)
+            except DjangoValidationError as e:
+                raise FieldError(e.messages[0])
+        return value
+    return coerce
+
+
+def _integer_coercer(field):
+    validators = list(field.validators)
+
+    def coerce(value):
+        if isinstance(value, str) and len(value) > MAX_INTEGER_STRING_LENGTH:
+            raise FieldError("String value too large.")
+        try:
+            value = int(_re_decimal.sub('', str(value)))
+        except (ValueError, TypeError):
+            raise FieldError("A valid integer is required.")
+        for validator in validators:
+            try:
+                validator(value)
+            except DjangoValidationError as e:
+                raise FieldError(e.messages[0])
+        return value
+    return coerce
+
+
+def _datetime_coercer(field):
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    cache = {}
+
+    def parse(value):
+        match = UPSTREAM_DATE_RE.match(value)
+        if match is None or match.end() != len(value):
+            raise FieldError(DATE_ERROR)
+        try:
+            parsed = datetime(
+                int(match["Y"]), MONTHS[match["B"].lower()], int(match["d"]),
+                int(match["H"]), int(match["M"]), int(match["S"]),
+            )
+        except ValueError:
+            raise FieldError(DATE_ERROR)
+        return timezone.make_aware(parsed, tz) if tz is not None else parsed
+
+    def coerce(value):
+        if not value:
+            # Falsy non-null values skip date normalisation and are rejected by DRF.
+            raise FieldError("Datetime has wrong format.")
+        if not isinstance(value, str):
+            raise FieldError(DATE_ERROR)
+        try:
+            return cache[value]
+        except KeyError:
+            pass
+        parsed = parse(value)
+        if len(cache) >= DATE_CACHE_SIZE:
+            cache.clear()
+        cache[value] = parsed
+        return parsed
+    return coerce
+
+
+COERCER_FACTORIES = {
+    models.CharField: _char_coercer,
+    models.TextField: _char_coercer,
+    models.IntegerField: _integer_coercer,
+    models.DateTimeField: _datetime_coercer,
+}
+
+
+class DataValidator:
+    """
+    Bulk validator for raw upstream Data records.
+
+    Accepts the same records as normalising them and running DataSerializer,
+    but builds its field coercers once and parses the upstream date format
+    directly into datetimes. Valid records come back as unsaved Data rows.
+    """
+
+    def __init__(self, model=Data):
+        self.model = model
+        self.coercers = []
+        for field in model._meta.concrete_fields:
+            if field.primary_key or not field.editable:
+                continue
+            factory = next(
+                (factory for field_class, factory in COERCER_FACTORIES.items() if isinstance(field, field_class)),
+                None,
+            )
+            if factory is None:
+                raise TypeError(f"No fast-path coercer for {field.__class__.__name__} '{field.name}'.")
+            self.coercers.append((field.attname, factory(field)))
+
+    def validate(self, record):
+        """Returns (row, None) for a valid record or (None, errors) otherwise."""
+        if not isinstance(record, dict):
+            return None, {"non_field_errors": ["Invalid data. Expected a dictionary."]}
+
+        values = {}
+        errors = None
+        for name, coerce in self.coercers:
+            value = record.get(name)
+            if value is None or value == "":
+                continue
+            try:
+                values[name] = coerce(value)
+            except FieldError as e:
+                if str(e) == DATE_ERROR:
+                    # normalise_record stops at the first bad date, before
+                    # the serializer checks any other field.
+                    return None, {name: [DATE_ERROR]}
+                if errors is None:
+                    errors = {}
+                errors[name] = [str(e)]
+
+        if errors:
+            return None, errors
+        return self.model(**values), None
+
+    def validate_many(self, records, start=0):
+        """Validates records in order, returning valid rows and indexed errors."""
+        rows = []
+        errors = []
+        for index, record in enumerate(records, start):
+            row, record_errors = self.validate(record)
+            if record_errors:
+                errors.append({"index": index, "errors": record_errors})
+            else:
+                rows.append(row)
+        return rows, errors
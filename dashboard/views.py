@@ -1,14 +1,110 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from datetime import datetime
-from .models import Data
+from .models import Data, DataRollup, IngestJob, UploadSession
 from .serializers import DataSerializer
+from .aggregates import overview_aggregates
+from .batch import needs_raw_rows, shared_base
+from .columnar import columnar_engine
+from .facets import facet_catalogue
+from .ingest import normalise_record
+from .jobs import fail_stale_jobs, job_status, run_ingest, store_upload, submit_ingest_job
+from .dimensions import blank_codes, decode_columns, decode_dimensions
+from .exports import csv_stream, export_fields, ndjson_stream
+from .filters import DataFilter, compile_filters
+from .generation import current_generation
+from .loaders import bulk_load, duplicate_policy
+from .pagination import Keyset, page_params, paging_requested
+from .renderers import ArrowRenderer, ColumnarJSONRenderer, CSVRenderer, FastJSONRenderer, NDJSONRenderer, pa
+from .response_cache import cache_stats, cached_response, canonical_request, etag_matches, response_etag, store_response
+from .rollups import average_of, count_of, rows_of
+from .search import search_matches
+from .uploads import (
+    UploadError,
+    append_chunk,
+    expire_upload_sessions,
+    finalise_upload_session,
+    open_upload_session,
+    upload_session_status,
+)
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from django.core.paginator import Paginator
-from django.db.models import Avg, Count, Min, Max
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.db.models import Avg, Count, F
 
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 import json
+import os
+
+INGEST_MODES = ("stream", "upsert", "replace", "async")
+
+
+def ingest_param(request, name):
+    return request.data.get(name) or request.query_params.get(name)
+
+
+def parse_ingest_options(request, mode):
+    """
+    Reads the shared ingest options from form data or query params.
+    mode=async (or background=true with any mode) runs the load as a job.
+    Returns (options, background, error_message).
+    """
+    background = mode == "async" or str(ingest_param(request, "background")).lower() == "true"
+    on_duplicate = ingest_param(request, "on_duplicate") or ("skip" if mode == "upsert" else None)
+    try:
+        on_duplicate = duplicate_policy(on_duplicate) if on_duplicate else None
+    except ValueError as e:
+        return None, background, str(e)
+
+    batch_size = ingest_param(request, "batch_size")
+    try:
+        batch_size = int(batch_size) if batch_size else None
+    except ValueError:
+        return None, background, "batch_size must be an integer."
+
+    if mode == "replace":
+        load_mode, on_duplicate = "replace", None
+    else:
+        load_mode = "upsert" if on_duplicate else "stream"
+    return {"mode": load_mode, "on_duplicate": on_duplicate, "batch_size": batch_size}, background, None
+
+
+def stream_ingest_response(fileobj, options):
+    """
+    Parses the upload incrementally and inserts it in fixed-size batches.
+    Errors are reported per batch and record index instead of failing the whole file.
+    With on_duplicate set, records already stored (by content hash) are skipped or touched;
+    mode=replace loads a shadow table and swaps it in for the live dataset.
+    An unreadable stream (malformed or truncated JSON, an over-long record) is a 400
+    even when earlier batches were committed; the summary reports what was.
+    """
+    summary = run_ingest(fileobj, **options)
+    if summary.get("error") or (summary["inserted"] == 0 and summary["rejected"]):
+        return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+    return Response(summary, status=status.HTTP_201_CREATED)
+
+
+def queue_ingest_response(path, size, options):
+    """
+    Queues a spooled upload for the local worker pool.
+    Progress is polled from IngestJobView with the returned job id.
+    """
+    job = submit_ingest_job(path, size, **options)
+    return Response({"message": "Ingest job queued.", "data": {"job_id": str(job.id), "status": job.status}},
+                    status=status.HTTP_202_ACCEPTED)
+
+
+def dashboard_queryset(filters, rollup=True):
+    """
+    Applies compiled dashboard filters to the rollup table when it can answer
+    them (and the caller allows it), otherwise to the raw Data rows.
+    Returns (queryset, rollup).
+    """
+    rollup = rollup and filters.rollup
+    model = DataRollup if rollup else Data
+    return filters.apply(model.objects.all()), rollup
+
 
 class DataAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)  # Support file uploads
@@ -19,6 +115,16 @@ class DataAPIView(APIView):
         if not uploaded_file:
             return Response({"error": "No file uploaded. Expected key: 'datafile'."}, status=status.HTTP_400_BAD_REQUEST)
 
+        mode = ingest_param(request, "mode")
+        if mode in INGEST_MODES:
+            options, background, error = parse_ingest_options(request, mode)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+            if background:
+                path, size = store_upload(uploaded_file)
+                return queue_ingest_response(path, size, options)
+            return stream_ingest_response(uploaded_file, options)
+
         try:
             # Read and decode file content
             file_content = uploaded_file.read().decode('utf-8')
@@ -31,30 +137,192 @@ class DataAPIView(APIView):
 
         # Convert date fields
         for record in payload:
-            for key, value in record.items():
-                if value == "":
-                    record[key] = None
-
-            date_fields = ['added', 'published']
-            for field in date_fields:
-                if field in record and record[field]:
-                    try:
-                        record[field] = datetime.strptime(record[field], "%B, %d %Y %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%S")
-                    except ValueError:
-                        return Response({field: "Invalid date format. Expected: 'Month, DD YYYY HH:MM:SS'"},
-                                        status=status.HTTP_400_BAD_REQUEST)
+            record_errors = normalise_record(record)
+            if record_errors:
+                return Response(record_errors, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = DataSerializer(data=payload, many=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # Bulk insert instead of ListSerializer.create's one INSERT per record.
+            rows = [Data(**attrs) for attrs in serializer.validated_data]
+            bulk_load(rows, returning=True)
+            return Response(DataSerializer(rows, many=True).data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+
+
+class UploadSessionView(APIView):
+    """
+    Resumable chunked uploads: openUpload, then putChunk with index 0, 1, 2...,
+    then finaliseUpload with an ingest mode. GET ?id= reports the next expected chunk.
+    """
+    parser_classes = (MultiPartParser, FormParser, JSONParser)
+
+    def get(self, request):
+        session_id = request.query_params.get("id")
+        session = self.getSession(session_id)
+        if session is None:
+            return Response({"message": f"Upload session {session_id} Not Found!", "data": None}, status.HTTP_404_NOT_FOUND) # noqa
+        return Response({"message": "Successfully fetched upload session!", "data": upload_session_status(session)},
+                        status.HTTP_200_OK)
+
+    def post(self, request):
+        self.data = request.data
+        self.pk = None
+        if "id" in self.data:
+            self.pk = self.data.get("id")
+
+        if "action" in self.data:
+            action = str(self.data["action"])
+            action_mapper = {
+                "openUpload": self.openUpload,
+                "putChunk": self.putChunk,
+                "finaliseUpload": self.finaliseUpload,
+            }
+            action_status = action_mapper.get(action)
+            if action_status:
+                return action_status(request)
+            return Response({"message": "Choose Wrong Option !", "data": None}, status.HTTP_400_BAD_REQUEST) # noqa
+        return Response({"message": "Action is not in dict", "data": None}, status.HTTP_400_BAD_REQUEST) # noqa
+
+    def getSession(self, session_id):
+        try:
+            return UploadSession.objects.get(pk=session_id)
+        except (UploadSession.DoesNotExist, ValidationError):
+            return None
+
+    def openUpload(self, request):
+        expire_upload_sessions()
+        session = open_upload_session()
+        return Response({"message": "Upload session opened!", "data": upload_session_status(session)},
+                        status.HTTP_201_CREATED)
+
+    def putChunk(self, request):
+        chunk = request.FILES.get("chunk")
+        if not chunk:
+            return Response({"message": "No chunk uploaded. Expected key: 'chunk'.", "data": None}, status.HTTP_400_BAD_REQUEST) # noqa
+        try:
+            index = int(self.data.get("index"))
+        except (TypeError, ValueError):
+            return Response({"message": "index must be an integer.", "data": None}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = append_chunk(self.pk, index, chunk)
+        except (UploadSession.DoesNotExist, ValidationError):
+            return Response({"message": f"Upload session {self.pk} Not Found!", "data": None}, status.HTTP_404_NOT_FOUND) # noqa
+        except UploadError as e:
+            return Response({"message": str(e), "data": upload_session_status(self.getSession(self.pk))},
+                            status.HTTP_409_CONFLICT)
+        return Response({"message": "Chunk stored!", "data": upload_session_status(session)}, status.HTTP_200_OK)
+
+    def finaliseUpload(self, request):
+        mode = ingest_param(request, "mode") or "stream"
+        if mode not in INGEST_MODES:
+            return Response({"message": f"mode must be one of: {', '.join(INGEST_MODES)}.", "data": None},
+                            status.HTTP_400_BAD_REQUEST)
+        options, background, error = parse_ingest_options(request, mode)
+        if error:
+            return Response({"message": error, "data": None}, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = finalise_upload_session(self.pk)
+        except (UploadSession.DoesNotExist, ValidationError):
+            return Response({"message": f"Upload session {self.pk} Not Found!", "data": None}, status.HTTP_404_NOT_FOUND) # noqa
+        except UploadError as e:
+            return Response({"message": str(e), "data": None}, status.HTTP_409_CONFLICT)
+
+        if background:
+            return queue_ingest_response(session.file_path, session.bytes_received, options)
+        try:
+            with open(session.file_path, "rb") as fileobj:
+                return stream_ingest_response(fileobj, options)
+        finally:
+            os.remove(session.file_path)
+
+
+class IngestJobView(APIView):
+    def get(self, request):
+        job_id = request.query_params.get("id")
+        if not job_id:
+            return Response({"message": "Expected query parameter: 'id'.", "data": None}, status.HTTP_400_BAD_REQUEST) # noqa
+
+        try:
+            job = IngestJob.objects.get(pk=job_id)
+        except (IngestJob.DoesNotExist, ValidationError):
+            return Response({"message": f"Ingest job {job_id} Not Found!", "data": None}, status.HTTP_404_NOT_FOUND) # noqa
+
+        if job.status == IngestJob.STATUS_RUNNING and fail_stale_jobs():
+            job.refresh_from_db()
+        return Response({"message": "Successfully fetched ingest job!", "data": job_status(job)}, status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """
+    Streams the raw Data rows matching the DataFilter parameters, as NDJSON
+    (?format=ndjson, the default) or CSV (?format=csv). `fields` limits the
+    columns. Rows are read in chunks through a cursor and written as they
+    arrive, so the first byte goes out immediately and memory stays flat.
+    """
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    streams = {"ndjson": ndjson_stream, "csv": csv_stream}
+
+    def get(self, request):
+        filterset = DataFilter(request.query_params, queryset=Data.objects.all())
+        if not filterset.is_valid():
+            return Response({"message": "Invalid filters.", "data": filterset.errors}, status.HTTP_400_BAD_REQUEST)
+        try:
+            fields = export_fields(request.query_params.get("fields"))
+        except ValueError as e:
+            return Response({"message": str(e), "data": None}, status.HTTP_400_BAD_REQUEST)
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            self.streams[renderer.format](filterset.qs, fields),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = f'attachment; filename="data-export.{renderer.format}"'
+        response["Cache-Control"] = "no-store"
+        return response
+
+
 class DashboardView(APIView):
+    uncached_actions = {"getCacheStats"}
+    # Cache-Control per action. Chart data changes with every ingest, so
+    # browsers revalidate it with If-None-Match; filter options and the
+    # overview may be reused briefly without asking.
+    cache_control = {
+        "getFilter": "public, max-age=300",
+        "getOverview": "public, max-age=60",
+        "getCacheStats": "no-store",
+    }
+    default_cache_control = "no-cache"
+    # getIntensity page order: highest average first, ties by country code.
+    intensity_keyset = Keyset(("avg_intensity", True), ("country_code", False))
+    # getSearchResults page order: best rank first, ties by id.
+    search_keyset = Keyset(("rank", True), ("id", False))
+    # getTopicDistribution and getWorldMapData page orders, when paged.
+    topic_keyset = Keyset(("count", True), ("topic_code", False))
+    world_map_keyset = Keyset(("total_events", True), ("country_code", False))
+    # ?format=columnar (JSON) and ?format=arrow (Arrow IPC) return chart data
+    # as one array per field; only these actions support them.
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer, ArrowRenderer)
+    columnar_formats = {"columnar", "arrow"}
+    columnar_actions = {"getWorldMapData", "getBubbleChartData"}
+    columnar = False
+    world_map_measures = (
+        "total_events", "avg_intensity", "avg_likelihood",
+        "most_common_sector", "most_common_topic", "pestle_distribution",
+    )
+    bubble_chart_measures = ("avg_intensity", "avg_relevance", "avg_likelihood", "event_count")
+
     def get(self, request):
         self.data = request.query_params
         self.pk = None
+        self.etag = None
+        self.not_modified = False
+        self.filters = None
+        self.base_model = None
+        self.columnar = request.accepted_renderer.format in self.columnar_formats
 
         # if not request.user.is_authenticated:
         #     return Response({"message": "Authentication credentials were not provided."},
@@ -73,51 +341,193 @@ class DashboardView(APIView):
                 "getTrendsOverYears": self.getTrendsOverYears,
                 "getWorldMapData": self.getWorldMapData,
                 "getBubbleChartData": self.getBubbleChartData, 
+                "getCacheStats": self.getCacheStats,
+                "getBatch": self.getBatch,
+                "getSearchResults": self.getSearchResults,
             }
             action_status = action_mapper.get(action)
+            if self.columnar and action not in self.columnar_actions:
+                return self.plain_response(request, {
+                    "message": f"format={request.accepted_renderer.format} is only supported by "
+                               f"{', '.join(sorted(self.columnar_actions))}.",
+                    "data": None,
+                }, status.HTTP_400_BAD_REQUEST)
+            if request.accepted_renderer.format == "arrow" and pa is None:
+                return self.plain_response(request, {
+                    "message": "format=arrow needs pyarrow, which is not installed.", "data": None,
+                }, status.HTTP_406_NOT_ACCEPTABLE)
             if action_status:
-                action_status(request)
+                if action in self.uncached_actions:
+                    action_status(request)
+                else:
+                    self.cachedAction(action, action_status, request)
             else:
                 return Response({"message": "Choose Wrong Option !", "data": None}, status.HTTP_400_BAD_REQUEST) # noqa
-            return Response(self.ctx, self.status)
+            if self.not_modified:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            elif self.status != status.HTTP_200_OK:
+                response = self.plain_response(request, self.ctx, self.status)
+            else:
+                response = Response(self.ctx, self.status)
+            if self.etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+                response["ETag"] = self.etag
+            response["Cache-Control"] = self.cache_control.get(action, self.default_cache_control)
+            # The representation, and so the ETag, depends on the negotiated format.
+            patch_vary_headers(response, ["Accept"])
+            return response
         else:
             return Response({"message": "Action is not in dict", "data": None}, status.HTTP_400_BAD_REQUEST) # noqa
     
+    def plain_response(self, request, data, status_code):
+        """A JSON response whatever format was negotiated (errors have no columns)."""
+        if request.accepted_renderer.format == "arrow":
+            request.accepted_renderer, request.accepted_media_type = FastJSONRenderer(), FastJSONRenderer.media_type
+        return Response(data, status_code)
+
+    def cachedAction(self, action, handler, request):
+        """
+        Serves an action from the response cache, keyed by the canonical
+        request and the dataset generation. The generation is read before
+        the action queries anything, so an entry is never older than its key.
+        The ETag also covers the negotiated media type. A matching
+        If-None-Match is answered as not modified right after that single
+        lookup.
+        """
+        try:
+            canonical = canonical_request(action, self.data, columns=self.columnar)
+        except ValueError:
+            # Malformed filters: let the action report them.
+            return handler(request)
+
+        generation = current_generation()
+        self.etag = response_etag(canonical, generation, request.accepted_media_type)
+        if etag_matches(request.headers.get("If-None-Match"), self.etag):
+            self.not_modified = True
+            return
+
+        cached = cached_response(canonical, generation)
+        if cached is not None:
+            self.ctx, self.status = cached
+            return
+
+        handler(request)
+        if self.status == status.HTTP_200_OK:
+            store_response(canonical, generation, self.ctx, self.status)
+
+    def get_filters(self, request):
+        """Compiles the request's filters once, however many actions use them."""
+        if self.filters is None:
+            self.filters = compile_filters(request.query_params)
+        return self.filters
+
+    def filtered_source(self, filters, rollup=True):
+        """
+        Like dashboard_queryset, but inside a batch the raw rows come from the
+        batch's shared, already filtered base table.
+        """
+        if self.base_model is not None and not (rollup and filters.rollup):
+            return self.base_model.objects.all(), False
+        return dashboard_queryset(filters, rollup)
+
+    def getBatch(self, request):
+        """
+        Runs several chart actions (actions=getOverview,getIntensity,...) over
+        one shared filter set and returns every result in one response. When
+        more than one of them has to aggregate raw rows under a filter (and
+        the numpy engine is off), the matching rows are materialised once in
+        a temporary table and each aggregate scans only that.
+        """
+        try:
+            names = [name.strip() for name in (request.query_params.get("actions") or "").split(",") if name.strip()]
+            names = list(dict.fromkeys(names))
+            handlers = {
+                "getFilter": self.getFilter,
+                "getOverview": self.getOverview,
+                "getIntensity": self.getIntensity,
+                "getTopicDistribution": self.getTopicDistribution,
+                "getTrendsOverYears": self.getTrendsOverYears,
+                "getWorldMapData": self.getWorldMapData,
+                "getBubbleChartData": self.getBubbleChartData,
+            }
+            unknown = [name for name in names if name not in handlers]
+            if not names or unknown:
+                raise ValueError(f"actions must be a comma-separated list of: {', '.join(handlers)}.")
+
+            filters = self.get_filters(request)
+            # The numpy engine answers every chart action from memory, so a
+            # shared base table would only be built and dropped unread.
+            raw = [] if columnar_engine() else [name for name in names if needs_raw_rows(name, filters)]
+
+            results = {}
+            statuses = {}
+
+            def run_all():
+                for name in names:
+                    handlers[name](request)
+                    results[name] = self.ctx
+                    statuses[name] = self.status
+
+            if filters.spec and len(raw) > 1:
+                with shared_base(filters) as base_model:
+                    self.base_model = base_model
+                    run_all()
+                self.base_model = None
+            else:
+                run_all()
+
+            self.ctx = {
+                "message": "Successfully fetched batch!",
+                "data": results,
+                "status": statuses,
+            }
+            self.status = status.HTTP_200_OK
+
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching batch: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
+        except Exception as e:
+            self.ctx = {"message": f"Error fetching batch: {str(e)}"}
+            self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    def getCacheStats(self, request):
+        """Reports response cache hits and misses."""
+        try:
+            self.ctx = {
+                "message": "Successfully fetched cache stats!",
+                "data": cache_stats(),
+            }
+            self.status = status.HTTP_200_OK
+
+        except Exception as e:
+            self.ctx = {"message": f"Error fetching cache stats: {str(e)}"}
+            self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
+
     def getFilter(self, request):
         """
         Fetches unique values for dropdown filters in the dashboard.
+        Served from the facet catalogue maintained at ingest time.
         """
         try:
+            catalogue = facet_catalogue()
+            values = catalogue["values"]
+            ranges = catalogue["ranges"]
             self.ctx = {
                 # Time-Based Filters
-                "start_years": list(Data.objects.exclude(start_year="").values_list("start_year", flat=True).distinct()),
-                "end_years": list(Data.objects.exclude(end_year="").values_list("end_year", flat=True).distinct()),
-
-                "intensity_range": {
-                    "min": Data.objects.aggregate(min_intensity=Min("intensity"))["min_intensity"],
-                    "max": Data.objects.aggregate(max_intensity=Max("intensity"))["max_intensity"],
-                },
-                "likelihood_range": {
-                    "min": Data.objects.aggregate(min_likelihood=Min("likelihood"))["min_likelihood"],
-                    "max": Data.objects.aggregate(max_likelihood=Max("likelihood"))["max_likelihood"],
-                },
-                "relevance_range": {
-                    "min": Data.objects.aggregate(min_relevance=Min("relevance"))["min_relevance"],
-                    "max": Data.objects.aggregate(max_relevance=Max("relevance"))["max_relevance"],
-                },
-                "impact_range": {
-                    "min": Data.objects.aggregate(min_impact=Min("impact"))["min_impact"],
-                    "max": Data.objects.aggregate(max_impact=Max("impact"))["max_impact"],
-                },
-
-                "end_year": list(Data.objects.exclude(end_year="").values_list("end_year", flat=True).distinct()),
-                "topic": list(Data.objects.exclude(topic="").values_list("topic", flat=True).distinct()),
-                "region": list(Data.objects.exclude(region="").values_list("region", flat=True).distinct()),
-                "country": list(Data.objects.exclude(country="").values_list("country", flat=True).distinct()),
-                # "cities": list(Data.objects.exclude(city="").values_list("city", flat=True).distinct()),
-                "sector": list(Data.objects.exclude(sector="").values_list("sector", flat=True).distinct()),
-                "pestle": list(Data.objects.exclude(pestle="").values_list("pestle", flat=True).distinct()),
-                "source": list(Data.objects.exclude(source="").values_list("source", flat=True).distinct()),
+                "start_years": values["start_year"],
+                "end_years": values["end_year"],
+
+                "intensity_range": ranges["intensity"],
+                "likelihood_range": ranges["likelihood"],
+                "relevance_range": ranges["relevance"],
+                "impact_range": ranges["impact"],
+
+                "end_year": values["end_year"],
+                "topic": values["topic"],
+                "region": values["region"],
+                "country": values["country"],
+                "sector": values["sector"],
+                "pestle": values["pestle"],
+                "source": values["source"],
 
                 # SWOT Categories
                 "swot": ["Strength", "Weakness", "Opportunity", "Threat"],
@@ -129,26 +539,40 @@ class DashboardView(APIView):
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
     
     def getOverview(self, request):
+        """
+        Fetches headline averages, distributions and totals for the filtered rows.
+        All of them come from a single scan (see aggregates.overview_aggregates).
+        """
         try:
+            filters = self.get_filters(request)
+            engine = columnar_engine()
+            if engine:
+                averages, distributions, totals = engine.overview(filters)
+            else:
+                queryset, _ = self.filtered_source(filters, rollup=False)
+                averages, distributions, totals = overview_aggregates(queryset)
             self.ctx = {
             # Averages
-            "avg_intensity": Data.objects.aggregate(avg_intensity=Avg("intensity"))["avg_intensity"],
-            "avg_likelihood": Data.objects.aggregate(avg_likelihood=Avg("likelihood"))["avg_likelihood"],
-            "avg_relevance": Data.objects.aggregate(avg_relevance=Avg("relevance"))["avg_relevance"],
+            "avg_intensity": averages["intensity"],
+            "avg_likelihood": averages["likelihood"],
+            "avg_relevance": averages["relevance"],
 
             # Distributions
-            "end_year_distribution": Data.objects.values("end_year").annotate(count=Count("end_year")),
-            "country_distribution": Data.objects.values("country").annotate(count=Count("country")),
-            "topic_distribution": Data.objects.values("topic").annotate(count=Count("topic")),
-            "region_distribution": Data.objects.values("region").annotate(count=Count("region")),
+            "end_year_distribution": distributions["end_year"],
+            "country_distribution": distributions["country"],
+            "topic_distribution": distributions["topic"],
+            "region_distribution": distributions["region"],
 
             # Totals
-            "total_topic": Data.objects.exclude(topic="").values("topic").distinct().count(),
-            "total_country": Data.objects.exclude(country="").values("country").distinct().count(),
-            "total_region": Data.objects.exclude(region="").values("region").distinct().count(),
+            "total_topic": totals["topic"],
+            "total_country": totals["country"],
+            "total_region": totals["region"],
         }
             self.status = status.HTTP_200_OK
 
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching overview: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
         except Exception as e:
             self.ctx = {"message": f"Error fetching filters: {str(e)}"}
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -156,93 +580,129 @@ class DashboardView(APIView):
     def getIntensity(self, request):
         """
         Fetches intensity data for visualization (bar chart or heatmap).
-        Filters based on query parameters.
+        Filters based on query parameters (see filters.compile_filters).
         """
         try:
-            # Fetch data, apply filters
-            queryset = Data.objects.all()
-
-            # Optional Filters
-            end_year = request.query_params.get("end_year")
-            country = request.query_params.get("country")
-            topic = request.query_params.get("topic")
-            region = request.query_params.get("region")
-
-            if end_year:
-                queryset = queryset.filter(end_year=end_year)
-            if country:
-                queryset = queryset.filter(country__icontains=country)
-            if topic:
-                queryset = queryset.filter(topic__icontains=topic)
-            if region:
-                queryset = queryset.filter(region__icontains=region)
-
-            # Aggregate Data for Visualization
-            intensity_data = queryset.values("country").annotate(avg_intensity=Avg("intensity")).order_by("-avg_intensity")
-
-            # Pagination
-            page_number = int(request.query_params.get("page", 1))
-            records_number = int(request.query_params.get("records_number", 10))
-
-            paginator = Paginator(intensity_data, records_number)
-            page_data = paginator.page(page_number)
+            filters = self.get_filters(request)
+            records_number, cursor, offset, include_total = page_params(request.query_params)
+
+            engine = columnar_engine()
+            if engine:
+                intensity_data, total_count = engine.intensity(filters)
+            else:
+                queryset, rollup = self.filtered_source(filters)
+
+                # Aggregate Data for Visualization, per integer country code
+                intensity_data = queryset.values("country_code").annotate(
+                    avg_intensity=average_of("intensity", rollup)
+                )
+                if include_total:
+                    total_count = queryset.aggregate(total=rows_of(rollup))["total"]
+
+            # Keyset pagination: next_cursor, passed back as `cursor`, resumes
+            # after the last row, so every page costs the same as the first.
+            page_data, next_cursor = self.intensity_keyset.page(intensity_data, records_number, cursor, offset)
+            # Names for this page only
+            page_data = (engine.decode if engine else decode_dimensions)(page_data, ("country",))
 
             # Response
             self.ctx = {
                 "message": "Successfully fetched intensity data!",
-                "data": list(page_data),
-                "total_count": queryset.count(),
+                "data": page_data,
+                "next_cursor": next_cursor,
             }
+            if include_total:
+                self.ctx["total_count"] = total_count
             self.status = status.HTTP_200_OK
 
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching intensity data: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
         except Exception as e:
             self.ctx = {"message": f"Error fetching intensity data: {str(e)}"}
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
 
+    def getSearchResults(self, request):
+        """
+        Full-text search (q=...) over titles and insights, best matches first.
+        Combines with the dashboard filters and pages with cursors like
+        getIntensity. PostgreSQL uses the indexed tsvector column; other
+        backends use an in-memory inverted index (see search.py).
+        """
+        try:
+            text = (request.query_params.get("q") or "").strip()
+            if not text:
+                raise ValueError("q is required.")
+            filters = self.get_filters(request)
+            records_number, cursor, offset, include_total = page_params(request.query_params)
+
+            matches = search_matches(text, filters)
+            page_data, next_cursor = self.search_keyset.page(matches, records_number, cursor, offset)
+
+            # Full rows for this page only, in rank order.
+            rows = Data.objects.in_bulk([match["id"] for match in page_data])
+            serialized = DataSerializer([rows[match["id"]] for match in page_data], many=True).data
+            results = [{**row, "rank": match["rank"]} for match, row in zip(page_data, serialized)]
+
+            self.ctx = {
+                "message": "Successfully fetched search results!",
+                "data": results,
+                "next_cursor": next_cursor,
+            }
+            if include_total:
+                self.ctx["total_count"] = len(matches) if isinstance(matches, list) else matches.count()
+            self.status = status.HTTP_200_OK
+
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching search results: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
+        except Exception as e:
+            self.ctx = {"message": f"Error fetching search results: {str(e)}"}
+            self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
+
     def getTopicDistribution(self, request):
         """
         Fetches topic distribution data for visualization (Pie Chart / Treemap).
-        Supports filtering by sector, region, country, PEST, and SWOT.
+        Supports the shared dashboard filters, including PEST and SWOT.
+        Returns every topic unless records_number, cursor or page asks for
+        one page, which then pages like getIntensity.
         """
         try:
-            queryset = Data.objects.all()
-
-            # Apply filters
-            sector = request.query_params.get("sector")
-            region = request.query_params.get("region")
-            country = request.query_params.get("country")
-            pestle = request.query_params.get("pestle")
-            swot = request.query_params.get("swot")
-
-            if sector:
-                queryset = queryset.filter(sector__icontains=sector)
-            if region:
-                queryset = queryset.filter(region__icontains=region)
-            if country:
-                queryset = queryset.filter(country__icontains=country)
-            if pestle:
-                queryset = queryset.filter(pestle__icontains=pestle)
-            if swot:
-                swot_mapping = {
-                    "strength": "Economic",
-                    "weakness": "Social",
-                    "opportunity": "Technological",
-                    "threat": "Political",
-                }
-                mapped_pestle = swot_mapping.get(swot.lower())
-                if mapped_pestle:
-                    queryset = queryset.filter(pestle__icontains=mapped_pestle)
+            filters = self.get_filters(request)
+            paged = paging_requested(request.query_params)
+            if paged:
+                records_number, cursor, offset, _ = page_params(request.query_params)
+            engine = columnar_engine()
+            if engine:
+                topic_distribution, total_topics = engine.topic_distribution(filters)
+            else:
+                queryset, rollup = self.filtered_source(filters)
+
+                # Aggregate topic counts per integer code; ties in code order, as the engine lists them
+                topic_distribution = (
+                    queryset.values("topic_code").annotate(count=count_of("topic", rollup))
+                    .order_by("-count", F("topic_code").asc(nulls_first=True))
+                )
+                total_topics = queryset.values("topic_code").distinct().count()
 
-            # Aggregate topic counts
-            topic_distribution = queryset.values("topic").annotate(count=Count("topic")).order_by("-count")
+            if paged:
+                topic_distribution, next_cursor = self.topic_keyset.page(
+                    topic_distribution, records_number, cursor, offset
+                )
+            topic_distribution = (engine.decode if engine else decode_dimensions)(topic_distribution, ("topic",))
 
             self.ctx = {
                 "message": "Successfully fetched topic distribution data!",
-                "data": list(topic_distribution),
-                "total_topics": queryset.values("topic").distinct().count(),
+                "data": topic_distribution,
+                "total_topics": total_topics,
             }
+            if paged:
+                self.ctx["next_cursor"] = next_cursor
             self.status = status.HTTP_200_OK
 
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching topic distribution data: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
         except Exception as e:
             self.ctx = {"message": f"Error fetching topic distribution data: {str(e)}"}
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -250,43 +710,37 @@ class DashboardView(APIView):
     def getTrendsOverYears(self, request):
         """
         Fetches intensity, likelihood, and relevance trends over years for a Line Chart.
-        Uses 'end_year' as X-axis (converted to integer for proper sorting).
+        Uses the integer end year as X-axis; blank and malformed years are left out.
         """
         try:
-            queryset = Data.objects.exclude(end_year__isnull=True).exclude(end_year="")
-
-            # Optional Filters
-            country = request.query_params.get("country")
-            region = request.query_params.get("region")
-            sector = request.query_params.get("sector")
-            topic = request.query_params.get("topic")
-
-            if country:
-                queryset = queryset.filter(country__icontains=country)
-            if region:
-                queryset = queryset.filter(region__icontains=region)
-            if sector:
-                queryset = queryset.filter(sector__icontains=sector)
-            if topic:
-                queryset = queryset.filter(topic__icontains=topic)
-
-            # Convert end_year to integer and aggregate values
-            # Convert end_year to integer manually and aggregate
+            filters = self.get_filters(request)
+            engine = columnar_engine()
+            if engine:
+                self.ctx = {
+                    "message": "Successfully fetched trends over years!",
+                    "data": engine.trends(filters),
+                }
+                self.status = status.HTTP_200_OK
+                return
+
+            queryset, rollup = self.filtered_source(filters)
+
+            # Aggregate per integer year, ordered in the database
             trends_data = (
                 queryset
-                .values("end_year")  # Keep it as a string first
+                .exclude(end_year_value__isnull=True)
+                .values("end_year_value")
                 .annotate(
-                    avg_intensity=Avg("intensity"),
-                    avg_likelihood=Avg("likelihood"),
-                    avg_relevance=Avg("relevance")
+                    avg_intensity=average_of("intensity", rollup),
+                    avg_likelihood=average_of("likelihood", rollup),
+                    avg_relevance=average_of("relevance", rollup)
                 )
-                .order_by("end_year")  # Ensure ordering is correct
+                .order_by("end_year_value")
             )
 
-            # Convert year to integer for proper visualization
             trends_data = [
                 {
-                    "year": int(entry["end_year"]),  # Convert string to integer safely
+                    "year": entry["end_year_value"],
                     "avg_intensity": entry["avg_intensity"],
                     "avg_likelihood": entry["avg_likelihood"],
                     "avg_relevance": entry["avg_relevance"]
@@ -300,6 +754,9 @@ class DashboardView(APIView):
             }
             self.status = status.HTTP_200_OK
 
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching trends data: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
         except Exception as e:
             self.ctx = {"message": f"Error fetching trends data: {str(e)}"}
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -313,85 +770,72 @@ class DashboardView(APIView):
         - Most Common Sector & Topic
         - PESTLE Analysis
         - SWOT Categorization (Derived from PESTLE)
+        Returns every country unless records_number, cursor or page asks for
+        one page, which then pages like getIntensity.
         """
         try:
-            queryset = Data.objects.exclude(country__isnull=True).exclude(country="")
-
-            # Apply Filters
-            region = request.query_params.get("region")
-            country = request.query_params.get("country")
-            sector = request.query_params.get("sector")
-            topic = request.query_params.get("topic")
-            pestle = request.query_params.get("pestle")
-            swot = request.query_params.get("swot")
-
-            intensity_min = request.query_params.get("intensity_min")
-            intensity_max = request.query_params.get("intensity_max")
-            likelihood_min = request.query_params.get("likelihood_min")
-            likelihood_max = request.query_params.get("likelihood_max")
-
-            if region:
-                queryset = queryset.filter(region__icontains=region)
-            if country:
-                queryset = queryset.filter(country__icontains=country)
-            if sector:
-                queryset = queryset.filter(sector__icontains=sector)
-            if topic:
-                queryset = queryset.filter(topic__icontains=topic)
-            if pestle:
-                queryset = queryset.filter(pestle__icontains=pestle)
-            if swot:
-                swot_mapping = {
-                    "strength": "Economic",
-                    "weakness": "Social",
-                    "opportunity": "Technological",
-                    "threat": "Political",
+            filters = self.get_filters(request)
+            paged = paging_requested(request.query_params)
+            if paged:
+                records_number, cursor, offset, _ = page_params(request.query_params)
+            engine = columnar_engine()
+            if engine and not paged:
+                self.ctx = {
+                    "message": "Successfully fetched world map data!",
+                    "data": engine.world_map(filters, columns=self.columnar),
                 }
-                mapped_pestle = swot_mapping.get(swot.lower())
-                if mapped_pestle:
-                    queryset = queryset.filter(pestle__icontains=mapped_pestle)
-
-            # Handle min/max filters for intensity
-            if intensity_min and intensity_max:
-                queryset = queryset.filter(intensity__gte=intensity_min, intensity__lte=intensity_max)
-            elif intensity_min:
-                queryset = queryset.filter(intensity__gte=intensity_min)
-            elif intensity_max:
-                queryset = queryset.filter(intensity__lte=intensity_max)
-
-            # Handle min/max filters for likelihood
-            if likelihood_min and likelihood_max:
-                queryset = queryset.filter(likelihood__gte=likelihood_min, likelihood__lte=likelihood_max)
-            elif likelihood_min:
-                queryset = queryset.filter(likelihood__gte=likelihood_min)
-            elif likelihood_max:
-                queryset = queryset.filter(likelihood__lte=likelihood_max)
-
-            # Aggregate Country Data
-            country_data = (
-                queryset.values("country")
-                .annotate(
-                    total_events=Count("country"),
-                    avg_intensity=Avg("intensity"),
-                    avg_likelihood=Avg("likelihood"),
-                    most_common_sector=Count("sector"),
-                    most_common_topic=Count("topic"),
-                    pestle_distribution=Count("pestle"),
+                self.status = status.HTTP_200_OK
+                return
+
+            if engine:
+                country_data = engine.world_map(filters, codes=True)
+            else:
+                queryset, rollup = self.filtered_source(filters)
+                queryset = queryset.exclude(country_code__isnull=True).exclude(country_code__in=blank_codes("country"))
+
+                # Aggregate Country Data per integer code
+                country_data = (
+                    queryset.values("country_code")
+                    .annotate(
+                        total_events=rows_of(rollup),
+                        avg_intensity=average_of("intensity", rollup),
+                        avg_likelihood=average_of("likelihood", rollup),
+                        most_common_sector=count_of("sector", rollup),
+                        most_common_topic=count_of("topic", rollup),
+                        pestle_distribution=count_of("pestle", rollup),
+                    )
+                    .order_by("-total_events", "country_code")  # Sort by event count, ties by code
                 )
-                .order_by("-total_events")  # Sort by event count
-            )
+
+            if paged:
+                country_data, next_cursor = self.world_map_keyset.page(country_data, records_number, cursor, offset)
+            if self.columnar and not paged:
+                names = ("country_code", *self.world_map_measures)
+                country_data = decode_columns(country_data.values_list(*names), names)
+            else:
+                country_data = (engine.decode if engine else decode_dimensions)(country_data, ("country",))
+                if self.columnar:
+                    # One page, decoded as rows; transpose it into columns.
+                    country_data = {
+                        name: [row[name] for row in country_data] for name in ("country", *self.world_map_measures)
+                    }
 
             # Prepare Response
             self.ctx = {
                 "message": "Successfully fetched world map data!",
-                "data": list(country_data),
+                "data": country_data,
             }
+            if paged:
+                self.ctx["next_cursor"] = next_cursor
             self.status = status.HTTP_200_OK
 
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching world map data: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
         except Exception as e:
             self.ctx = {"message": f"Error fetching world map data: {str(e)}"}
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
-    
+
     def getBubbleChartData(self, request):
         """
         Fetches data for a bubble chart comparing Relevance vs. Intensity.
@@ -400,61 +844,54 @@ class DashboardView(APIView):
         - Bubble Size: Likelihood
         """
         try:
-            queryset = Data.objects.exclude(intensity__isnull=True).exclude(relevance__isnull=True)
-
-            # Apply Filters
-            topic = request.query_params.get("topic")
-            sector = request.query_params.get("sector")
-            region = request.query_params.get("region")
-            relevance_min = request.query_params.get("relevance_min")
-            relevance_max = request.query_params.get("relevance_max")
-            intensity_min = request.query_params.get("intensity_min")
-            intensity_max = request.query_params.get("intensity_max")
-
-            if topic:
-                queryset = queryset.filter(topic__icontains=topic)
-            if sector:
-                queryset = queryset.filter(sector__icontains=sector)
-            if region:
-                queryset = queryset.filter(region__icontains=region)
-
-            # Handle min/max filters for relevance
-            if relevance_min and relevance_max:
-                queryset = queryset.filter(relevance__gte=relevance_min, relevance__lte=relevance_max)
-            elif relevance_min:
-                queryset = queryset.filter(relevance__gte=relevance_min)
-            elif relevance_max:
-                queryset = queryset.filter(relevance__lte=relevance_max)
-
-            # Handle min/max filters for intensity
-            if intensity_min and intensity_max:
-                queryset = queryset.filter(intensity__gte=intensity_min, intensity__lte=intensity_max)
-            elif intensity_min:
-                queryset = queryset.filter(intensity__gte=intensity_min)
-            elif intensity_max:
-                queryset = queryset.filter(intensity__lte=intensity_max)
+            filters = self.get_filters(request)
+            engine = columnar_engine()
+            if engine:
+                self.ctx = {
+                    "message": "Successfully fetched bubble chart data!",
+                    "data": engine.bubble_chart(filters, columns=self.columnar),
+                }
+                self.status = status.HTTP_200_OK
+                return
+
+            # Row-level NULL exclusions on measures, so this stays on the raw
+            # rows, grouped on the integer dimension codes
+            queryset, _ = self.filtered_source(filters, rollup=False)
+            queryset = queryset.exclude(intensity__isnull=True).exclude(relevance__isnull=True)
 
             # Aggregate Data
             bubble_data = (
-                queryset.values("topic", "sector", "country")
+                queryset.values("topic_code", "sector_code", "country_code")
                 .annotate(
                     avg_intensity=Avg("intensity"),
                     avg_relevance=Avg("relevance"),
                     avg_likelihood=Avg("likelihood"),
                     event_count=Count("id")  # Bubble Size → Represents number of events
                 )
-                .order_by("-event_count")  # Sort by event count
+                .order_by(  # Sort by event count, ties by code
+                    "-event_count",
+                    *(F(field).asc(nulls_first=True) for field in ("topic_code", "sector_code", "country_code")),
+                )
             )
 
+            if self.columnar:
+                names = ("topic_code", "sector_code", "country_code", *self.bubble_chart_measures)
+                bubble_data = decode_columns(bubble_data.values_list(*names), names)
+            else:
+                bubble_data = decode_dimensions(bubble_data, ("topic", "sector", "country"))
+
             # Prepare Response
             self.ctx = {
                 "message": "Successfully fetched bubble chart data!",
-                "data": list(bubble_data),
+                "data": bubble_data,
             }
             self.status = status.HTTP_200_OK
 
+        except ValueError as e:
+            self.ctx = {"message": f"Error fetching bubble chart data: {str(e)}"}
+            self.status = status.HTTP_400_BAD_REQUEST
         except Exception as e:
             self.ctx = {"message": f"Error fetching bubble chart data: {str(e)}"}
             self.status = status.HTTP_500_INTERNAL_SERVER_ERROR
 
-    
\ No newline at end of file
+    
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Data
+
+# Text year columns and the integer columns derived from them at ingest.
+YEAR_FIELDS = (("start_year", "start_year_value"), ("end_year", "end_year_value"))
+VALUE_FIELDS = tuple(value_field for _, value_field in YEAR_FIELDS)
+
+
+def year_value(value):
+    """Parses a stored year string; blanks and malformed values become None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value.isdigit() or len(value) > 4:
+        return None
+    return int(value) or None
+
+
+def fill_years(rows):
+    """Sets the integer year columns of unsaved rows from their text years."""
+    for row in rows:
+        for field, value_field in YEAR_FIELDS:
+            setattr(row, value_field, year_value(getattr(row, field)))
+
+
+def _unfilled(model, fields, using=None):
+    missing = Q()
+    for field, value_field in fields:
+        missing |= Q(**{f"{field}__isnull": False, f"{value_field}__isnull": True}) & ~Q(**{field: ""})
+    return model.objects.using(using).filter(missing)
+
+
+def backfill_years(using=None, batch_size=2000, model=Data):
+    """
+    Fills the integer year columns of Data rows that lack them, for manage.py
+    backfill_years. Migration 0010 filled the rows stored before the columns
+    existed; read paths assume they are filled. Rows whose text year is
+    malformed are rewritten with NULL on every run, which is harmless.
+    """
+    filled = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            _unfilled(model, YEAR_FIELDS, using).filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+        )
+        if not rows:
+            break
+        with transaction.atomic(using=using):
+            fill_years(rows)
+            model.objects.using(using).bulk_update(rows, VALUE_FIELDS, batch_size=batch_size)
+        filled += len(rows)
+        last_pk = rows[-1].pk
+    return filled
+
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('first_name', models.CharField(max_length=30, verbose_name='First Name')),
+                ('last_name', models.CharField(max_length=30, verbose_name='Last Name')),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Email Address')),
+                ('phone', models.CharField(max_length=15, unique=True, verbose_name='Phone Number')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is Active')),
+                ('is_staff', models.BooleanField(default=False, verbose_name='Is Staff')),
+                ('is_superuser', models.BooleanField(default=False, verbose_name='Is Superuser')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Date Updated')),
+            ],
+            options={
+                'verbose_name': 'User',
+                'verbose_name_plural': 'Users',
+                'db_table': 'user',
+            },
+        ),
+    ]
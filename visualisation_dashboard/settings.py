@@ -14,6 +14,7 @@ from pathlib import Path
 from datetime import timedelta
 from decouple import config
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'dashboard.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,7 +66,11 @@ AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'dashboard.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -175,3 +181,66 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Data ingestion
+# Number of records validated and inserted per batch in streaming ingest mode.
+DATA_INGEST_BATCH_SIZE = config('DATA_INGEST_BATCH_SIZE', default=1000, cast=int)
+# Largest single record (NDJSON line or JSON array element) an upload may hold.
+DATA_INGEST_MAX_RECORD_BYTES = config('DATA_INGEST_MAX_RECORD_BYTES', default=1024 * 1024, cast=int)
+# Worker threads running background ingest jobs, and where their uploads are spooled.
+# The threads live in the web process that accepted the upload, so mode=async
+# needs a long-lived server process: on a serverless deployment (vercel.json)
+# the process is frozen or ended after the response and the job with it.
+DATA_INGEST_WORKERS = config('DATA_INGEST_WORKERS', default=2, cast=int)
+DATA_INGEST_UPLOAD_DIR = config('DATA_INGEST_UPLOAD_DIR', default=os.path.join(BASE_DIR, 'ingest_uploads'))
+# Minutes without progress after which a running job is taken as lost with its
+# process and marked failed (see manage.py fail_stale_jobs).
+DATA_INGEST_STALE_MINUTES = config('DATA_INGEST_STALE_MINUTES', default=30, cast=int)
+# Hours a chunked upload session may sit without a new chunk before it and its
+# spool file are removed (see manage.py expire_uploads).
+DATA_UPLOAD_SESSION_EXPIRY_HOURS = config('DATA_UPLOAD_SESSION_EXPIRY_HOURS', default=24, cast=int)
+
+# Data export
+# Rows fetched per cursor round trip (and written per streamed chunk).
+DATA_EXPORT_CHUNK_SIZE = config('DATA_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Dashboard response cache
+# Entries are versioned by the dataset generation, so ingests retire them
+# without explicit invalidation. Local memory evicts least recently used
+# entries past MAX_ENTRIES; use FileBasedCache to share between workers.
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+DASHBOARD_CACHE_MAX_ITEM_BYTES = config('DASHBOARD_CACHE_MAX_ITEM_BYTES', default=1024 * 1024, cast=int)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    DASHBOARD_CACHE_ALIAS: {
+        'BACKEND': config('DASHBOARD_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('DASHBOARD_CACHE_LOCATION', default='dashboard'),
+        'TIMEOUT': config('DASHBOARD_CACHE_TIMEOUT', default=3600, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('DASHBOARD_CACHE_MAX_ENTRIES', default=500, cast=int),
+        },
+    },
+}
+
+# Dashboard aggregation engine: "orm" (SQL) or "numpy" (in-memory columns,
+# reloaded when the dataset generation changes). "numpy" needs NumPy
+# installed; without it the dashboard.E001 check stops the server starting.
+DASHBOARD_ENGINE = config('DASHBOARD_ENGINE', default='orm')
+# Where the numpy engine shares its columns between worker processes: one
+# memory-mapped snapshot per dataset generation, written after each load.
+# Defaults to the host's temporary directory, outside the source tree; empty
+# keeps a private copy in every process.
+DASHBOARD_SNAPSHOT_DIR = config(
+    'DASHBOARD_SNAPSHOT_DIR', default=os.path.join(tempfile.gettempdir(), 'dashboard_snapshots')
+)
+
+# Response compression (dashboard.middleware.CompressionMiddleware, for every
+# app): brotli when installed, else gzip, as Accept-Encoding prefers. Smaller
+# responses are not worth compressing.
+RESPONSE_COMPRESSION_MIN_BYTES = config('RESPONSE_COMPRESSION_MIN_BYTES', default=1024, cast=int)
+
+# Full-text search over Data titles and insights: the PostgreSQL text search
+# configuration used for the stored vectors and for queries.
+DASHBOARD_SEARCH_CONFIG = config('DASHBOARD_SEARCH_CONFIG', default='english')